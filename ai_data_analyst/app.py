@@ -1,9 +1,11 @@
+import os
 import streamlit as st
 import pandas as pd
 from modules.connector import DataConnector
-
-# Initialize Modules
-connector = DataConnector()
+from modules.instrumentation import (
+    MetricsCollector, enable_memory_tracking, instrument_all, process_metrics,
+    set_collectors, start_metrics_server, timed
+)
 
 # Page Config
 st.set_page_config(
@@ -13,9 +15,8 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS for UI/UX
-def load_css():
-    st.markdown("""
+# Custom CSS for UI/UX (built once per process; re-emitted on every rerun as Streamlit requires)
+APP_CSS = """
         <style>
         /* Main Gradient Background */
         .stApp {
@@ -106,9 +107,56 @@ def load_css():
             padding: 10px 25px !important;
         }
         </style>
-    """, unsafe_allow_html=True)
+    """
+
+def load_css():
+    st.markdown(APP_CSS, unsafe_allow_html=True)
+
+@st.cache_resource
+def warm_up():
+    """Preloads the Dashboard dependencies once per worker process, in the background."""
+    from modules.warmup import preload
+    return preload()
+
+@st.cache_resource
+def get_store():
+    from modules.store import DatasetStore
+    return DatasetStore()
+
+@st.cache_resource
+def metrics_endpoint():
+    """Serves Prometheus metrics when DATANUDGE_METRICS_PORT is set (on DATANUDGE_METRICS_HOST, default localhost)."""
+    port = os.environ.get("DATANUDGE_METRICS_PORT")
+    host = os.environ.get("DATANUDGE_METRICS_HOST", "127.0.0.1")
+    return start_metrics_server(int(port), host) if port else None
+
+def is_admin():
+    """Process-wide diagnostics (memory tracking, import profiling) are only offered when DATANUDGE_ADMIN is set."""
+    return os.environ.get("DATANUDGE_ADMIN", "").lower() in ("1", "true", "yes")
+
+def data_fingerprint(df, content_key=None):
+    """
+    Analysis-cache fingerprint of a loaded dataset, computed once per frame (loaded frames are never edited
+    in place). Uploads pass the content hash they are stored under, so nothing has to be hashed again.
+    """
+    memo = st.session_state.get('data_fingerprint')
+    if content_key is not None:
+        memo = (df, f"upload:{content_key}")
+        st.session_state.data_fingerprint = memo
+    elif memo is None or memo[0] is not df:
+        from modules.cache import analysis_cache
+        memo = (df, analysis_cache.fingerprint(df))
+        st.session_state.data_fingerprint = memo
+    return memo[1]
+
+def show_chart(fig):
+    # Times Plotly serialization separately from building the figure
+    with timed("st.plotly_chart"):
+        st.plotly_chart(fig, use_container_width=True)
 
 load_css()
+warm_up()
+metrics_endpoint()
 
 # Title
 st.title("DataNudge 🌈")
@@ -119,6 +167,26 @@ if 'data' not in st.session_state:
     st.session_state.data = None
 if 'filename' not in st.session_state:
     st.session_state.filename = ""
+# Keep the connector (and its engine) for the whole session instead of per rerun
+if 'connector' not in st.session_state:
+    st.session_state.connector = DataConnector()
+connector = st.session_state.connector
+
+# Instrumented calls are aggregated per rerun and per session, besides the process-wide totals
+rerun_metrics = MetricsCollector(keep_spans=200)
+session_metrics = st.session_state.setdefault('metrics', MetricsCollector())
+set_collectors(session_metrics, rerun_metrics)
+instrument_all()
+debug_mode = st.sidebar.toggle("🛠️ Debug timings")
+
+with st.sidebar.expander("⏱️ Startup profile"):
+    from modules.warmup import import_profile, warmup_timings
+    if warmup_timings:
+        st.dataframe(pd.Series(warmup_timings, name="seconds"))
+    else:
+        st.caption("Warm-up still running...")
+    if is_admin() and st.button("Profile imports (cold interpreter)"):
+        st.dataframe(import_profile())
 
 # --- TOP NAVIGATION ---
 if st.session_state.data is not None:
@@ -135,13 +203,100 @@ if page == "Home":
     tab1, tab2 = st.tabs(["Upload CSV/Excel", "Connect Database"])
     
     with tab1:
+        from modules.store import content_hash
+        store = get_store()
+
+        optimize_memory = st.checkbox(
+            "🗜️ Optimize memory", value=True,
+            help="Downcast numbers and store repeated text as categories or Arrow strings after loading."
+        )
         uploaded_file = st.file_uploader("Drop your file here", type=['csv', 'xlsx'])
         if uploaded_file:
-            df = connector.load_csv(uploaded_file)
+            file_id = getattr(uploaded_file, 'file_id', uploaded_file.name)
+            excel_options = None
+            if uploaded_file.name.endswith('.xlsx'):
+                from modules.ingest import list_excel_sheets
+                sheets = st.session_state.get('excel_sheets')
+                if sheets is None or sheets[0] != file_id:
+                    sheets = (file_id, list_excel_sheets(uploaded_file))
+                    st.session_state.excel_sheets = sheets
+                sheet_labels = {
+                    s['name']: s['name'] + (f" ({s['rows']:,} rows)" if s['rows'] is not None else "") for s in sheets[1]
+                }
+                col1, col2 = st.columns(2)
+                with col1:
+                    chosen_sheets = st.multiselect("Sheets", list(sheet_labels), default=list(sheet_labels)[:1],
+                                                   format_func=sheet_labels.get,
+                                                   help="Several sheets are stacked with a 'sheet' column.")
+                with col2:
+                    cell_range = st.text_input("Cell range (optional)", placeholder="e.g. A1:F5000",
+                                               help="The first row of the range is used as the header.")
+                excel_options = (tuple(chosen_sheets), cell_range.strip().upper() or None)
+                file_id = (file_id, excel_options)
+            # The stored frame differs with optimisation on or off, so the flag is part of both keys
+            file_id = (file_id, optimize_memory)
+            if st.session_state.get('upload_id') == file_id:
+                # Same upload as the previous rerun: reuse the loaded frame
+                df = st.session_state.data
+            else:
+                key = content_hash(uploaded_file, options=(excel_options, optimize_memory))
+                st.session_state.memory_report = None
+                # Sessions only list the stored datasets they loaded themselves
+                stored_keys = st.session_state.setdefault('stored_keys', [])
+                if key not in stored_keys:
+                    stored_keys.append(key)
+                if store.has(key):
+                    df = store.load(key)
+                    data_fingerprint(df, key)
+                else:
+                    progress = st.progress(0.0, text="Reading file...")
+                    show_progress = lambda p: progress.progress(p, text="Reading file...")
+                    if excel_options is not None:
+                        from modules.parallel import DEFAULT_WORKERS
+                        df = connector.load_excel(uploaded_file, list(excel_options[0]), excel_options[1],
+                                                  workers=DEFAULT_WORKERS, progress_callback=show_progress)
+                    else:
+                        df = connector.load_csv(uploaded_file, progress_callback=show_progress)
+                    progress.empty()
+                    if isinstance(df, pd.DataFrame) and optimize_memory:
+                        from modules.optimize import optimize_dataframe
+                        df, st.session_state.memory_report = optimize_dataframe(df)
+                    if isinstance(df, pd.DataFrame):
+                        data_fingerprint(df, key)
+                        try:
+                            store.save(key, df, uploaded_file.name)
+                        except Exception as e:
+                            st.warning(f"Dataset not cached to disk: {e}")
+                        from modules.approx import APPROXIMATE_MIN_ROWS
+                        from modules.incremental import MAX_TRACKED_COLUMNS, StatsStateStore, refresh_frame_stats
+                        # Frames that open in approximate mode get exact statistics in the background instead
+                        if (len(df) <= APPROXIMATE_MIN_ROWS
+                                and df.select_dtypes(include='number').shape[1] <= MAX_TRACKED_COLUMNS):
+                            from modules.cache import analysis_cache
+                            # A re-upload with appended rows in the same session only pays for the new rows;
+                            # states stay in the session, and the stored prefix hash must match the file
+                            upload_stats = st.session_state.setdefault('upload_stats', StatsStateStore(root=None))
+                            try:
+                                state, processed = refresh_frame_stats(upload_stats, uploaded_file.name, df)
+                                state.seed_cache(analysis_cache, data_fingerprint(df))
+                                if processed < len(df):
+                                    st.info(f"♻️ Recognised {len(df) - processed:,} previously analysed rows; "
+                                            f"statistics updated with {processed:,} new rows.")
+                            except Exception as e:
+                                st.warning(f"Incremental statistics not updated: {e}")
+                if isinstance(df, pd.DataFrame):
+                    st.session_state.upload_id = file_id
             if isinstance(df, pd.DataFrame):
                 st.session_state.data = df
                 st.session_state.filename = uploaded_file.name
                 st.success(f"✅ Loaded {uploaded_file.name}")
+                report = st.session_state.get('memory_report')
+                if report is not None:
+                    from modules.optimize import summarize_report
+                    totals = summarize_report(report)
+                    with st.expander(f"🗜️ Memory: {totals['before_bytes'] / 2**20:.1f} MB → "
+                                     f"{totals['after_bytes'] / 2**20:.1f} MB ({totals['ratio']:.1f}× smaller)"):
+                        st.dataframe(report, hide_index=True)
                 st.dataframe(df.head())
                 if st.button("🚀 Go to Dashboard"):
                     # Force a rerun to switch tabs/radio if state was connected
@@ -149,12 +304,26 @@ if page == "Home":
             else:
                 st.error(f"Error loading file: {df}")
 
+        stored = store.list_datasets(st.session_state.get('stored_keys', []))
+        if stored:
+            st.markdown("---")
+            st.write("**Or reopen a stored dataset:**")
+            labels = {m['key']: f"{m['name']} ({m['rows']:,} rows)" for m in stored}
+            key = st.selectbox("Stored datasets", list(labels), format_func=labels.get, label_visibility="collapsed")
+            if st.button("📂 Open"):
+                st.session_state.data = store.load(key)
+                data_fingerprint(st.session_state.data, key)
+                st.session_state.filename = store.get_metadata(key)['name']
+                st.session_state.upload_id = None
+                st.rerun()
+
     with tab2:
         st.subheader("Database Settings")
         col1, col2 = st.columns(2)
         with col1:
             db_type = st.selectbox("Database Type", ["SQLite", "PostgreSQL", "MySQL"])
             host = st.text_input("Host", "localhost")
+            port = st.text_input("Port", placeholder="Default for database type")
         with col2:
             db_name = st.text_input("Database Name/Path")
             user = st.text_input("Username") 
@@ -162,12 +331,101 @@ if page == "Home":
         password = st.text_input("Password", type="password")
             
         if st.button("Connect DB"):
-            status = connector.connect_db(db_type, host, "5432", user, password, db_name)
+            status = connector.connect_db(db_type, host, port, user, password, db_name)
             if status is True:
                 st.success(f"Connected to {db_name}")
             else:
                  st.error(f"Connection Failed: {status}")
 
+        if connector.engine is not None:
+            st.markdown("---")
+            st.subheader("Browse Tables")
+            tables = connector.get_tables()
+            if tables:
+                table_name = st.selectbox("Table", tables, key="browse_table")
+                col1, col2 = st.columns(2)
+                with col1:
+                    page_size = st.selectbox("Rows per page", [100, 1000, 10000], index=1)
+                # Counting a large table is expensive, so do it once per table
+                row_counts = st.session_state.setdefault('row_counts', {})
+                if table_name not in row_counts:
+                    row_counts[table_name] = connector.count_rows(table_name)
+                total_rows = row_counts[table_name]
+                n_pages = max(1, -(-total_rows // page_size))
+                with col2:
+                    page_no = st.number_input("Page", min_value=1, max_value=n_pages, value=1)
+                if st.button("🔄 Reload from database", help="Bypass cached pages and recount the table."):
+                    connector.query_cache.invalidate(connector.engine, [table_name])
+                    row_counts.pop(table_name, None)
+                    st.rerun()
+                try:
+                    page_df = connector.get_table_data(table_name, (page_no - 1) * page_size, page_size)
+                    cache_stats = connector.query_cache.stats()
+                    st.caption(f"{total_rows:,} rows · page {page_no} of {n_pages} · "
+                               f"query cache: {cache_stats['entries']} results, {cache_stats['bytes'] / 2**20:.1f} MB, "
+                               f"{cache_stats['hits']:,} hits")
+                    if not connector.get_row_key(table_name):
+                        st.caption("⚠️ No primary key or unique index: pages are read unordered and may shift between reads.")
+                    st.dataframe(page_df)
+                    if st.button("📊 Analyze this page"):
+                        from modules.optimize import optimize_dataframe
+                        st.session_state.data = optimize_dataframe(page_df)[0]
+                        st.session_state.filename = table_name
+                        st.rerun()
+                except Exception as e:
+                    st.error(f"Failed to read {table_name}: {e}")
+
+                with st.expander("📈 Incremental summary (only new rows are read)"):
+                    table_columns = connector.get_column_names(table_name)
+                    key_column = st.selectbox(
+                        "Monotonic key column", [None] + table_columns,
+                        format_func=lambda c: "None (primary key, else full rescan)" if c is None else c,
+                        help="New rows are those after the last refresh in key order (ties broken by the primary key). "
+                             "Without a key or primary key the whole table is read again."
+                    )
+                    if st.button("Refresh Statistics", key="btn_incremental"):
+                        from modules.incremental import refresh_table_stats
+                        with st.spinner("Reading new rows..."):
+                            try:
+                                state, processed = refresh_table_stats(connector, table_name, key_column)
+                                if state is None:
+                                    st.info("The table is empty.")
+                                else:
+                                    st.caption(f"{processed:,} new rows processed · {state.rows:,} rows summarised")
+                                    st.dataframe(state.describe())
+                                    st.dataframe(state.missing_values())
+                            except Exception as e:
+                                st.error(f"Refresh failed: {e}")
+
+                with st.expander("🧮 Summarize in database (no rows transferred)"):
+                    col_compute, col_recompute = st.columns(2)
+                    compute = col_compute.button("Compute Summary", key="btn_pushdown")
+                    recompute = col_recompute.button(
+                        "Recompute", key="btn_pushdown_refresh",
+                        help="Summaries are cached until the table changes or for 10 minutes; this queries it again now."
+                    )
+                    if compute or recompute:
+                        from modules.pushdown import PushdownEDA, PushdownRelationshipManager, PushdownUnsupported
+                        with st.spinner("Running aggregates in the database..."):
+                            try:
+                                db_eda = PushdownEDA(connector.engine, table_name)
+                                if recompute:
+                                    db_eda.refresh()
+                                st.write("**Statistics** (quartiles approximated):")
+                                st.dataframe(db_eda.get_basic_stats())
+                                st.write("**Missing Values:**")
+                                st.dataframe(db_eda.get_missing_values())
+                                db_rel = PushdownRelationshipManager(connector.engine, table_name)
+                                fig = db_rel.plot_correlation_heatmap()
+                                if fig:
+                                    show_chart(fig)
+                            except PushdownUnsupported as e:
+                                st.info(str(e))
+                            except Exception as e:
+                                st.error(f"Summary failed: {e}")
+            else:
+                st.info("No tables found in this database.")
+
 # --- PAGE: DASHBOARD ---
 elif page == "Dashboard":
     
@@ -175,12 +433,27 @@ elif page == "Dashboard":
     from modules.eda import EDA
     from modules.relationships import RelationshipManager
     from modules.ai_insights import AIAnalyst
-    import plotly.express as px
+    from modules.charts import histogram_figure, box_figure, category_figure
+    from modules.parallel import DEFAULT_WORKERS
+    from modules.approx import APPROXIMATE_MIN_ROWS
+    instrument_all()
     
     # Initialize Objects
     df = st.session_state.data
-    eda = EDA(df)
-    rel_manager = RelationshipManager(df)
+    approx_mode = st.sidebar.toggle(
+        "⚡ Approximate mode", value=len(df) > APPROXIMATE_MIN_ROWS,
+        help="Show sample-based statistics with confidence intervals first; exact results replace them once computed in the background."
+    )
+    # Analysis objects live as long as the dataset and mode, not one rerun
+    engines_key = st.session_state.get('engines_key')
+    if engines_key is None or engines_key[0] is not df or engines_key[1] != approx_mode:
+        fingerprint = data_fingerprint(df)
+        st.session_state.engines = (
+            EDA(df, approximate=approx_mode, workers=DEFAULT_WORKERS, fingerprint=fingerprint),
+            RelationshipManager(df, approximate=approx_mode, fingerprint=fingerprint, workers=DEFAULT_WORKERS)
+        )
+        st.session_state.engines_key = (df, approx_mode)
+    eda, rel_manager = st.session_state.engines
     
     # AI Config Section (Collapsible)
     with st.expander("🤖 AI Configuration (Gemini API)"):
@@ -188,6 +461,10 @@ elif page == "Dashboard":
         api_key = st.text_input("Enter API Key", value=default_key, type="password")
         ai_analyst = AIAnalyst(api_key=api_key)
 
+    def ai_context():
+        """Prompt context from the page's engines; only built when a button needs it."""
+        return ai_analyst.analyze_dataframe_head(df, eda=eda, rel_manager=rel_manager)
+
     # Horizontal Tabs for Analysis Modules
     t_overview, t_corr, t_trends, t_anomalies, t_ai = st.tabs([
         "📊 Overview", 
@@ -206,29 +483,54 @@ elif page == "Dashboard":
             st.metric("Total Columns", df.shape[1])
             st.write("**Missing Values:**")
             st.dataframe(eda.get_missing_values())
+            if not eda.is_exact("missing_values"):
+                st.caption("Approximate: scaled from sampled rows until the exact counts are computed.")
             
         with col2:
             st.write("**Quick Cleaner:**")
             if api_key:
                 if st.button("✨ Generate Cleaning Rules"):
-                    with st.spinner("AI analyzing..."):
-                        context = ai_analyst.analyze_dataframe_head(df)
-                        insight = ai_analyst.generate_insight(context, "cleaning")
-                        st.markdown(insight)
+                    st.write_stream(ai_analyst.stream_insight(ai_context(), "cleaning"))
             else:
                 st.info("Add API Key for AI Cleaning suggestions.")
 
+        with st.expander("📐 Summary Statistics"):
+            st.dataframe(eda.get_basic_stats())
+            ci = eda.get_confidence_intervals()
+            if ci is not None:
+                st.caption(f"Approximate: estimated from {eda.sample_size:,} sampled rows; min/max are sample extremes. "
+                           "Exact statistics are computing in the background.")
+                st.write("**95% confidence intervals:**")
+                st.dataframe(ci)
+                if st.button("🔄 Check for exact results", key="btn_exact_stats"):
+                    st.rerun()
+
+        num_cols, cat_cols = eda.get_columns_by_type()
+        if cat_cols:
+            with st.expander("🔤 Categorical Columns"):
+                st.dataframe(eda.get_categorical_summary(), hide_index=True)
+                if eda.is_exact(("categorical_summary", 20)):
+                    st.caption("Distinct counts not marked exact are HyperLogLog estimates (about ±1%).")
+                else:
+                    st.caption("Approximate: profiled from sampled rows, so distinct counts are lower bounds. "
+                               "Exact profiles are computing in the background.")
+
         st.markdown("---")
         st.subheader("Distributions")
-        num_cols, cat_cols = eda.get_columns_by_type()
         selected_col = st.selectbox("Select Variable", df.columns, key="dist_sel")
         
         if selected_col in num_cols:
-            fig = px.histogram(df, x=selected_col, marginal="box", title=f"Distribution of {selected_col}", template="plotly_white")
-            st.plotly_chart(fig, use_container_width=True)
+            fig = histogram_figure(df[selected_col], title=f"Distribution of {selected_col}",
+                                   summary=eda.get_histogram(selected_col))
+            show_chart(fig)
         else:
-            fig = px.bar(df[selected_col].value_counts(), title=f"Counts of {selected_col}", template="plotly_white")
-            st.plotly_chart(fig, use_container_width=True)
+            profile = eda.get_categorical_profile(selected_col)
+            show_chart(category_figure(profile, title=f"Counts of {selected_col}"))
+            distinct = f"{profile['distinct']:,}" if profile['distinct_exact'] else f"≈{profile['distinct']:,}"
+            note = f"{distinct} distinct values"
+            if profile['max_error'] and len(profile['top']):
+                note += f" · top counts may be low by up to {profile['max_error']:,}"
+            st.caption(note)
 
     # --- TAB 2: Correlations ---
     with t_corr:
@@ -237,15 +539,24 @@ elif page == "Dashboard":
             st.subheader("Heatmap")
             fig = rel_manager.plot_correlation_heatmap()
             if fig:
-                st.plotly_chart(fig, use_container_width=True)
+                if not rel_manager.is_exact():
+                    st.caption(f"Approximate: correlations from {rel_manager.sample_size:,} sampled rows. "
+                               "Exact values replace them once computed in the background.")
+                show_chart(fig)
             else:
                 st.warning("Not enough numerical data.")
         with col2:
             st.subheader("Top Correlated Pairs")
-            pairs = rel_manager.find_highly_correlated_pairs()
+            # Strongest pairs first; wide tables can have thousands above threshold
+            pairs = rel_manager.find_highly_correlated_pairs(top_k=50)
             if pairs:
+                intervals = rel_manager.get_correlation_intervals()
                 for p in pairs:
-                    st.success(f"{p[0]} ↔ {p[1]} ({p[2]:.2f})")
+                    if intervals is not None:
+                        low, high = intervals[0].loc[p[0], p[1]], intervals[1].loc[p[0], p[1]]
+                        st.success(f"{p[0]} ↔ {p[1]} ({p[2]:.2f}, 95% CI {low:.2f} to {high:.2f})")
+                    else:
+                        st.success(f"{p[0]} ↔ {p[1]} ({p[2]:.2f})")
             else:
                 st.info("No strong correlations.")
                 
@@ -268,10 +579,28 @@ elif page == "Dashboard":
             with col2:
                 value_col = st.selectbox("Value Column", df.select_dtypes('number').columns, key="trend_val")
             
-            fig, growth = rel_manager.detect_trends(date_col, value_col)
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                freq_label = st.selectbox("Resample", ["Raw", "Day", "Week", "Month"], index=0, key="trend_freq")
+            with col2:
+                agg = st.selectbox("Aggregation", ["mean", "sum", "median", "min", "max", "count"], key="trend_agg",
+                                   disabled=freq_label == "Raw")
+            with col3:
+                window = st.number_input("Rolling window (periods)", min_value=0, value=0, key="trend_window")
+            freq = {"Raw": None, "Day": "D", "Week": "W", "Month": "MS"}[freq_label]
+            
+            fig, growth = rel_manager.detect_trends(date_col, value_col, freq=freq, agg=agg, window=window or None)
             if fig:
-                st.metric("Growth Rate (Start to End)", f"{growth:.2f}%")
-                st.plotly_chart(fig, use_container_width=True)
+                col1, col2 = st.columns(2)
+                col1.metric("Growth Rate (Start to End)", f"{growth:.2f}%")
+                if freq:
+                    trend = rel_manager.get_trend_series(date_col, value_col, freq, agg, window or None)
+                    latest = trend['growth_pct'].dropna()
+                    if not latest.empty:
+                        col2.metric(f"Latest {freq_label}-over-{freq_label}", f"{latest.iloc[-1]:.2f}%")
+                show_chart(fig)
+            else:
+                st.warning(f"Could not analyze trend: {growth}")
         else:
             st.warning("No date column detected. Please ensure your date column has 'date' or 'time' in the name.")
 
@@ -279,14 +608,24 @@ elif page == "Dashboard":
     with t_anomalies:
         st.subheader("Outlier Detection")
         numeric_cols, _ = eda.get_columns_by_type()
-        selected_col = st.selectbox("Select Column", numeric_cols, key="out_sel")
+        col1, col2 = st.columns(2)
+        with col1:
+            selected_col = st.selectbox("Select Column", numeric_cols, key="out_sel")
+        with col2:
+            method = st.selectbox("Method", ["zscore", "mad", "iqr"], key="out_method",
+                                  format_func={"zscore": "Z-score", "mad": "Robust (MAD)", "iqr": "IQR fences"}.get)
         
-        outliers = eda.detect_outliers()
+        # Only the selected column is scored
+        outliers = eda.detect_outliers(method=method, columns=[selected_col]) if selected_col else {}
         if selected_col in outliers:
-            cnt = len(outliers[selected_col])
+            cnt = outliers[selected_col]
             st.error(f"Found {cnt} outliers in {selected_col}")
-            fig = px.box(df, y=selected_col, points="all", title=f"Outliers: {selected_col}", color_discrete_sequence=['red'])
-            st.plotly_chart(fig, use_container_width=True)
+            values, flagged = eda.get_outlier_values(selected_col, method)
+            if len(values) < len(df):
+                st.caption(f"Approximate: count scaled from {len(values):,} sampled rows, which the plot shows. "
+                           "Exact results replace them once computed in the background.")
+            fig = box_figure(values, title=f"Outliers: {selected_col}", outliers=flagged)
+            show_chart(fig)
         else:
             st.success("No outliers detected.")
 
@@ -297,8 +636,29 @@ elif page == "Dashboard":
         
         if not api_key:
             st.warning("⚠️ Please configure API Key in the expander above to use these features.")
-        
-        context = ai_analyst.analyze_dataframe_head(df)
+
+        # Section 0: everything at once, fanned out in parallel
+        st.subheader("⚡ Full AI Briefing")
+        st.write("Generate every insight type in parallel; results appear as they arrive.")
+        if st.button("Generate All Insights", key="btn_all"):
+            tasks = {
+                "story": "📖 The Story",
+                "summary": "🔍 Key Findings",
+                "kpi": "📊 Recommended KPIs",
+                "cleaning": "🧹 Cleaning Rules",
+                "cohort": "👥 Suggested Cohorts",
+            }
+            placeholders = {}
+            for task, title in tasks.items():
+                with st.expander(title, expanded=True):
+                    placeholders[task] = st.empty()
+                    placeholders[task].info("Waiting for response...")
+            for task, text, latency in ai_analyst.generate_insights(ai_context(), list(tasks)):
+                with placeholders[task].container():
+                    st.markdown(text)
+                    st.caption(f"⏱️ {latency:.1f}s")
+
+        st.divider()
         
         # Vertical Layout for better readability
         
@@ -306,10 +666,9 @@ elif page == "Dashboard":
         st.subheader("📝 Data Storytelling")
         st.write("Turn your data into a compelling narrative.")
         if st.button("Generate Data Story", key="btn_story"):
-            with st.spinner("Crafting narrative..."):
-                story = ai_analyst.generate_insight(context, "story")
-                st.markdown("### 📖 The Story")
-                st.markdown(story)
+            st.markdown("### 📖 The Story")
+            # Tokens render as they arrive; leaving the page closes the stream
+            st.write_stream(ai_analyst.stream_insight(ai_context(), "story"))
         
         st.divider()
         
@@ -317,10 +676,8 @@ elif page == "Dashboard":
         st.subheader("💡 Strategic Insights")
         st.write("Discover key trends and actionable takeaways.")
         if st.button("Generate Strategic Analysis", key="btn_insight"):
-            with st.spinner("Analyzing patterns..."):
-                summary = ai_analyst.generate_insight(context, "summary")
-                st.markdown("### 🔍 Key Findings")
-                st.markdown(summary)
+            st.markdown("### 🔍 Key Findings")
+            st.write_stream(ai_analyst.stream_insight(ai_context(), "summary"))
                 
         st.divider()
         
@@ -328,35 +685,65 @@ elif page == "Dashboard":
         st.subheader("🎯 KPI & Metrics")
         st.write("Get recommended performance indicators based on your data.")
         if st.button("Suggest KPIs", key="btn_kpi"):
-            with st.spinner("Designing KPIs..."):
-                kpis = ai_analyst.generate_insight(context, "kpi")
-                st.markdown("### 📊 Recommended KPIs")
-                st.markdown(kpis)
+            st.markdown("### 📊 Recommended KPIs")
+            st.write_stream(ai_analyst.stream_insight(ai_context(), "kpi"))
 
 # --- PAGE: ADVANCED ANALYSIS / EXPORT ---
 elif page == "Export":
-    from modules.report_generator import ReportGenerator
+    import time
+    from modules.eda import EDA
+    from modules.report_generator import submit_report
+    instrument_all()
     
     st.header("📤 Export Report")
     st.write("Generate a PDF report of the current analysis.")
     
-    if st.button("Generate PDF Report"):
-        with st.spinner("Generating PDF..."):
-            try:
-                gen = ReportGenerator(st.session_state.data)
-                pdf_path = "data_nudge_report.pdf"
-                gen.generate_report(pdf_path)
-                
-                with open(pdf_path, "rb") as f:
-                    st.download_button(
-                        label="Download PDF",
-                        data=f,
-                        file_name="DataNudge_Report.pdf",
-                        mime="application/pdf"
-                    )
-                st.success("Report generated successfully!")
-            except Exception as e:
-                st.error(f"Failed to generate report: {e}")
-
+    # Each session renders into its own in-memory buffer on a background worker
+    job = st.session_state.get('report_job')
+    if job is not None and job['data'] is not st.session_state.data:
+        job = None
+    if st.button("Generate PDF Report", disabled=job is not None and not job['future'].done()):
+        progress = {'fraction': 0.0, 'message': "Starting..."}
+        job = {
+            'data': st.session_state.data,
+            'progress': progress,
+            'future': submit_report(
+                st.session_state.data,
+                eda=EDA(st.session_state.data, fingerprint=data_fingerprint(st.session_state.data)),
+                progress_callback=lambda fraction, message: progress.update(fraction=fraction, message=message)
+            ),
+        }
+        st.session_state.report_job = job
+    
+    if job is not None:
+        if not job['future'].done():
+            st.progress(job['progress']['fraction'], text=job['progress']['message'])
+            time.sleep(0.5)
+            st.rerun()
+        try:
+            st.download_button(
+                label="Download PDF",
+                data=job['future'].result(),
+                file_name="DataNudge_Report.pdf",
+                mime="application/pdf"
+            )
+            st.success("Report generated successfully!")
+        except Exception as e:
+            st.error(f"Failed to generate report: {e}")
 
+# --- DEBUG PANEL ---
+if debug_mode:
+    with st.sidebar.expander("🛠️ Timings", expanded=True):
+        if is_admin():
+            st.toggle("Track memory (slower)", key="track_memory",
+                      help="Runs tracemalloc for the whole process while any admin session has it on.")
+        st.write("**This rerun**")
+        st.dataframe(pd.DataFrame(rerun_metrics.summary()), hide_index=True)
+        st.write("**This session**")
+        st.dataframe(pd.DataFrame(session_metrics.summary()), hide_index=True)
+        st.download_button("⬇️ Prometheus metrics", process_metrics.prometheus_text(),
+                           file_name="metrics.txt", mime="text/plain")
 
+if is_admin():
+    # Each session holds its own claim (its metrics collector), released when switched off or the session ends
+    enable_memory_tracking(session_metrics, debug_mode and st.session_state.get('track_memory', False))
@@ -0,0 +1,233 @@
+"""
+Benchmarks for the analysis modules across dataset shapes.
+
+Run from the ai_data_analyst directory:
+
+    python -m benchmarks.bench                      # run and compare with the baseline
+    python -m benchmarks.bench --save-baseline      # record a new baseline
+    python -m benchmarks.bench --size large --only EDA
+
+Every operation runs against a fresh AnalysisCache so results measure
+computation, not cache hits. Wall time is the best of --repeat untraced runs;
+peak memory comes from one extra run under tracemalloc.
+"""
+import argparse
+import gc
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from modules.cache import AnalysisCache
+from modules.connector import DataConnector
+from modules.eda import EDA
+from modules.relationships import RelationshipManager
+from modules.report_generator import ReportGenerator
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(os.path.dirname(BENCH_DIR))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+# name: (rows, numeric columns, categorical columns, null density, csv encoding)
+SYNTHETIC = {
+    "small": {
+        "narrow": (10_000, 8, 4, 0.0, "utf-8"),
+        "wide": (2_000, 200, 20, 0.05, "utf-8"),
+        "nulls_cp1252": (10_000, 8, 4, 0.3, "cp1252"),
+    },
+    "medium": {
+        "narrow": (200_000, 10, 5, 0.0, "utf-8"),
+        "wide": (20_000, 500, 50, 0.05, "utf-8"),
+        "nulls_cp1252": (200_000, 10, 5, 0.3, "cp1252"),
+    },
+    "large": {
+        "narrow": (2_000_000, 10, 5, 0.0, "utf-8"),
+        "wide": (100_000, 1000, 100, 0.05, "utf-8"),
+        "nulls_cp1252": (1_000_000, 10, 5, 0.3, "cp1252"),
+    },
+}
+
+# Sample datasets shipped in the repository
+REPO_DATASETS = {
+    "EasyVisa": "Easy Visa Approval - Prediction/EasyVisa.csv",
+    "used_phone_data": "Recell Value Prediction/used_phone_data.csv",
+    "stock_data": "Clustering - Trade Groups/stock_data.csv",
+    "wnv_train": "West Nile Virus Control - Prediction/assets/train.csv",
+    "ames_train": "project_21/datasets/train.csv",
+}
+
+
+def synthetic_frame(rows, numeric, categorical, null_density=0.0, seed=0):
+    """Random frame with normal/lognormal numerics, low-cardinality text columns and a date column."""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(numeric):
+        values = rng.normal(i, 1 + i % 5, rows) if i % 2 == 0 else rng.lognormal(0, 1, rows)
+        if null_density:
+            values[rng.random(rows) < null_density] = np.nan
+        data[f"num_{i}"] = values
+    labels = np.array(["alpha", "beta", "gamma", "delta", "café", "naïve"])
+    for i in range(categorical):
+        values = labels[rng.integers(0, min(len(labels), 2 + i), rows)].astype(object)
+        if null_density:
+            values[rng.random(rows) < null_density] = None
+        data[f"cat_{i}"] = values
+    data["date"] = pd.date_range("2020-01-01", periods=rows, freq="min")
+    return pd.DataFrame(data)
+
+
+class Upload(io.BytesIO):
+    """In-memory stand-in for a Streamlit UploadedFile."""
+
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+
+
+def _csv_bytes(df, encoding):
+    return df.to_csv(index=False).encode(encoding, errors="replace")
+
+
+def _operations(df, csv_bytes, name):
+    """Benchmarked operations as (label, callable) pairs; each callable starts from a cold cache."""
+    def load():
+        return DataConnector().load_csv(Upload(csv_bytes, f"{name}.csv"))
+
+    def eda_call(method):
+        return lambda: getattr(EDA(df, cache=AnalysisCache()), method)()
+
+    def rel_call(method, *args):
+        return lambda: getattr(RelationshipManager(df, cache=AnalysisCache()), method)(*args)
+
+    def report():
+        return ReportGenerator(df, eda=EDA(df, cache=AnalysisCache())).render()
+
+    return [
+        ("DataConnector.load_csv", load),
+        ("EDA.fingerprint", lambda: EDA(df, cache=AnalysisCache())),
+        ("EDA.get_basic_stats", eda_call("get_basic_stats")),
+        ("EDA.get_missing_values", eda_call("get_missing_values")),
+        ("EDA.detect_outliers", eda_call("detect_outliers")),
+        ("EDA.get_correlation_matrix", eda_call("get_correlation_matrix")),
+        ("RelationshipManager.find_highly_correlated_pairs", rel_call("find_highly_correlated_pairs", 0.8)),
+        ("ReportGenerator.render", report),
+    ]
+
+
+def measure(fn, repeat=3):
+    """Returns (best wall seconds, peak traced bytes) for fn."""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def datasets(size, include_repo=True):
+    """Yields (name, DataFrame, csv bytes) for the synthetic shapes and the repo samples."""
+    for name, (rows, numeric, categorical, nulls, encoding) in SYNTHETIC[size].items():
+        df = synthetic_frame(rows, numeric, categorical, nulls)
+        yield f"synthetic/{name}", df, _csv_bytes(df, encoding)
+    if include_repo:
+        for name, path in REPO_DATASETS.items():
+            full_path = os.path.join(REPO_ROOT, path)
+            if not os.path.exists(full_path):
+                continue
+            with open(full_path, "rb") as f:
+                raw = f.read()
+            yield f"repo/{name}", pd.read_csv(io.BytesIO(raw)), raw
+
+
+def run(size="small", repeat=3, only=None, include_repo=True, log=print):
+    """Runs every benchmark and returns a DataFrame of results."""
+    rows = []
+    for dataset, df, csv_bytes in datasets(size, include_repo):
+        log(f"{dataset}: {df.shape[0]} x {df.shape[1]}")
+        for label, fn in _operations(df, csv_bytes, dataset.split("/")[-1]):
+            if only and not any(o in label for o in only):
+                continue
+            seconds, peak = measure(fn, repeat)
+            rows.append({"dataset": dataset, "operation": label, "rows": df.shape[0],
+                         "columns": df.shape[1], "seconds": seconds, "peak_mb": peak / 2**20})
+            log(f"  {label:<50} {seconds * 1000:10.1f} ms {peak / 2**20:10.1f} MB")
+    return pd.DataFrame(rows)
+
+
+def compare(results, baseline, tolerance=0.25, min_seconds=0.005):
+    """
+    Joins results with a baseline and flags regressions: slower or more memory
+    than the baseline by more than `tolerance` (relative), ignoring timings
+    below min_seconds where noise dominates.
+    """
+    merged = results.merge(baseline, on=["dataset", "operation"], how="left", suffixes=("", "_baseline"))
+    merged["time_ratio"] = merged["seconds"] / merged["seconds_baseline"]
+    merged["memory_ratio"] = merged["peak_mb"] / merged["peak_mb_baseline"]
+    slower = (merged["time_ratio"] > 1 + tolerance) & (merged["seconds"] > min_seconds)
+    bigger = (merged["memory_ratio"] > 1 + tolerance) & (merged["peak_mb"] > 1)
+    merged["regression"] = slower | bigger
+    return merged
+
+
+def load_baseline(path):
+    with open(path) as f:
+        stored = json.load(f)
+    return stored["size"], pd.DataFrame(stored["results"])
+
+
+def save_baseline(path, size, results):
+    with open(path, "w") as f:
+        json.dump({"size": size, "python": sys.version.split()[0], "pandas": pd.__version__,
+                   "results": results.to_dict(orient="records")}, f, indent=1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the DataNudge analysis modules.")
+    parser.add_argument("--size", choices=list(SYNTHETIC), default="small")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="*", help="run operations whose name contains any of these")
+    parser.add_argument("--no-repo", action="store_true", help="skip the sample CSVs in the repository")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    results = run(args.size, args.repeat, args.only, not args.no_repo)
+    if args.save_baseline:
+        save_baseline(args.baseline, args.size, results)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print("No baseline found; run with --save-baseline to create one.")
+        return 0
+
+    size, baseline = load_baseline(args.baseline)
+    if size != args.size:
+        print(f"Baseline was recorded with --size {size}; not comparing.")
+        return 0
+    merged = compare(results, baseline, args.tolerance)
+    pd.set_option("display.width", 160)
+    print(merged[["dataset", "operation", "seconds", "seconds_baseline", "time_ratio",
+                  "peak_mb", "memory_ratio", "regression"]].to_string(index=False))
+    regressions = merged[merged["regression"]]
+    if not regressions.empty:
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,23 +1,20 @@
-import os
-import requests
-import json
-import streamlit as st
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from modules.llm_client import GEMINI_BASE_URL, InsightError, get_client, response_cache
+from modules.profile import DEFAULT_TOKEN_BUDGET, build_profile
 
 class AIAnalyst:
-    def __init__(self, api_key=None, provider="Gemini"):
+    def __init__(self, api_key=None, provider="Gemini", base_url=GEMINI_BASE_URL, cache=None, **client_options):
         self.provider = provider
         self.api_key = api_key
-        # Gemini REST URL (using v1beta for latest features)
-        self.url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash-latest:generateContent"
-
-    def generate_insight(self, context, task_type):
-        """
-        Generates insights based on data context and task type via REST API.
-        This implementation avoids SDK dependency for maximum compatibility.
-        """
-        if not self.api_key:
-             return "⚠️ API Key not found. Please provide a Google Gemini API key (Free Tier) in the settings."
+        self.base_url = base_url
+        self.cache = cache if cache is not None else response_cache
+        # Pooled, retrying client shared by every AIAnalyst with the same key
+        self.client = get_client(api_key, base_url, **client_options) if api_key else None
 
+    def build_prompt(self, context, task_type):
+        """Returns the prompt text for a task type."""
         prompts = {
             "summary": f"Analyze this dataset summary and provide 3 top strategic insights. Dataset Stats: {context}",
             "story": f"Write a compelling data story (narrative) based on these findings. Explain the 'Why' behind the data. Context: {context}",
@@ -26,37 +23,100 @@ class AIAnalyst:
             "cohort": f"Recommend 3 customer/entity cohorts to analyze for better segmentation. Context: {context}"
         }
         
-        prompt_text = prompts.get(task_type, f"Analyze this data: {context}")
-        
-        try:
-            if self.provider == "Gemini":
-                # Prepare REST payload
-                headers = {'Content-Type': 'application/json'}
-                payload = {
-                    "contents": [{
-                        "parts": [{"text": prompt_text}]
-                    }]
-                }
-                
-                response = requests.post(f"{self.url}?key={self.api_key}", 
-                                         headers=headers, 
-                                         data=json.dumps(payload))
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    # Extract text from response
-                    try:
-                        return result['candidates'][0]['content']['parts'][0]['text']
-                    except (KeyError, IndexError):
-                        return f"❌ Unexpected API Response Format: {result}"
-                else:
-                    return f"❌ AI API Error ({response.status_code}): {response.text}"
-            
+        return prompts.get(task_type, f"Analyze this data: {context}")
+
+    def generate_insight(self, context, task_type, use_cache=True):
+        """
+        Generates insights based on data context and task type via REST API.
+        This implementation avoids SDK dependency for maximum compatibility.
+        Successful responses are cached by (provider, task_type, context).
+        """
+        if not self.api_key:
+             return "⚠️ API Key not found. Please provide a Google Gemini API key (Free Tier) in the settings."
+        if self.provider != "Gemini":
             return "Only Gemini provider is currently implemented via REST."
-            
+
+        cache_key = self.cache.make_key(self.provider, task_type, context)
+        if use_cache:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        try:
+            text = self.client.generate(self.build_prompt(context, task_type))
+        except InsightError as e:
+            return f"❌ {e}"
         except Exception as e:
             return f"❌ AI Insight Error: {str(e)}"
+        self.cache.put(cache_key, text)
+        return text
 
-    def analyze_dataframe_head(self, df):
-        """Converts head of DF to string context for AI."""
-        return df.head(5).to_string() + f"\n\nColumns: {list(df.columns)}\nShape: {df.shape}"
+    def stream_insight(self, context, task_type, use_cache=True):
+        """
+        Streams an insight as text fragments for incremental display.
+        The full text is cached once the stream completes; a stream closed early is not.
+        """
+        if not self.api_key:
+            yield "⚠️ API Key not found. Please provide a Google Gemini API key (Free Tier) in the settings."
+            return
+        if self.provider != "Gemini":
+            yield "Only Gemini provider is currently implemented via REST."
+            return
+
+        cache_key = self.cache.make_key(self.provider, task_type, context)
+        cached = self.cache.get(cache_key) if use_cache else None
+        if cached is not None:
+            yield cached
+            return
+
+        parts = []
+        try:
+            for fragment in self.client.stream(self.build_prompt(context, task_type)):
+                parts.append(fragment)
+                yield fragment
+        except InsightError as e:
+            yield f"\n\n❌ {e}"
+            return
+        except Exception as e:
+            yield f"\n\n❌ AI Insight Error: {str(e)}"
+            return
+        if parts:
+            self.cache.put(cache_key, "".join(parts))
+
+    async def agenerate_insight(self, context, task_type, use_cache=True):
+        """Async variant of generate_insight so several insights can be awaited concurrently."""
+        return await asyncio.to_thread(self.generate_insight, context, task_type, use_cache)
+
+    def generate_insights(self, context, task_types, max_concurrency=5, use_cache=True):
+        """
+        Generates several insight types concurrently for the same context.
+        Yields (task_type, text, latency_seconds) as each one completes.
+        """
+        def timed(task_type):
+            start = time.perf_counter()
+            text = self.generate_insight(context, task_type, use_cache)
+            return task_type, text, time.perf_counter() - start
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(task_types)))) as pool:
+            futures = [pool.submit(timed, task_type) for task_type in task_types]
+            for future in as_completed(futures):
+                yield future.result()
+
+    async def agenerate_insights(self, context, task_types, max_concurrency=5, use_cache=True):
+        """Async batch: returns {task_type: (text, latency_seconds)} with at most max_concurrency in flight."""
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def timed(task_type):
+            async with semaphore:
+                start = time.perf_counter()
+                text = await self.agenerate_insight(context, task_type, use_cache)
+                return task_type, (text, time.perf_counter() - start)
+
+        return dict(await asyncio.gather(*(timed(t) for t in task_types)))
+
+    def analyze_dataframe_head(self, df, token_budget=DEFAULT_TOKEN_BUDGET, eda=None, rel_manager=None):
+        """
+        Builds a compact, token-budgeted profile of the DataFrame as context for AI.
+        Pass the page's EDA/RelationshipManager so their cached results are reused.
+        """
+        return build_profile(df, token_budget, eda=eda, rel_manager=rel_manager)
@@ -0,0 +1,132 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_SAMPLE_SIZE = 100000
+# Datasets with more rows open the dashboard in approximate mode
+APPROXIMATE_MIN_ROWS = 1_000_000
+
+# Exact results are promoted off the Streamlit script thread
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="exact-stats")
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+def draw_sample(df, sample_size=DEFAULT_SAMPLE_SIZE, random_state=0):
+    """Uniform row sample; small frames are returned whole."""
+    if len(df) <= sample_size:
+        return df
+    return df.sample(sample_size, random_state=random_state)
+
+
+class SampledStats:
+    """
+    Statistics estimated from a row sample, with confidence intervals that
+    account for the finite population the sample was drawn from.
+    """
+
+    def __init__(self, sample, population_size, confidence=0.95):
+        self.sample = sample
+        self.sample_size = len(sample)
+        self.population_size = population_size
+        self.confidence = confidence
+        self._z = NormalDist().inv_cdf(0.5 + confidence / 2)
+
+    @property
+    def is_exact(self):
+        return self.sample_size == self.population_size
+
+    def _fpc(self, n):
+        # Finite population correction for sampling without replacement
+        N = self.population_size
+        return np.sqrt((N - n) / (N - 1)) if N > 1 else 0.0
+
+    def describe(self):
+        """describe() of the sample with the count row scaled to the full dataset."""
+        desc = self.sample.describe()
+        if not self.is_exact and 'count' in desc.index:
+            desc.loc['count'] = (desc.loc['count'] * self.population_size / self.sample_size).round()
+        return desc
+
+    def confidence_intervals(self):
+        """
+        Per numerical column: interval bounds for the mean (normal approximation)
+        and the median (order-statistic interval).
+        """
+        numeric = self.sample.select_dtypes(include=[np.number])
+        rows = {}
+        for col in numeric.columns:
+            values = np.sort(numeric[col].dropna().to_numpy(dtype=np.float64))
+            n = len(values)
+            if n < 2:
+                rows[col] = [np.nan] * 4
+                continue
+            margin = self._z * values.std(ddof=1) / np.sqrt(n) * self._fpc(n)
+            mean = values.mean()
+            # Ranks n/2 -/+ z*sqrt(n)/2 bracket the median with the requested confidence
+            half_width = self._z * np.sqrt(n) / 2
+            lo_rank = int(np.clip(np.floor(n / 2 - half_width), 0, n - 1))
+            hi_rank = int(np.clip(np.ceil(n / 2 + half_width), 0, n - 1))
+            rows[col] = [mean - margin, mean + margin, values[lo_rank], values[hi_rank]]
+        return pd.DataFrame.from_dict(
+            rows, orient='index', columns=['mean_low', 'mean_high', 'median_low', 'median_high']
+        )
+
+    def correlation(self):
+        return self.sample.select_dtypes(include=[np.number]).corr()
+
+    def correlation_intervals(self):
+        """Fisher z-transform bounds (low, high) for every correlation coefficient."""
+        numeric = self.sample.select_dtypes(include=[np.number])
+        corr = numeric.corr().to_numpy()
+        valid = numeric.notna().to_numpy(dtype=np.float64)
+        n = valid.T @ valid
+        with np.errstate(invalid="ignore", divide="ignore"):
+            z = np.arctanh(np.clip(corr, -0.999999, 0.999999))
+            se = 1 / np.sqrt(n - 3)
+            low, high = np.tanh(z - self._z * se), np.tanh(z + self._z * se)
+        low[n <= 3], high[n <= 3] = -1.0, 1.0
+        np.fill_diagonal(low, 1.0)
+        np.fill_diagonal(high, 1.0)
+        cols = numeric.columns
+        return pd.DataFrame(low, index=cols, columns=cols), pd.DataFrame(high, index=cols, columns=cols)
+
+
+def promote_exact(cache, fingerprint, name, compute):
+    """
+    Schedules compute() in the background and stores its result in the cache
+    under (fingerprint, name). Returns True once the exact result is cached.
+    A result too large for the cache leaves a marker instead, so it is not
+    recomputed on every rerun and the approximation stays in use.
+    """
+    if cache.contains(fingerprint, name):
+        return True
+    key = (fingerprint, name)
+    with _pending_lock:
+        if key in _pending or cache.contains(fingerprint, (name, "too_large")):
+            return False
+
+        def run():
+            try:
+                cache.put(fingerprint, name, compute())
+                if not cache.contains(fingerprint, name):
+                    cache.put(fingerprint, (name, "too_large"), True)
+            finally:
+                with _pending_lock:
+                    _pending.pop(key, None)
+
+        _pending[key] = _executor.submit(run)
+    return False
+
+
+def approximate_or_exact(cache, fingerprint, name, exact, approximate, enabled=True):
+    """
+    Returns the exact result when it is cached (or approximation is off);
+    otherwise returns approximate() and promotes exact() in the background.
+    """
+    if not enabled or promote_exact(cache, fingerprint, name, exact):
+        return cache.get_or_compute(fingerprint, name, exact)
+    return approximate()
@@ -0,0 +1,157 @@
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Rows hashed for a fingerprint; larger frames are fingerprinted from an evenly spaced sample
+FINGERPRINT_SAMPLE_ROWS = 100_000
+# Shallow copies are only isolated from the cached data under copy-on-write (always on from pandas 3)
+_COPY_ON_WRITE = int(pd.__version__.split(".")[0]) >= 3
+
+
+def dataset_fingerprint(df, sample_rows=FINGERPRINT_SAMPLE_ROWS):
+    """
+    Builds a cheap, stable fingerprint for a DataFrame from its shape, column
+    names, dtypes, index and the values of at most `sample_rows` evenly
+    spaced rows, so the cost stays flat however large the data grows. Edits
+    to rows outside the sample keep the fingerprint: loaded frames are
+    treated as immutable, and callers that know the source content (such as
+    an upload's content hash) can use that as the fingerprint instead.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(df.shape).encode())
+    digest.update(repr([(str(c), str(t)) for c, t in df.dtypes.items()]).encode())
+    index = df.index
+    if len(df) > sample_rows:
+        df = df.take(np.linspace(0, len(df) - 1, sample_rows).astype(np.int64))
+    if isinstance(index, pd.RangeIndex):
+        digest.update(repr((index.start, index.stop, index.step)).encode())
+    else:
+        digest.update(pd.util.hash_pandas_object(df.index).values.tobytes())
+    for i in range(df.shape[1]):
+        hashes = pd.util.hash_pandas_object(df.iloc[:, i], index=False).values
+        digest.update(hashes.tobytes())
+    return digest.hexdigest()
+
+
+def estimate_size(value):
+    """Rough in-memory size of a cached result in bytes."""
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def _read_only(value):
+    """
+    What callers get for a cached value: copies of pandas objects (shallow
+    under copy-on-write, where their mutations never reach the cached data),
+    read-only views of arrays and copies of containers.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        return value.copy(deep=not _COPY_ON_WRITE)
+    if isinstance(value, np.ndarray):
+        view = value.view()
+        view.flags.writeable = False
+        return view
+    if isinstance(value, dict):
+        return {k: _read_only(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_read_only(v) for v in value)
+    return value
+
+
+class AnalysisCache:
+    """
+    Process-wide LRU cache for analysis results, keyed by dataset fingerprint.
+    Entries are evicted least-recently-used first once either the entry count
+    or the byte budget is exceeded.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=512 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def fingerprint(self, df):
+        """
+        Returns the fingerprint of df (see dataset_fingerprint); compute it
+        once per dataset and pass it on.
+        """
+        return dataset_fingerprint(df)
+
+    def get(self, fingerprint, name, default=None):
+        with self._lock:
+            key = (fingerprint, name)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return _read_only(self._entries[key][0])
+            self.misses += 1
+            return default
+
+    def contains(self, fingerprint, name):
+        with self._lock:
+            return (fingerprint, name) in self._entries
+
+    def put(self, fingerprint, name, value):
+        size = estimate_size(value)
+        with self._lock:
+            key = (fingerprint, name)
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                return value
+            self._entries[key] = (value, size)
+            self._bytes += size
+            self._evict()
+        return _read_only(value)
+
+    def get_or_compute(self, fingerprint, name, compute):
+        """Returns the cached result for (fingerprint, name), computing it on a miss."""
+        sentinel = object()
+        value = self.get(fingerprint, name, sentinel)
+        if value is not sentinel:
+            return value
+        return self.put(fingerprint, name, compute())
+
+    def invalidate(self, fingerprint=None):
+        """Drops every entry for one dataset, or the whole cache."""
+        with self._lock:
+            if fingerprint is None:
+                self._entries.clear()
+                self._bytes = 0
+                return
+            for key in [k for k in self._entries if k[0] == fingerprint]:
+                self._bytes -= self._entries.pop(key)[1]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+
+
+# Shared across Streamlit reruns and sessions (module objects persist in the process)
+analysis_cache = AnalysisCache()
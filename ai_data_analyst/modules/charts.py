@@ -0,0 +1,168 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+# Upper bounds on what a single chart ships to the browser
+MAX_BINS = 100
+MAX_LINE_POINTS = 2000
+MAX_OUTLIER_POINTS = 2000
+MAX_LABEL_CHARS = 40
+
+
+def _finite(series):
+    values = pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    return values[np.isfinite(values)]
+
+
+def lttb_indices(x, y, n_out=MAX_LINE_POINTS):
+    """
+    Largest-Triangle-Three-Buckets downsampling: returns the indices of
+    n_out points that preserve the visual shape (including peaks) of the
+    line through (x, y). x must be sorted and numeric.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    prev = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket is the third triangle vertex
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        nxt = slice(end, max(next_end, end + 1))
+        avg_x, avg_y = x[nxt].mean(), y[nxt].mean()
+        bx, by = x[start:end], y[start:end]
+        area = np.abs((x[prev] - avg_x) * (by - y[prev]) - (x[prev] - bx) * (avg_y - y[prev]))
+        prev = start + int(np.nanargmax(area)) if np.isfinite(area).any() else start
+        selected[i + 1] = prev
+    return selected
+
+
+def box_summary(series):
+    """Tukey box-plot statistics plus the values lying outside the whiskers."""
+    values = _finite(series)
+    if values.size == 0:
+        return None
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    return {
+        "q1": q1, "median": median, "q3": q3, "mean": values.mean(),
+        "lowerfence": inside.min(), "upperfence": inside.max(),
+        "outliers": values[(values < q1 - 1.5 * iqr) | (values > q3 + 1.5 * iqr)],
+    }
+
+
+def _cap_outliers(points, center, max_points):
+    # Keep the most extreme points when there are too many to draw
+    if len(points) <= max_points:
+        return points
+    return points[np.argsort(-np.abs(points - center))[:max_points]]
+
+
+def box_traces(series, name, color=None, orientation="v", outliers=None, max_points=MAX_OUTLIER_POINTS,
+               summary=None):
+    """
+    Box trace built from precomputed quartiles (no raw data) plus a scatter of
+    at most max_points outliers. `outliers` overrides the Tukey outliers, e.g.
+    with values flagged by EDA.get_outlier_mask; `summary` is a box_summary()
+    computed earlier.
+    """
+    if summary is None:
+        summary = box_summary(series)
+    if summary is None:
+        return []
+    points = summary["outliers"] if outliers is None else _finite(outliers)
+    points = _cap_outliers(points, summary["median"], max_points)
+    stat_axis = "y" if orientation == "v" else "x"
+    box = go.Box(
+        name=name, orientation=orientation, boxpoints=False, marker_color=color,
+        q1=[summary["q1"]], median=[summary["median"]], q3=[summary["q3"]], mean=[summary["mean"]],
+        lowerfence=[summary["lowerfence"]], upperfence=[summary["upperfence"]],
+        **{"x" if orientation == "v" else "y": [name]}
+    )
+    scatter = go.Scatter(
+        mode="markers", name="outliers", marker=dict(color=color, size=5), showlegend=False,
+        **{stat_axis: points, ("x" if orientation == "v" else "y"): [name] * len(points)}
+    )
+    return [box, scatter]
+
+
+def box_figure(series, title, color="red", outliers=None, template="plotly_white"):
+    """Box plot whose payload is a handful of summary numbers plus capped outlier points."""
+    fig = go.Figure(box_traces(series, str(series.name), color=color, outliers=outliers))
+    fig.update_layout(title=title, template=template, showlegend=False)
+    return fig
+
+
+def histogram_bins(series, bins=MAX_BINS):
+    """Bins a numeric series server-side; returns (counts, edges)."""
+    values = _finite(series)
+    if values.size == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(1)
+    n_bins = min(bins, len(np.histogram_bin_edges(values[:100000], bins="auto")) - 1) or 1
+    return np.histogram(values, bins=max(n_bins, 1))
+
+
+def histogram_summary(series, bins=MAX_BINS):
+    """Everything histogram_figure draws: bin counts, bin edges and the box summary."""
+    counts, edges = histogram_bins(series, bins)
+    return {"counts": counts, "edges": edges, "box": box_summary(series)}
+
+
+def histogram_figure(series, title, bins=MAX_BINS, template="plotly_white", summary=None):
+    """
+    Pre-binned histogram with a marginal box summary, bounded by `bins` bars.
+    `summary` is a histogram_summary() computed earlier (e.g. from a sample),
+    in which case `series` only provides the name.
+    """
+    if summary is None:
+        summary = histogram_summary(series, bins)
+    counts, edges = summary["counts"], summary["edges"]
+    centers = (edges[:-1] + edges[1:]) / 2
+    name = str(series.name)
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.2, 0.8], vertical_spacing=0.02)
+    box = box_traces(series, name, color="#636efa", orientation="h", summary=summary["box"]) if summary["box"] else []
+    for trace in box:
+        fig.add_trace(trace, row=1, col=1)
+    fig.add_trace(go.Bar(x=centers, y=counts, width=np.diff(edges), name=name, marker_color="#636efa"), row=2, col=1)
+    fig.update_yaxes(showticklabels=False, row=1, col=1)
+    fig.update_xaxes(title_text=name, row=2, col=1)
+    fig.update_yaxes(title_text="count", row=2, col=1)
+    fig.update_layout(title=title, template=template, showlegend=False, bargap=0)
+    return fig
+
+
+def category_figure(profile, title, template="plotly_white"):
+    """Bars for a categorical profile's top values plus one 'Other' bar for the long tail."""
+    top = profile['top']
+    labels = [str(v)[:MAX_LABEL_CHARS] for v in top.index]
+    counts = top.tolist()
+    colors = ["#636efa"] * len(labels)
+    if profile['other'] > 0:
+        labels.append(f"Other ({profile['distinct'] - len(top):,} values)")
+        counts.append(profile['other'])
+        colors.append("#b0b0b0")
+    fig = go.Figure(go.Bar(x=labels, y=counts, marker_color=colors))
+    fig.update_xaxes(type="category")
+    fig.update_yaxes(title_text="count")
+    fig.update_layout(title=title, template=template, showlegend=False)
+    return fig
+
+
+def line_figure(x, y, title, x_label, y_label, max_points=MAX_LINE_POINTS, template=None):
+    """Line chart downsampled with LTTB so at most max_points are sent."""
+    x = pd.Series(x).reset_index(drop=True)
+    y = pd.Series(y).reset_index(drop=True)
+    numeric_x = x.astype("int64") if pd.api.types.is_datetime64_any_dtype(x) else x
+    valid = y.notna().to_numpy()
+    idx = np.flatnonzero(valid)[lttb_indices(numeric_x[valid].to_numpy(), y[valid].to_numpy(), max_points)]
+    fig = go.Figure(go.Scatter(x=x.iloc[idx], y=y.iloc[idx], mode="lines", name=y_label))
+    fig.update_layout(title=title, xaxis_title=x_label, yaxis_title=y_label, template=template)
+    return fig
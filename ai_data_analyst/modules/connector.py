@@ -1,72 +1,236 @@
+import warnings
+
 import pandas as pd
 import sqlalchemy
-from sqlalchemy import create_engine, inspect
+from sqlalchemy.engine import URL
+from modules.engines import engine_registry
+from modules.ingest import read_csv_streaming, read_excel_sheets, read_excel_streaming
+from modules.optimize import optimize_dataframe
+from modules.query_cache import query_cache
+
+DEFAULT_PORTS = {"PostgreSQL": 5432, "MySQL": 3306}
 
 class DataConnector:
     def __init__(self):
         self.engine = None
         self.metadata = None
+        self.query_cache = query_cache
 
-    def load_csv(self, file_object):
-        """Loads a CSV or Excel file into a Pandas DataFrame."""
+    def load_csv(self, file_object, chunksize=200000, progress_callback=None, optimize=False):
+        """
+        Loads a CSV or Excel file into a Pandas DataFrame.
+        CSVs are streamed in chunks with encoding and delimiter sniffed from a sample.
+        With optimize=True the frame is passed through optimize_dataframe.
+        """
         try:
             if file_object.name.endswith('.csv'):
-                encodings = ['utf-8', 'cp1252', 'latin1', 'ISO-8859-1']
-                last_error = None
-                
-                for encoding in encodings:
-                    try:
-                        file_object.seek(0)
-                        return pd.read_csv(file_object, encoding=encoding)
-                    except Exception as e:
-                        last_error = e
-                        continue
+                df = read_csv_streaming(file_object, chunksize=chunksize,
+                                        progress_callback=progress_callback)
                 
-                return f"Failed to decode CSV. Last error: {str(last_error)}"
-                
-            elif file_object.name.endswith(('.xls', '.xlsx')):
-                return pd.read_excel(file_object)
+            elif file_object.name.endswith('.xlsx'):
+                df = read_excel_streaming(file_object, progress_callback=progress_callback)
+            elif file_object.name.endswith('.xls'):
+                df = pd.read_excel(file_object)
             else:
                 return None
+            return optimize_dataframe(df)[0] if optimize else df
         except Exception as e:
             return str(e)
 
-    def connect_db(self, db_type, host, port, user, password, db_name):
-        """Establishes a database connection."""
+    def load_excel(self, file_object, sheet_names=None, cell_range=None, workers=1,
+                   progress_callback=None, optimize=False):
+        """
+        Loads chosen worksheets (default: the first) of an .xlsx workbook,
+        optionally limited to a cell range like "A1:F5000". Several sheets are
+        read in parallel when workers > 1 and stacked with a 'sheet' column.
+        """
         try:
+            if not sheet_names:
+                df = read_excel_streaming(file_object, cell_range=cell_range,
+                                          progress_callback=progress_callback)
+            elif len(sheet_names) == 1:
+                df = read_excel_streaming(file_object, sheet_names[0], cell_range,
+                                          progress_callback=progress_callback)
+            else:
+                frames = read_excel_sheets(file_object, sheet_names, cell_range, workers)
+                df = pd.concat(
+                    [frame.assign(sheet=name) for name, frame in frames.items()], ignore_index=True
+                )
+                if progress_callback:
+                    progress_callback(1.0)
+            return optimize_dataframe(df)[0] if optimize else df
+        except Exception as e:
+            return str(e)
+
+    def connect_db(self, db_type, host, port, user, password, db_name, **pool_options):
+        """
+        Establishes a database connection through the shared engine registry.
+        `port` defaults to the standard port for the database type; `pool_options`
+        (pool_size, max_overflow, pool_recycle, pool_pre_ping) tune the shared pool.
+        """
+        try:
+            port = int(port) if port else DEFAULT_PORTS.get(db_type)
             if db_type == "PostgreSQL":
-                url = f"postgresql://{user}:{password}@{host}:{port}/{db_name}"
+                url = URL.create("postgresql", user, password, host, port, db_name)
             elif db_type == "MySQL":
-                url = f"mysql+pymysql://{user}:{password}@{host}:{port}/{db_name}"
+                url = URL.create("mysql+pymysql", user, password, host, port, db_name)
             elif db_type == "SQLite":
-                url = f"sqlite:///{db_name}" # db_name is path for sqlite
+                url = URL.create("sqlite", database=db_name) # db_name is path for sqlite
             else:
                 return "Unsupported Database Type"
 
-            self.engine = create_engine(url)
-            self.metadata = inspect(self.engine)
+            self.engine = engine_registry.get_engine(url, **pool_options)
+            self.metadata = engine_registry.get_inspector(self.engine)
             return True
         except Exception as e:
             return str(e)
 
-    def get_tables(self):
+    def get_tables(self, refresh=False):
         """Returns a list of tables in the connected database."""
-        if self.metadata:
+        if self.engine:
+            self.metadata = engine_registry.get_inspector(self.engine, refresh=refresh)
             return self.metadata.get_table_names()
         return []
 
-    def get_table_data(self, table_name, start_row, limit=1000):
-        """Fetches data from a specific table."""
+    def get_column_names(self, table_name):
+        """Returns the column names of a table ('schema.table' or 'table')."""
+        schema, _, name = table_name.rpartition('.')
+        return [c['name'] for c in self.metadata.get_columns(name, schema=schema or None)]
+
+    def get_primary_key(self, table_name):
+        """Returns the primary key columns of a table (empty when it has none)."""
+        schema, _, name = table_name.rpartition('.')
+        constraint = self.metadata.get_pk_constraint(name, schema=schema or None) or {}
+        return list(constraint.get('constrained_columns') or [])
+
+    def get_row_key(self, table_name):
+        """
+        Returns columns that identify a row: the primary key, else the first unique
+        constraint or unique index (empty when the table has none).
+        """
+        primary_key = self.get_primary_key(table_name)
+        if primary_key:
+            return primary_key
+        schema, _, name = table_name.rpartition('.')
+        candidates = []
+        try:
+            candidates += [c['column_names'] for c in self.metadata.get_unique_constraints(name, schema=schema or None)]
+        except NotImplementedError:
+            pass
+        candidates += [i['column_names'] for i in self.metadata.get_indexes(name, schema=schema or None) if i.get('unique')]
+        # Expression indexes report None for their computed columns
+        candidates = [c for c in candidates if c and all(c)]
+        return list(min(candidates, key=len)) if candidates else []
+
+    def _table(self, table_name, columns=None):
+        """Builds a lightweight SQLAlchemy table clause, optionally projected to some columns."""
+        schema, _, name = table_name.rpartition('.')
+        if columns is None:
+            columns = self.get_column_names(table_name)
+        return sqlalchemy.table(name, *[sqlalchemy.column(c) for c in columns], schema=schema or None)
+
+    def _select(self, table_name, columns=None, where=None, order_by=None):
+        tbl = self._table(table_name, columns)
+        stmt = sqlalchemy.select(*tbl.c).select_from(tbl)
+        if where:
+            stmt = stmt.where(sqlalchemy.text(where))
+        if order_by:
+            names = [order_by] if isinstance(order_by, str) else list(order_by)
+            stmt = stmt.order_by(*[tbl.c[c] if c in tbl.c else sqlalchemy.column(c) for c in names])
+        return stmt
+
+    def get_table_data(self, table_name, start_row=0, limit=1000, columns=None, where=None, params=None, order_by=None,
+                       cache=True, ttl=None):
+        """
+        Fetches one page of a table using LIMIT/OFFSET.
+        `where` is a SQL filter pushed down to the database (use :name placeholders with `params`).
+        Rows are ordered by `order_by` (a column or list), by default the primary key or a unique
+        key, so pages do not shift between reads. A table with neither is read unordered (with a
+        warning) rather than sorted on every column for each page.
+        Pages come from the query cache while the table is unchanged; cache=False always reads.
+        """
         if self.engine:
-            query = f"SELECT * FROM {table_name} LIMIT {limit}"
-            return pd.read_sql(query, self.engine)
+            if not order_by:
+                order_by = self.get_row_key(table_name)
+                if not order_by:
+                    warnings.warn(f"{table_name} has no primary key or unique index; pages are read "
+                                  "unordered and may shift between reads", RuntimeWarning, stacklevel=2)
+            stmt = self._select(table_name, columns, where, order_by).limit(limit).offset(start_row)
+            if cache:
+                return self.query_cache.read_sql(self.engine, stmt, params, tables=[table_name], ttl=ttl)
+            return pd.read_sql(stmt, self.engine, params=params)
         return None
+
+    def get_table_page_after(self, table_name, key_column, after=None, limit=1000, columns=None, where=None, params=None,
+                             tiebreaker=None):
+        """
+        Keyset pagination: fetches the next `limit` rows ordered by `key_column` after the cursor.
+        Rows sharing a key value are ordered by the `tiebreaker` columns (default: the rest of the
+        primary key) and the cursor holds the last row's (key, tiebreaker...) values, so ties that
+        straddle pages are never skipped. A plain key value as `after` resumes after every row with
+        that key. Returns (page, next_cursor); next_cursor is None once the table is exhausted.
+        """
+        if not self.engine:
+            return None, None
+        if tiebreaker is None:
+            tiebreaker = [c for c in self.get_primary_key(table_name) if c != key_column]
+        cursor_columns = [key_column] + list(tiebreaker)
+        if columns is not None:
+            columns = [c for c in cursor_columns if c not in columns] + list(columns)
+        stmt = self._select(table_name, columns, where, order_by=cursor_columns)
+        params = dict(params or {})
+        if after is not None:
+            values = after if isinstance(after, tuple) else (after,)
+            stmt = stmt.where(_after_condition(cursor_columns[:len(values)], values, params))
+        page = pd.read_sql(stmt.limit(limit), self.engine, params=params)
+        if len(page) < limit:
+            return page, None
+        # DB drivers cannot bind numpy scalars, so hand back plain Python values
+        last = [v.item() if hasattr(v, 'item') else v for v in page[cursor_columns].iloc[-1]]
+        return page, tuple(last) if len(last) > 1 else last[0]
+
+    def iter_table_chunks(self, table_name, chunksize=10000, columns=None, where=None, params=None, order_by=None):
+        """Streams a table as DataFrame chunks through a server-side cursor."""
+        if not self.engine:
+            return
+        stmt = self._select(table_name, columns, where, order_by)
+        with self.engine.connect().execution_options(stream_results=True) as conn:
+            for chunk in pd.read_sql(stmt, conn, params=params, chunksize=chunksize):
+                yield chunk
+
+    def count_rows(self, table_name, where=None, params=None):
+        """Counts rows in a table, applying the same pushed-down filter as the readers."""
+        if not self.engine:
+            return 0
+        tbl = self._table(table_name, columns=[])
+        stmt = sqlalchemy.select(sqlalchemy.func.count()).select_from(tbl)
+        if where:
+            stmt = stmt.where(sqlalchemy.text(where))
+        with self.engine.connect() as conn:
+            return conn.execute(stmt, params or {}).scalar()
     
-    def execute_query(self, query):
-        """Executes a custom SQL query."""
+    def execute_query(self, query, optimize=False, params=None, cache=True, ttl=None):
+        """
+        Executes a custom SQL query, optionally shrinking the result with optimize_dataframe.
+        Read-only queries are served from the query cache while the tables they read are unchanged.
+        """
         if self.engine:
             try:
-                return pd.read_sql(query, self.engine)
+                if cache:
+                    df = self.query_cache.read_sql(self.engine, query, params, ttl=ttl)
+                else:
+                    df = pd.read_sql(query, self.engine, params=params)
+                return optimize_dataframe(df)[0] if optimize else df
             except Exception as e:
                 return str(e)
         return None
+
+
+def _after_condition(columns, values, params):
+    """Row-value comparison (c1, c2, ...) > (v1, v2, ...) spelled out with AND/OR, which every dialect supports."""
+    terms = []
+    for i, (column, value) in enumerate(zip(columns, values)):
+        params[f'_after_{i}'] = value
+        equal = [sqlalchemy.column(c) == sqlalchemy.bindparam(f'_after_{j}') for j, c in enumerate(columns[:i])]
+        terms.append(sqlalchemy.and_(*equal, sqlalchemy.column(column) > sqlalchemy.bindparam(f'_after_{i}')))
+    return sqlalchemy.or_(*terms)
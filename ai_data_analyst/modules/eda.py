@@ -1,41 +1,302 @@
+import warnings
+
 import pandas as pd
 import numpy as np
-from scipy import stats
+from modules.cache import analysis_cache
+from modules.approx import DEFAULT_SAMPLE_SIZE, SampledStats, approximate_or_exact, draw_sample
+from modules.sketches import profile_categorical
+
+# Default cut-offs: |z| for zscore, modified z for mad, fence multiplier for iqr
+OUTLIER_THRESHOLDS = {"zscore": 3, "mad": 3.5, "iqr": 1.5}
+OUTLIER_BLOCK_COLUMNS = 64
+# Non-numerical columns above this many distinct values are not treated as plain categories
+HIGH_CARDINALITY = 1000
+# Share of distinct values among non-null ones that marks a column as an identifier
+IDENTIFIER_RATIO = 0.9
 
 class EDA:
-    def __init__(self, df):
+    def __init__(self, df, cache=None, approximate=False, sample_size=DEFAULT_SAMPLE_SIZE, workers=1,
+                 fingerprint=None):
         self.df = df
+        self.cache = cache if cache is not None else analysis_cache
+        # Hashing a large frame is costly; callers that already know the fingerprint pass it in
+        self.fingerprint = fingerprint or self.cache.fingerprint(df)
+        # Approximate mode only kicks in when the data is larger than the sample
+        self.approximate = approximate and len(df) > sample_size
+        self.sample_size = sample_size
+        # Worker processes for exact profiling of wide tables (see modules.parallel)
+        self.workers = workers
+
+    def _cached(self, name, compute):
+        return self.cache.get_or_compute(self.fingerprint, name, compute)
+
+    def _approximate_or_exact(self, name, exact, approximate):
+        return approximate_or_exact(self.cache, self.fingerprint, name, exact, approximate, self.approximate)
+
+    def get_sampled_stats(self):
+        """Returns the SampledStats used in approximate mode."""
+        sample = self._cached(("sample", self.sample_size), lambda: draw_sample(self.df, self.sample_size))
+        return SampledStats(sample, len(self.df))
+
+    def sample_view(self):
+        """
+        An exact EDA over the approximate-mode sample, with its own cache
+        entries. Approximate results that have no closed form (missing values,
+        categorical profiles, histograms, outliers) are computed on it and
+        scaled to the full dataset.
+        """
+        view = getattr(self, '_sample_view', None)
+        if view is None:
+            sample = self.get_sampled_stats().sample
+            view = EDA(sample, cache=self.cache, fingerprint=f"{self.fingerprint}:sample:{self.sample_size}")
+            self._sample_view = view
+        return view
+
+    def _sample_scale(self):
+        return len(self.df) / max(len(self.sample_view().df), 1)
+
+    def _parallel(self, columns=None):
+        """Whether exact results over `columns` (default: all numerical) should be computed in worker processes."""
+        if self.workers <= 1:
+            return False
+        from modules.parallel import PARALLEL_MIN_COLUMNS
+        numeric_cols = self.get_columns_by_type()[0]
+        if columns is not None:
+            numeric_cols = [c for c in columns if c in numeric_cols]
+        return len(numeric_cols) >= PARALLEL_MIN_COLUMNS
+
+    def _exact_describe(self):
+        if self._parallel():
+            from modules.parallel import parallel_describe
+            return parallel_describe(self.df, self.workers)
+        return self.df.describe()
+
+    def is_exact(self, name):
+        """Whether results for `name` (e.g. 'basic_stats', 'correlation') are exact."""
+        return not self.approximate or self.cache.contains(self.fingerprint, name)
         
     def get_basic_stats(self):
-        """Returns descriptive statistics."""
-        return self.df.describe()
+        """Returns descriptive statistics (sample-based until the exact result is ready in approximate mode)."""
+        return self._approximate_or_exact(
+            "basic_stats", self._exact_describe, lambda: self.get_sampled_stats().describe()
+        )
+
+    def get_confidence_intervals(self):
+        """Confidence bounds for the sampled means and medians, or None when stats are exact."""
+        if self.is_exact("basic_stats"):
+            return None
+        return self.get_sampled_stats().confidence_intervals()
 
     def get_missing_values(self):
-        """Returns count and percentage of missing values."""
-        missing = self.df.isnull().sum()
-        percent = (self.df.isnull().sum() / len(self.df)) * 100
-        return pd.DataFrame({'Missing Count': missing, 'Percent': percent})
+        """Returns count and percentage of missing values (scaled from the sample until exact in approximate mode)."""
+        def compute():
+            missing = self.df.isnull().sum()
+            percent = (missing / len(self.df)) * 100
+            return pd.DataFrame({'Missing Count': missing, 'Percent': percent})
+        def approximate():
+            missing = self.sample_view().get_missing_values()
+            missing['Missing Count'] = (missing['Missing Count'] * self._sample_scale()).round().astype('int64')
+            return missing
+        return self._approximate_or_exact("missing_values", compute, approximate)
 
     def get_columns_by_type(self):
         """Separates numerical and categorical columns."""
-        numeric_cols = self.df.select_dtypes(include=[np.number]).columns.tolist()
-        categorical_cols = self.df.select_dtypes(exclude=[np.number]).columns.tolist()
-        return numeric_cols, categorical_cols
+        def compute():
+            numeric_cols = self.df.select_dtypes(include=[np.number]).columns.tolist()
+            categorical_cols = self.df.select_dtypes(exclude=[np.number]).columns.tolist()
+            return numeric_cols, categorical_cols
+        numeric_cols, categorical_cols = self._cached("columns_by_type", compute)
+        return list(numeric_cols), list(categorical_cols)
         
-    def detect_outliers(self, threshold=3):
-        """Detects outliers using Z-score for numerical columns."""
+    def get_cardinality(self):
+        """Returns the number of distinct non-null values per column."""
+        return self._cached("cardinality", self.df.nunique)
+
+    def get_categorical_profile(self, column, top_k=20):
+        """
+        Sketch-based profile of one non-numerical column: distinct count
+        (HyperLogLog), top_k values (heavy hitters) and the size of the tail.
+        See modules.sketches.profile_categorical for the fields.
+        """
+        key = ("categorical_profile", column, top_k)
+        return self._approximate_or_exact(
+            key, lambda: profile_categorical(self.df, [column], top_k)[column],
+            lambda: _scaled_profile(self.sample_view().get_categorical_profile(column, top_k), self._sample_scale())
+        )
+
+    def get_categorical_summary(self, top_k=20):
+        """
+        One row per non-numerical column with its kind (categorical,
+        high-cardinality, identifier-like or datetime), non-null and distinct
+        counts and most frequent value, from a single pass over the rows.
+        In approximate mode the sample is profiled until the exact pass is done;
+        its distinct counts are lower bounds and never marked exact.
+        """
+        def compute():
+            _, categorical_cols = self.get_columns_by_type()
+            profiles = profile_categorical(self.df, categorical_cols, top_k)
+            rows = []
+            for col, profile in profiles.items():
+                self.cache.put(self.fingerprint, ("categorical_profile", col, top_k), profile)
+                top = profile['top']
+                rows.append({
+                    'Column': col,
+                    'Kind': _categorical_kind(self.df[col], profile),
+                    'Non-Null': profile['count'],
+                    'Distinct': profile['distinct'],
+                    'Distinct Exact': profile['distinct_exact'],
+                    'Top Value': str(top.index[0]) if len(top) else None,
+                    'Top %': top.iloc[0] / profile['count'] * 100 if len(top) else np.nan,
+                })
+            return pd.DataFrame(rows, columns=['Column', 'Kind', 'Non-Null', 'Distinct', 'Distinct Exact',
+                                               'Top Value', 'Top %'])
+        def approximate():
+            summary = self.sample_view().get_categorical_summary(top_k)
+            summary['Non-Null'] = (summary['Non-Null'] * self._sample_scale()).round().astype('int64')
+            summary['Distinct Exact'] = False
+            return summary
+        return self._approximate_or_exact(("categorical_summary", top_k), compute, approximate)
+
+    def get_histogram(self, column, bins=None):
+        """
+        Bin counts, edges and box summary of a numerical column for
+        charts.histogram_figure (counts scaled from the sample until exact in
+        approximate mode).
+        """
+        from modules.charts import MAX_BINS, histogram_summary
+        bins = bins or MAX_BINS
+        def approximate():
+            summary = dict(self.sample_view().get_histogram(column, bins))
+            summary['counts'] = np.round(summary['counts'] * self._sample_scale()).astype(np.int64)
+            return summary
+        return self._approximate_or_exact(
+            ("histogram", column, bins), lambda: histogram_summary(self.df[column], bins), approximate
+        )
+
+    def _float_matrix(self, columns):
+        # Column-major so each column is a contiguous slice
+        return np.asfortranarray(self.df[columns].to_numpy(dtype=np.float64, na_value=np.nan))
+
+    def get_outlier_mask(self, method="zscore", threshold=None, columns=None):
+        """
+        Flags outliers for numerical columns as a boolean DataFrame.
+        Methods: 'zscore' (|z| > threshold), 'mad' (modified z-score from the
+        median absolute deviation) and 'iqr' (outside threshold * IQR fences).
+        """
+        if method not in OUTLIER_THRESHOLDS:
+            raise ValueError(f"Unknown outlier method: {method}")
+        if threshold is None:
+            threshold = OUTLIER_THRESHOLDS[method]
         numeric_cols, _ = self.get_columns_by_type()
-        outliers_dict = {}
-        for col in numeric_cols:
-            z_scores = np.abs(stats.zscore(self.df[col].dropna()))
-            outliers = self.df[col].dropna()[z_scores > threshold]
-            if not outliers.empty:
-                outliers_dict[col] = outliers.tolist()
-        return outliers_dict
+        columns = numeric_cols if columns is None else [c for c in columns if c in numeric_cols]
+
+        masks = []
+        # Column blocks bound the temporary float matrices on very wide tables
+        for start in range(0, len(columns), OUTLIER_BLOCK_COLUMNS):
+            block = self._float_matrix(columns[start:start + OUTLIER_BLOCK_COLUMNS])
+            masks.append(_outlier_block(block, method, threshold))
+        mask = np.hstack(masks) if masks else np.zeros((len(self.df), 0), dtype=bool)
+        return pd.DataFrame(mask, index=self.df.index, columns=columns)
+
+    def _outliers_key(self, method, threshold, columns):
+        return ("outliers", method, threshold, None if columns is None else tuple(columns))
+
+    def detect_outliers(self, threshold=None, method="zscore", columns=None):
+        """
+        Returns the number of outliers per numerical column (columns without
+        outliers are omitted). In approximate mode the sample's counts are
+        scaled up until the exact counts are ready.
+        """
+        key = self._outliers_key(method, threshold, columns)
+        def compute():
+            if self._parallel(columns) and method in OUTLIER_THRESHOLDS:
+                from modules.parallel import parallel_outlier_counts
+                limit = OUTLIER_THRESHOLDS[method] if threshold is None else threshold
+                return parallel_outlier_counts(self.df, method, limit, columns, self.workers)
+            counts = self.get_outlier_mask(method, threshold, columns).sum()
+            return {col: int(n) for col, n in counts.items() if n > 0}
+        def approximate():
+            counts = self.sample_view().detect_outliers(threshold, method, columns)
+            return {col: int(round(n * self._sample_scale())) for col, n in counts.items()}
+        return dict(self._approximate_or_exact(key, compute, approximate))
+
+    def get_outlier_values(self, column, method="zscore", threshold=None):
+        """
+        A numerical column's values and the ones flagged as outliers, for box
+        plots. Both come from the sample until the exact outlier counts are ready.
+        """
+        exact = self.is_exact(self._outliers_key(method, threshold, [column]))
+        source = self if exact else self.sample_view()
+        values = source.df[column]
+        return values, values[source.get_outlier_mask(method, threshold, [column])[column]]
 
     def get_correlation_matrix(self):
         """Returns correlation matrix for numerical columns."""
         numeric_cols, _ = self.get_columns_by_type()
         if len(numeric_cols) > 1:
-            return self.df[numeric_cols].corr()
+            return self._approximate_or_exact(
+                "correlation", lambda: exact_correlation(self.df, self.workers),
+                lambda: self.get_sampled_stats().correlation()
+            )
         return None
+
+
+def _categorical_kind(series, profile):
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return "datetime"
+    if profile['count'] and profile['distinct'] >= IDENTIFIER_RATIO * profile['count']:
+        return "identifier-like"
+    if profile['distinct'] > HIGH_CARDINALITY:
+        return "high-cardinality"
+    return "categorical"
+
+
+def _scaled_profile(profile, scale):
+    """A categorical profile of a sample with its counts scaled to the full dataset."""
+    return {
+        **profile,
+        'count': int(round(profile['count'] * scale)),
+        'distinct_exact': False,
+        'top': (profile['top'] * scale).round().astype('int64'),
+        'other': int(round(profile['other'] * scale)),
+        'max_error': int(round(profile['max_error'] * scale)),
+    }
+
+
+def _outlier_block(values, method, threshold):
+    """
+    Vectorised outlier flags for one float block: per-column bounds from
+    NaN-aware reductions along axis 0, then a single comparison over the
+    whole block. NaNs, all-NaN columns and zero-spread columns are never flagged.
+    """
+    with warnings.catch_warnings():
+        # All-NaN columns warn and yield NaN bounds, which flag nothing
+        warnings.simplefilter("ignore", RuntimeWarning)
+        if method == "zscore":
+            # Population std, matching scipy.stats.zscore
+            mean, std = np.nanmean(values, axis=0), np.nanstd(values, axis=0)
+            spread = np.where(std > 0, threshold * std, np.nan)
+            lower, upper = mean - spread, mean + spread
+        elif method == "mad":
+            median = np.nanmedian(values, axis=0)
+            mad = np.nanmedian(np.abs(values - median), axis=0)
+            spread = np.where(mad > 0, threshold * mad / 0.6745, np.nan)
+            lower, upper = median - spread, median + spread
+        else:
+            q1, q3 = np.nanpercentile(values, [25, 75], axis=0)
+            lower, upper = q1 - threshold * (q3 - q1), q3 + threshold * (q3 - q1)
+    return (values < lower) | (values > upper)
+
+
+def exact_correlation(df, workers=1):
+    """
+    Correlation of all numerical columns, shared by EDA and RelationshipManager
+    (and so by their shared "correlation" cache entry). Wide tables use
+    `workers` processes when more than one is given.
+    """
+    numeric = df.select_dtypes(include=[np.number])
+    if workers > 1:
+        from modules.parallel import PARALLEL_MIN_COLUMNS, parallel_correlation
+        if numeric.shape[1] >= PARALLEL_MIN_COLUMNS:
+            return parallel_correlation(numeric, workers)
+    return numeric.corr()
@@ -0,0 +1,72 @@
+import threading
+import time
+
+import sqlalchemy
+from sqlalchemy import create_engine, inspect
+
+DEFAULT_POOL_OPTIONS = {
+    "pool_size": 5,
+    "max_overflow": 10,
+    "pool_recycle": 1800,
+    "pool_pre_ping": True,
+}
+
+
+class EngineRegistry:
+    """
+    Process-wide registry of SQLAlchemy engines keyed by connection URL and
+    pool settings, so every session connecting to the same database shares
+    one connection pool. Schema inspectors are cached per engine and
+    refreshed after `schema_ttl` seconds.
+    """
+
+    def __init__(self, schema_ttl=300):
+        self.schema_ttl = schema_ttl
+        self._engines = {}
+        self._inspectors = {}
+        self._lock = threading.Lock()
+
+    def get_engine(self, url, **pool_options):
+        """Returns the shared engine for url, creating it on first use."""
+        if isinstance(url, str):
+            url = sqlalchemy.engine.make_url(url)
+        options = dict(DEFAULT_POOL_OPTIONS, **pool_options)
+        if url.get_backend_name() == "sqlite":
+            # SQLite pools are file-local; sizing options do not apply
+            options = {"pool_pre_ping": options["pool_pre_ping"]}
+        key = (url.render_as_string(hide_password=False), tuple(sorted(options.items())))
+        with self._lock:
+            engine = self._engines.get(key)
+            if engine is None:
+                engine = create_engine(url, **options)
+                self._engines[key] = engine
+            return engine
+
+    def get_inspector(self, engine, refresh=False):
+        """Returns a cached schema inspector for engine."""
+        with self._lock:
+            cached = self._inspectors.get(id(engine))
+            if cached and cached[1] is engine and not refresh and time.time() - cached[0] < self.schema_ttl:
+                return cached[2]
+        inspector = inspect(engine)
+        with self._lock:
+            self._inspectors[id(engine)] = (time.time(), engine, inspector)
+        return inspector
+
+    def pool_status(self):
+        """Returns a short pool status line per registered engine (passwords hidden)."""
+        with self._lock:
+            return {
+                engine.url.render_as_string(hide_password=True): engine.pool.status()
+                for engine in self._engines.values()
+            }
+
+    def dispose_all(self):
+        with self._lock:
+            for engine in self._engines.values():
+                engine.dispose()
+            self._engines.clear()
+            self._inspectors.clear()
+
+
+engine_registry = EngineRegistry()
@@ -0,0 +1,411 @@
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_STATS_DIR = os.environ.get(
+    "DATANUDGE_STATS_DIR",
+    os.path.join(os.path.expanduser("~"), ".datanudge", "stats")
+)
+SKETCH_SIZE = 256
+# Co-moment state grows with columns squared; wider frames are not tracked
+MAX_TRACKED_COLUMNS = 500
+UPDATE_CHUNK_ROWS = 100000
+DESCRIBE_INDEX = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+
+
+def comoment_sums(block, shift):
+    """
+    Additive pairwise-complete co-moments of a float block (NaN = missing),
+    relative to `shift`: per column pair the count of rows where both are
+    present, sums and sums of squares over those rows, and cross products.
+    """
+    values = block - shift
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    mask = valid.astype(np.float64)
+    return mask.T @ mask, filled.T @ mask, (filled * filled).T @ mask, filled.T @ filled
+
+
+def correlation_from_comoments(n, sx, sxx, sxy):
+    """Pairwise-complete Pearson correlation matrix from summed co-moments."""
+    # sx[i, j]: sum of column i over rows where j is present; sx.T gives the j-side sums
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = n * sxy - sx * sx.T
+        var_i = n * sxx - sx * sx
+        var_j = var_i.T
+        corr = cov / np.sqrt(var_i * var_j)
+    corr[(var_i <= 0) | (var_j <= 0)] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+
+class QuantileSketch:
+    """
+    Mergeable KLL-style quantile sketch. Level i holds values of weight 2**i;
+    a level over k values is sorted and every other value (random offset)
+    moves up. Exact until k values have been seen, then rank error ~ 1/k.
+    """
+
+    def __init__(self, k=SKETCH_SIZE, levels=None, seed=0):
+        self.k = k
+        self.levels = levels if levels is not None else [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def count(self):
+        return int(sum(len(level) << i for i, level in enumerate(self.levels)))
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        self.levels[0] = np.concatenate([self.levels[0], values[~np.isnan(values)]])
+        self._compress()
+
+    def merge(self, other):
+        for i, level in enumerate(other.levels):
+            if i == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[i] = np.concatenate([self.levels[i], level])
+        self._compress()
+
+    def _compress(self):
+        i = 0
+        while i < len(self.levels):
+            level = self.levels[i]
+            if len(level) > self.k:
+                level = np.sort(level)
+                # An odd value out stays behind so total weight is preserved
+                keep = level[-1:] if len(level) % 2 else level[:0]
+                pairs = level[:len(level) - len(keep)]
+                promoted = pairs[self._rng.integers(2)::2]
+                self.levels[i] = keep
+                if i + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[i + 1] = np.concatenate([self.levels[i + 1], promoted])
+            i += 1
+
+    def quantiles(self, qs):
+        if len(self.levels) == 1:
+            # Nothing compacted yet: exact, with the same interpolation as pandas
+            if self.levels[0].size == 0:
+                return np.full(len(qs), np.nan)
+            return np.percentile(self.levels[0], np.asarray(qs) * 100)
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** i) for i, level in enumerate(self.levels)])
+        order = np.argsort(values)
+        values, cumulative = values[order], np.cumsum(weights[order])
+        ranks = np.asarray(qs) * (cumulative[-1] - 1)
+        return values[np.minimum(np.searchsorted(cumulative - 1, ranks, side="left"), len(values) - 1)]
+
+
+def _row_hashes(df):
+    return pd.util.hash_pandas_object(df, index=False).to_numpy(dtype=np.uint64)
+
+
+class IncrementalStats:
+    """
+    Mergeable summary of a dataset: row and null counts, shifted co-moment
+    matrices (which also hold each column's count, sum and sum of squares on
+    the diagonal), min/max and quantile sketches for the numerical columns.
+    Appending rows costs a pass over the new rows only. A position-weighted
+    row-hash checksum recognises data that is the summarised rows plus more.
+    """
+
+    def __init__(self, columns, numeric_columns, shift):
+        p = len(numeric_columns)
+        self.columns = list(columns)
+        self.numeric_columns = list(numeric_columns)
+        self.shift = np.asarray(shift, dtype=np.float64)
+        self.rows = 0
+        self.null_counts = np.zeros(len(self.columns), dtype=np.int64)
+        self.n, self.sx, self.sxx, self.sxy = (np.zeros((p, p)) for _ in range(4))
+        self.min = np.full(p, np.inf)
+        self.max = np.full(p, -np.inf)
+        self.sketches = [QuantileSketch() for _ in range(p)]
+        self.hash_sum = np.uint64(0)
+        self.hash_weighted = np.uint64(0)
+        # Highest key value summarised, for keyed database refreshes
+        self.watermark = None
+
+    @classmethod
+    def from_frame(cls, df, shift=None):
+        numeric = df.select_dtypes(include=[np.number])
+        if shift is None:
+            shift = np.nan_to_num(numeric.mean().to_numpy(dtype=np.float64), nan=0.0, posinf=0.0, neginf=0.0)
+        state = cls(df.columns, numeric.columns, shift)
+        state._absorb(df, numeric)
+        return state
+
+    def compatible(self, df):
+        return (list(df.columns) == self.columns
+                and list(df.select_dtypes(include=[np.number]).columns) == self.numeric_columns)
+
+    def _absorb(self, df, numeric):
+        values = numeric.to_numpy(dtype=np.float64, na_value=np.nan)
+        for start in range(0, len(values), UPDATE_CHUNK_ROWS):
+            n, sx, sxx, sxy = comoment_sums(values[start:start + UPDATE_CHUNK_ROWS], self.shift)
+            self.n += n
+            self.sx += sx
+            self.sxx += sxx
+            self.sxy += sxy
+        if len(values):
+            with np.errstate(invalid="ignore"):
+                self.min = np.fmin(self.min, np.where(np.isnan(values), np.inf, values).min(axis=0))
+                self.max = np.fmax(self.max, np.where(np.isnan(values), -np.inf, values).max(axis=0))
+        for j, sketch in enumerate(self.sketches):
+            sketch.update(values[:, j])
+        self.null_counts += df.isnull().sum().to_numpy(dtype=np.int64)
+        hashes = _row_hashes(df)
+        positions = np.arange(self.rows + 1, self.rows + len(df) + 1, dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            self.hash_sum += hashes.sum(dtype=np.uint64)
+            self.hash_weighted += (hashes * positions).sum(dtype=np.uint64)
+        self.rows += len(df)
+
+    def update(self, delta):
+        """Adds appended rows. Raises ValueError when their columns differ."""
+        if not self.compatible(delta):
+            raise ValueError("Appended rows have different columns or types; rebuild the statistics.")
+        self._absorb(delta, delta[self.numeric_columns])
+        return self
+
+    def merge(self, other):
+        """Adds another state over the same columns, as if its rows were appended."""
+        if other.columns != self.columns or other.numeric_columns != self.numeric_columns:
+            raise ValueError("Cannot merge statistics over different columns.")
+        # Re-express the other state's sums relative to this state's shift
+        d = other.shift - self.shift
+        n, sx = other.n, other.sx
+        self.sxy += other.sxy + d[None, :] * sx + d[:, None] * sx.T + n * np.outer(d, d)
+        self.sxx += other.sxx + 2 * d[:, None] * sx + n * (d ** 2)[:, None]
+        self.sx += sx + n * d[:, None]
+        self.n += n
+        self.min = np.fmin(self.min, other.min)
+        self.max = np.fmax(self.max, other.max)
+        for sketch, other_sketch in zip(self.sketches, other.sketches):
+            sketch.merge(other_sketch)
+        self.null_counts += other.null_counts
+        with np.errstate(over="ignore"):
+            self.hash_weighted += other.hash_weighted + np.uint64(self.rows) * other.hash_sum
+            self.hash_sum += other.hash_sum
+        self.rows += other.rows
+        return self
+
+    def appended_rows(self, df):
+        """
+        Returns the rows of df beyond the summarised ones when df starts with
+        exactly the summarised rows, otherwise None. Hashing the prefix is
+        far cheaper than recomputing the statistics over it.
+        """
+        if len(df) < self.rows or not self.compatible(df):
+            return None
+        hashes = _row_hashes(df.iloc[:self.rows])
+        positions = np.arange(1, self.rows + 1, dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            if (hashes.sum(dtype=np.uint64) != self.hash_sum
+                    or (hashes * positions).sum(dtype=np.uint64) != self.hash_weighted):
+                return None
+        return df.iloc[self.rows:]
+
+    def describe(self):
+        """describe()-shaped statistics; quartiles come from the sketches (exact for small data)."""
+        count = np.diag(self.n)
+        sums, squares = np.diag(self.sx), np.diag(self.sxx)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = self.shift + sums / count
+            std = np.sqrt(np.maximum(squares - sums ** 2 / count, 0) / (count - 1))
+        std[count < 2] = np.nan
+        quartiles = np.array([s.quantiles([0.25, 0.5, 0.75]) for s in self.sketches]).reshape(-1, 3).T
+        stats = np.vstack([count, mean, std, np.where(count > 0, self.min, np.nan), quartiles,
+                           np.where(count > 0, self.max, np.nan)])
+        return pd.DataFrame(stats, index=DESCRIBE_INDEX, columns=self.numeric_columns)
+
+    def missing_values(self):
+        """Same shape as EDA.get_missing_values."""
+        missing = pd.Series(self.null_counts, index=self.columns)
+        percent = missing / self.rows * 100 if self.rows else missing.astype(float)
+        return pd.DataFrame({'Missing Count': missing, 'Percent': percent})
+
+    def correlation(self):
+        corr = correlation_from_comoments(self.n, self.sx, self.sxx, self.sxy)
+        return pd.DataFrame(corr, index=self.numeric_columns, columns=self.numeric_columns)
+
+    def seed_cache(self, cache, fingerprint):
+        """
+        Stores the exact results (missing values, correlation) in the analysis
+        cache under the dataset's fingerprint so EDA/RelationshipManager skip them.
+        """
+        cache.put(fingerprint, "missing_values", self.missing_values())
+        if len(self.numeric_columns) > 1:
+            cache.put(fingerprint, "correlation", self.correlation())
+
+    def save(self, path):
+        arrays = {"shift": self.shift, "null_counts": self.null_counts, "n": self.n, "sx": self.sx,
+                  "sxx": self.sxx, "sxy": self.sxy, "min": self.min, "max": self.max,
+                  "hashes": np.array([self.hash_sum, self.hash_weighted], dtype=np.uint64)}
+        for j, sketch in enumerate(self.sketches):
+            for i, level in enumerate(sketch.levels):
+                arrays[f"sketch_{j}_{i}"] = level
+        meta = {"columns": [str(c) for c in self.columns], "numeric_columns": [str(c) for c in self.numeric_columns],
+                "rows": self.rows, "watermark": self.watermark,
+                "sketch_levels": [len(s.levels) for s in self.sketches]}
+        # A unique temp file per call, so concurrent saves of one key never share one
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp.npz", dir=os.path.dirname(path) or ".")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, meta=np.array(json.dumps(meta, default=str)), **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            state = cls(meta["columns"], meta["numeric_columns"], data["shift"])
+            state.rows, state.watermark = meta["rows"], meta["watermark"]
+            for name in ("null_counts", "n", "sx", "sxx", "sxy", "min", "max"):
+                setattr(state, name, data[name])
+            state.hash_sum, state.hash_weighted = (np.uint64(h) for h in data["hashes"])
+            state.sketches = [
+                QuantileSketch(levels=[data[f"sketch_{j}_{i}"] for i in range(n_levels)])
+                for j, n_levels in enumerate(meta["sketch_levels"])
+            ]
+        return state
+
+
+class StatsStateStore:
+    """
+    Persists IncrementalStats between sessions, one .npz file per source key.
+    With root=None states are only kept in memory, e.g. for one session.
+    """
+
+    def __init__(self, root=DEFAULT_STATS_DIR):
+        self.root = root
+        self._states = {}
+        if root is not None:
+            os.makedirs(root, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.root, hashlib.blake2b(key.encode(), digest_size=16).hexdigest() + ".npz")
+
+    def load(self, key):
+        if self.root is None:
+            return self._states.get(key)
+        try:
+            return IncrementalStats.load(self._path(key))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, key, state):
+        if self.root is None:
+            self._states[key] = state
+        else:
+            state.save(self._path(key))
+
+    def delete(self, key):
+        if self.root is None:
+            self._states.pop(key, None)
+        elif os.path.exists(self._path(key)):
+            os.remove(self._path(key))
+
+
+def refresh_frame_stats(store, key, df):
+    """
+    Brings the stored state for `key` up to date with df. Only the appended
+    rows are processed when df extends the summarised data; anything else
+    rebuilds the state. Returns (state, rows processed).
+    """
+    state = store.load(key)
+    delta = state.appended_rows(df) if state is not None else None
+    if delta is None:
+        state, processed = IncrementalStats.from_frame(df), len(df)
+    else:
+        processed = len(delta)
+        if processed:
+            state.update(delta)
+    store.save(key, state)
+    return state, processed
+
+
+def _retype(chunk, state):
+    """
+    Re-types a chunk whose column types drifted from the state's (e.g. an
+    all-NULL page, or text stored in an SQLite REAL column): numbers where
+    the state has them, with unparseable values as NaN, and objects elsewhere.
+    """
+    retyped = chunk.copy(deep=False)
+    for col in retyped.columns:
+        if col in state.numeric_columns:
+            retyped[col] = pd.to_numeric(retyped[col], errors="coerce").astype(np.float64)
+        elif pd.api.types.is_numeric_dtype(retyped[col]):
+            retyped[col] = retyped[col].astype(object)
+    return retyped
+
+
+class _SchemaChanged(Exception):
+    """A page's columns no longer match the stored state."""
+
+
+def refresh_table_stats(connector, table_name, key_column=None, store=None, chunksize=50000):
+    """
+    Updates the stored state of a database table with its new rows: rows
+    after the last (key_column, primary key) cursor, read with keyset
+    pagination. key_column defaults to the first primary key column; a
+    table with neither has no reliable row order, so its state is rebuilt
+    from a full scan, as is the state of a table whose columns were added,
+    dropped or retyped since it was saved. Returns (state, rows processed).
+    """
+    store = store or StatsStateStore()
+    # Current column names, so a schema change shows up in the pages read
+    connector.get_tables(refresh=True)
+    if not key_column:
+        primary_key = connector.get_primary_key(table_name)
+        key_column = primary_key[0] if primary_key else None
+    url = connector.engine.url.render_as_string(hide_password=True)
+    key = f"table|{url}|{table_name}|{key_column}"
+    state = store.load(key)
+    if state is not None and state.columns != connector.get_column_names(table_name):
+        state = None
+    try:
+        state, processed = _scan_table(connector, table_name, key_column, state, chunksize)
+    except _SchemaChanged:
+        state, processed = _scan_table(connector, table_name, key_column, None, chunksize)
+    if state is not None:
+        store.save(key, state)
+    return state, processed
+
+
+def _scan_table(connector, table_name, key_column, state, chunksize):
+    processed = 0
+
+    def absorb(chunk):
+        nonlocal state, processed
+        if state is None:
+            state = IncrementalStats.from_frame(chunk)
+        elif state.compatible(chunk):
+            state.update(chunk)
+        elif list(chunk.columns) != state.columns:
+            raise _SchemaChanged()
+        else:
+            state.update(_retype(chunk, state))
+        processed += len(chunk)
+
+    if key_column:
+        cursor = state.watermark if state is not None else None
+        while True:
+            page, next_cursor = connector.get_table_page_after(table_name, key_column, cursor, chunksize)
+            if page is None or page.empty:
+                break
+            absorb(page)
+            if next_cursor is None:
+                # Every row up to the largest key has been read, so the key alone resumes safely
+                cursor = page[key_column].max()
+                state.watermark = cursor.item() if hasattr(cursor, 'item') else cursor
+                break
+            # Mid-table the (key, tiebreaker) cursor keeps rows sharing the last key on the next page
+            cursor = state.watermark = next_cursor
+    else:
+        state = None
+        for chunk in connector.iter_table_chunks(table_name, chunksize):
+            absorb(chunk)
+    return state, processed
@@ -0,0 +1,297 @@
+import codecs
+import csv
+import io
+import os
+import re
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+SAMPLE_BYTES = 1024 * 1024
+CANDIDATE_ENCODINGS = ['utf-8', 'cp1252', 'latin1']
+DELIMITERS = ',;\t|'
+# Excel writes <dimension> near the top of each worksheet part
+DIMENSION_PROBE_BYTES = 16384
+_DIMENSION = re.compile(rb'<(?:\w+:)?dimension\s+ref="([^"]+)"')
+_XLSX_MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_XLSX_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+
+
+def file_size(file_object):
+    """Returns the size of a file-like object in bytes without consuming it."""
+    size = getattr(file_object, 'size', None)
+    if size is not None:
+        return size
+    pos = file_object.tell()
+    file_object.seek(0, os.SEEK_END)
+    size = file_object.tell()
+    file_object.seek(pos)
+    return size
+
+
+def sniff_encoding(sample, candidates=CANDIDATE_ENCODINGS):
+    """Returns, in order, the candidate encodings that can decode the byte sample."""
+    usable = []
+    for encoding in candidates:
+        try:
+            # Incremental decoding tolerates a multi-byte char cut off at the sample edge
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            usable.append(encoding)
+        except UnicodeDecodeError:
+            continue
+    return usable or ['latin1']
+
+
+def sniff_delimiter(text):
+    """Guesses the field delimiter from a decoded text sample."""
+    try:
+        return csv.Sniffer().sniff(text[:65536], delimiters=DELIMITERS).delimiter
+    except csv.Error:
+        return ','
+
+
+def sniff_categorical_columns(sample_df, max_ratio=0.5, max_categories=10000):
+    """Picks string columns whose cardinality in the sample makes them worth storing as categoricals."""
+    columns = []
+    for col in sample_df.columns:
+        series = sample_df[col]
+        if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+            continue
+        non_null = series.dropna()
+        if non_null.empty:
+            continue
+        n_unique = non_null.nunique()
+        if n_unique <= max_categories and n_unique <= max_ratio * len(non_null):
+            columns.append(col)
+    return columns
+
+
+def _is_text(series):
+    return pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)
+
+
+def drifted_columns(chunk, text_cols):
+    """Columns parsed as text in this chunk although the settled types expect numbers or booleans."""
+    return {col for col in chunk.columns if col not in text_cols and _is_text(chunk[col])}
+
+
+def downcast_chunk(chunk, categorical_cols=(), downcast_floats=False):
+    """Shrinks numeric dtypes and converts chosen string columns to categoricals."""
+    for col in chunk.columns:
+        series = chunk[col]
+        if pd.api.types.is_integer_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            chunk[col] = pd.to_numeric(series, downcast='integer')
+        elif downcast_floats and pd.api.types.is_float_dtype(series):
+            chunk[col] = pd.to_numeric(series, downcast='float')
+        elif col in categorical_cols and not isinstance(series.dtype, pd.CategoricalDtype):
+            chunk[col] = series.astype('category')
+    return chunk
+
+
+def concat_chunks(chunks):
+    """Concatenates chunks, merging per-chunk categoricals instead of falling back to object."""
+    if not chunks:
+        return pd.DataFrame()
+    if len(chunks) == 1:
+        return chunks[0].reset_index(drop=True)
+    columns = {}
+    for col in chunks[0].columns:
+        parts = [chunk[col] for chunk in chunks]
+        if all(isinstance(p.dtype, pd.CategoricalDtype) for p in parts):
+            try:
+                columns[col] = pd.Series(union_categoricals(parts, ignore_order=True), name=col)
+                continue
+            except TypeError:
+                # Category dtypes differ between chunks (e.g. an all-null chunk parsed as float)
+                parts = [p.astype(object) for p in parts]
+        columns[col] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(columns)
+
+
+def read_csv_streaming(file_object, chunksize=200000, progress_callback=None,
+                       downcast_floats=False, sample_bytes=SAMPLE_BYTES):
+    """
+    Reads a CSV in chunks after sniffing encoding, delimiter and categorical
+    columns from a bounded sample. Only falls back to the next candidate
+    encoding if a byte later in the file cannot be decoded.
+    Column types are settled from the sample: text columns are read as
+    strings in every chunk, so a chunk of digits or nulls cannot change them.
+    A column sniffed as numeric that turns out to hold text later is read
+    again as strings in one more pass, matching what pd.read_csv returns.
+    """
+    total = file_size(file_object) or 1
+    file_object.seek(0)
+    sample = file_object.read(sample_bytes)
+    encodings = sniff_encoding(sample)
+    last_error = None
+
+    for encoding in encodings:
+        text_sample = codecs.getincrementaldecoder(encoding)(errors='replace').decode(sample, final=False)
+        if len(sample) == sample_bytes and '\n' in text_sample:
+            # Drop the partial last line so it does not skew type inference
+            text_sample = text_sample[:text_sample.rfind('\n') + 1]
+        delimiter = sniff_delimiter(text_sample)
+        sample_df = pd.read_csv(io.StringIO(text_sample), sep=delimiter, nrows=10000)
+        categorical_cols = set(sniff_categorical_columns(sample_df))
+        text_cols = {col for col in sample_df.columns if _is_text(sample_df[col])}
+
+        try:
+            while True:
+                file_object.seek(0)
+                wrapper = io.TextIOWrapper(file_object, encoding=encoding, newline='')
+                chunks, drifted = [], set()
+                try:
+                    for chunk in pd.read_csv(wrapper, sep=delimiter, chunksize=chunksize,
+                                             dtype={col: 'str' for col in text_cols}):
+                        drifted |= drifted_columns(chunk, text_cols)
+                        chunks.append(downcast_chunk(chunk, categorical_cols, downcast_floats))
+                        if progress_callback:
+                            progress_callback(min(file_object.tell() / total, 1.0))
+                finally:
+                    # Keep the caller's file object open
+                    wrapper.detach()
+                if not drifted:
+                    break
+                text_cols |= drifted
+            if progress_callback:
+                progress_callback(1.0)
+            return concat_chunks(chunks)
+        except UnicodeDecodeError as e:
+            last_error = e
+            continue
+
+    raise ValueError(f"Failed to decode CSV. Last error: {last_error}")
+
+
+def list_excel_sheets(file_object):
+    """
+    Lists the worksheets of an .xlsx workbook with their declared dimensions
+    (None when the sheet does not declare them); 'rows' counts data rows,
+    excluding the header. Reads only the workbook index and the first bytes
+    of each sheet, never the cell data.
+    """
+    import posixpath
+    import zipfile
+    from xml.etree import ElementTree
+    from openpyxl.utils import range_boundaries
+
+    file_object.seek(0)
+    sheets = []
+    with zipfile.ZipFile(file_object) as archive:
+        workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+        rels = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+        targets = {rel.get('Id'): rel.get('Target') for rel in rels}
+        for sheet in workbook.iter(f'{{{_XLSX_MAIN_NS}}}sheet'):
+            target = targets.get(sheet.get(f'{{{_XLSX_REL_NS}}}id'), '')
+            path = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+            rows = columns = None
+            try:
+                with archive.open(path) as part:
+                    match = _DIMENSION.search(part.read(DIMENSION_PROBE_BYTES))
+                if match:
+                    ref = match.group(1).decode()
+                    min_col, min_row, max_col, max_row = range_boundaries(ref if ':' in ref else f"{ref}:{ref}")
+                    # The first declared row is the header read_excel_streaming takes the names from
+                    rows, columns = max_row - min_row, max_col - min_col + 1
+            except KeyError:
+                pass
+            sheets.append({'name': sheet.get('name'), 'rows': rows, 'columns': columns})
+    file_object.seek(0)
+    return sheets
+
+
+def _records_to_chunk(records, columns):
+    chunk = pd.DataFrame.from_records(records, columns=columns)
+    # Cells arrive as Python objects; let pandas settle numeric/datetime/text dtypes
+    return chunk.infer_objects()
+
+
+def _header_names(row):
+    names, seen = [], {}
+    for i, value in enumerate(row):
+        name = str(value) if value is not None else f"Unnamed: {i}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def read_excel_streaming(file_object, sheet_name=None, cell_range=None, chunksize=20000,
+                         progress_callback=None, downcast_floats=False):
+    """
+    Reads one worksheet of an .xlsx workbook in openpyxl read-only mode,
+    streaming rows into chunks that are typed and downcast as they fill
+    (like read_csv_streaming) instead of building the whole workbook DOM.
+    `cell_range` (e.g. "B3:F5000") limits the rows and columns; its first
+    row is the header. `file_object` may also be a path.
+    """
+    from openpyxl import load_workbook
+    from openpyxl.utils import range_boundaries
+
+    if hasattr(file_object, 'seek'):
+        file_object.seek(0)
+    workbook = load_workbook(file_object, read_only=True, data_only=True)
+    try:
+        ws = workbook[sheet_name] if sheet_name is not None else workbook.worksheets[0]
+        bounds = {}
+        if cell_range:
+            min_col, min_row, max_col, max_row = range_boundaries(cell_range)
+            bounds = dict(min_col=min_col, min_row=min_row, max_col=max_col, max_row=max_row)
+        first_row = bounds.get('min_row') or 1
+        last_row = bounds.get('max_row') or ws.max_row or 0
+        total = max(last_row - first_row + 1, 1)
+
+        rows = ws.iter_rows(values_only=True, **bounds)
+        header = next(rows, None)
+        if header is None:
+            return pd.DataFrame()
+        columns = _header_names(header)
+        chunks, records, categorical_cols, read = [], [], None, 1
+        for row in rows:
+            records.append(row[:len(columns)])
+            read += 1
+            if len(records) == chunksize:
+                chunk = _records_to_chunk(records, columns)
+                if categorical_cols is None:
+                    categorical_cols = set(sniff_categorical_columns(chunk))
+                chunks.append(downcast_chunk(chunk, categorical_cols, downcast_floats))
+                records = []
+                if progress_callback:
+                    progress_callback(min(read / total, 1.0))
+        if records or not chunks:
+            chunk = _records_to_chunk(records, columns)
+            if categorical_cols is None:
+                categorical_cols = set(sniff_categorical_columns(chunk))
+            chunks.append(downcast_chunk(chunk, categorical_cols, downcast_floats))
+        if progress_callback:
+            progress_callback(1.0)
+        # A chunk where a sparse column was entirely empty comes back as object
+        return concat_chunks(chunks).infer_objects()
+    finally:
+        workbook.close()
+
+
+def read_excel_sheets(file_object, sheet_names, cell_range=None, workers=1):
+    """
+    Reads several worksheets, in worker processes when workers > 1 (openpyxl
+    parsing is pure Python, so threads would serialise on the GIL). Workers
+    open a temporary copy of the workbook by path. Returns {sheet: DataFrame}.
+    """
+    if workers <= 1 or len(sheet_names) <= 1:
+        return {name: read_excel_streaming(file_object, name, cell_range) for name in sheet_names}
+
+    import shutil
+    import tempfile
+    from modules.parallel import get_pool
+
+    file_object.seek(0)
+    with tempfile.NamedTemporaryFile(suffix='.xlsx') as tmp:
+        shutil.copyfileobj(file_object, tmp)
+        tmp.flush()
+        file_object.seek(0)
+        pool = get_pool(workers)
+        futures = {name: pool.submit(read_excel_streaming, tmp.name, name, cell_range) for name in sheet_names}
+        return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,289 @@
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import sys
+import threading
+import time
+import tracemalloc
+import weakref
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger("datanudge.metrics")
+
+# Prometheus histogram buckets for call latency, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class MethodStats:
+    """Aggregated timings and memory of one instrumented name."""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.alloc_bytes = 0
+        self.max_peak_bytes = 0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+
+    def add(self, span):
+        self.count += 1
+        self.errors += span["error"] is not None
+        self.total_seconds += span["seconds"]
+        self.max_seconds = max(self.max_seconds, span["seconds"])
+        self.alloc_bytes += span["alloc_bytes"]
+        if span["peak_bytes"] is not None:
+            self.max_peak_bytes = max(self.max_peak_bytes, span["peak_bytes"])
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if span["seconds"] <= bound:
+                self.buckets[i] += 1
+
+
+class MetricsCollector:
+    """
+    Thread-safe aggregate of spans. One lives for the whole process; the app
+    adds one per session and one per rerun.
+    """
+
+    def __init__(self, keep_spans=0):
+        self.keep_spans = keep_spans
+        self.methods = {}
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def record(self, span):
+        with self._lock:
+            self.methods.setdefault(span["name"], MethodStats()).add(span)
+            if self.keep_spans:
+                self.spans.append(span)
+                del self.spans[:-self.keep_spans]
+
+    def summary(self):
+        """One row per name, slowest total first."""
+        with self._lock:
+            rows = [
+                {"name": name, "calls": s.count, "errors": s.errors,
+                 "total_ms": s.total_seconds * 1000, "mean_ms": s.total_seconds * 1000 / s.count,
+                 "max_ms": s.max_seconds * 1000, "alloc_mb": s.alloc_bytes / 2**20,
+                 "peak_mb": s.max_peak_bytes / 2**20}
+                for name, s in self.methods.items()
+            ]
+        return sorted(rows, key=lambda r: r["total_ms"], reverse=True)
+
+    def prometheus_text(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = [
+            "# HELP datanudge_call_seconds Latency of instrumented calls.",
+            "# TYPE datanudge_call_seconds histogram",
+        ]
+        with self._lock:
+            items = sorted(self.methods.items())
+            for name, s in items:
+                label = name.replace("\\", "\\\\").replace('"', '\\"')
+                for bound, count in zip(LATENCY_BUCKETS, s.buckets):
+                    lines.append(f'datanudge_call_seconds_bucket{{method="{label}",le="{bound}"}} {count}')
+                lines.append(f'datanudge_call_seconds_bucket{{method="{label}",le="+Inf"}} {s.count}')
+                lines.append(f'datanudge_call_seconds_sum{{method="{label}"}} {s.total_seconds}')
+                lines.append(f'datanudge_call_seconds_count{{method="{label}"}} {s.count}')
+            lines += ["# HELP datanudge_call_errors_total Instrumented calls that raised.",
+                      "# TYPE datanudge_call_errors_total counter"]
+            lines += [f'datanudge_call_errors_total{{method="{n}"}} {s.errors}' for n, s in items]
+            lines += ["# HELP datanudge_call_alloc_bytes_total Net bytes allocated by instrumented calls (memory tracking only).",
+                      "# TYPE datanudge_call_alloc_bytes_total counter"]
+            lines += [f'datanudge_call_alloc_bytes_total{{method="{n}"}} {s.alloc_bytes}' for n, s in items]
+        return "\n".join(lines) + "\n"
+
+
+process_metrics = MetricsCollector()
+_collectors = contextvars.ContextVar("datanudge_collectors", default=())
+# Peak memory seen by each open span on this thread, so nested spans can reset the tracemalloc peak
+_open_peaks = contextvars.ContextVar("datanudge_open_peaks", default=None)
+# Memory-tracked spans open anywhere in the process. The tracemalloc peak is process-wide, so spans
+# overlapping one on another thread are marked shared: they leave the peak alone and record none.
+_traced_spans = {}
+_traced_lock = threading.Lock()
+
+
+def set_collectors(*collectors):
+    """Routes spans recorded on the current thread to these collectors (plus the process one)."""
+    _collectors.set(collectors)
+
+
+# Objects holding a claim on tracemalloc; weak, so a discarded holder (e.g. an ended session's) drops its claim
+_memory_holders = weakref.WeakSet()
+_memory_lock = threading.Lock()
+
+
+def enable_memory_tracking(holder, enabled=True):
+    """
+    Adds (or withdraws) holder's claim on tracemalloc, which runs while any
+    claim is left, so one caller cannot stop another's tracking. Spans
+    record allocations only while it runs. Roughly doubles call cost.
+    """
+    with _memory_lock:
+        if enabled:
+            _memory_holders.add(holder)
+        else:
+            _memory_holders.discard(holder)
+        if len(_memory_holders) and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif not len(_memory_holders) and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def _record(span):
+    process_metrics.record(span)
+    for collector in _collectors.get():
+        collector.record(span)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(json.dumps({"event": "span", **span}))
+
+
+@contextmanager
+def timed(name):
+    """
+    Times the enclosed block (and its memory, when tracking) as one span.
+    Allocations are the process-wide net change over the block. The peak is
+    only recorded for spans that did not overlap a tracked span on another
+    thread (peak_bytes is None otherwise).
+    """
+    tracing = tracemalloc.is_tracing()
+    peaks = _open_peaks.get()
+    if peaks is None:
+        peaks = []
+        _open_peaks.set(peaks)
+    if tracing:
+        start_current, outer_peak = tracemalloc.get_traced_memory()
+        state = {"stack": peaks, "shared": False}
+        with _traced_lock:
+            others = [s for s in _traced_spans.values() if s["stack"] is not peaks]
+            if others:
+                state["shared"] = True
+                for other in others:
+                    other["shared"] = True
+            else:
+                if peaks:
+                    peaks[-1] = max(peaks[-1], outer_peak)
+                tracemalloc.reset_peak()
+            _traced_spans[id(state)] = state
+        peaks.append(start_current)
+    error = None
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        alloc = peak = 0
+        if tracing:
+            with _traced_lock:
+                del _traced_spans[id(state)]
+        if tracing and tracemalloc.is_tracing():
+            current, own_peak = tracemalloc.get_traced_memory()
+            peak_abs = max(peaks.pop(), own_peak)
+            alloc = current - start_current
+            peak = None if state["shared"] else peak_abs - start_current
+            if peaks:
+                peaks[-1] = max(peaks[-1], peak_abs)
+        elif tracing:
+            peaks.pop()
+        _record({"name": name, "seconds": seconds, "alloc_bytes": alloc,
+                 "peak_bytes": peak, "error": error, "thread": threading.current_thread().name,
+                 "ts": time.time()})
+
+
+def instrument_function(fn, name):
+    """Wraps fn in a span; generators are timed until exhausted and coroutines until awaited."""
+    if getattr(fn, "__instrumented__", False):
+        return fn
+    if inspect.isgeneratorfunction(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(name):
+                yield from fn(*args, **kwargs)
+    elif inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with timed(name):
+                return await fn(*args, **kwargs)
+    else:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(name):
+                return fn(*args, **kwargs)
+    wrapper.__instrumented__ = True
+    return wrapper
+
+
+def instrument(cls, methods=None):
+    """Wraps the public methods defined on cls (or the named ones) as '<Class>.<method>' spans."""
+    names = methods or [n for n, v in vars(cls).items() if not n.startswith("_") and inspect.isfunction(v)]
+    for name in names:
+        setattr(cls, name, instrument_function(vars(cls)[name], f"{cls.__name__}.{name}"))
+    return cls
+
+
+# Classes instrumented by instrument_all, as (module, class name)
+INSTRUMENTED_CLASSES = [
+    ("modules.eda", "EDA"),
+    ("modules.relationships", "RelationshipManager"),
+    ("modules.connector", "DataConnector"),
+    ("modules.ai_insights", "AIAnalyst"),
+    ("modules.report_generator", "ReportGenerator"),
+]
+_instrumented = set()
+_instrument_lock = threading.Lock()
+
+
+def instrument_all():
+    """
+    Instruments the analysis, connector, AI and report classes whose modules
+    are already imported. Cheap to call on every rerun: it never imports
+    anything itself, so pages keep loading their modules lazily.
+    """
+    with _instrument_lock:
+        for module_name, class_name in INSTRUMENTED_CLASSES:
+            if (module_name, class_name) in _instrumented:
+                continue
+            # The warm-up thread may still be importing the module; retry on a later call
+            cls = getattr(sys.modules.get(module_name), class_name, None)
+            if cls is not None:
+                instrument(cls)
+                _instrumented.add((module_name, class_name))
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = process_metrics.prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+
+
+def start_metrics_server(port, host="127.0.0.1"):
+    """
+    Serves process_metrics at http://<host>:<port>/metrics from a daemon thread
+    (once per process). Only local scrapers can reach it unless host is widened.
+    """
+    global _server
+    with _instrument_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    return _server
@@ -0,0 +1,215 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Gemini REST base (using v1beta for latest features); methods are appended as ":<method>"
+GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash-latest"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+DEFAULT_CACHE_DIR = os.environ.get(
+    "DATANUDGE_INSIGHT_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".datanudge", "insights")
+)
+
+
+class InsightError(Exception):
+    """Raised when the LLM provider returns an error or an unexpected payload."""
+
+
+class ResponseCache:
+    """
+    TTL cache of generated insights keyed by (provider, task_type, context hash).
+    Entries live in memory (LRU) and, when a directory is given, on disk so they
+    survive restarts.
+    """
+
+    def __init__(self, ttl=24 * 3600, directory=None, max_entries=512):
+        self.ttl = ttl
+        self.directory = directory
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(provider, task_type, context):
+        context_hash = hashlib.sha256(context.encode("utf-8")).hexdigest()
+        return hashlib.sha256(f"{provider}|{task_type}|{context_hash}".encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now - entry[0] < self.ttl:
+                    self._entries.move_to_end(key)
+                    return entry[1]
+                del self._entries[key]
+        if self.directory and os.path.exists(self._path(key)):
+            try:
+                with open(self._path(key)) as f:
+                    stored = json.load(f)
+            except (OSError, ValueError):
+                return None
+            if now - stored["created"] < self.ttl:
+                self._remember(key, stored["created"], stored["text"])
+                return stored["text"]
+            os.remove(self._path(key))
+        return None
+
+    def put(self, key, text):
+        created = time.time()
+        self._remember(key, created, text)
+        if self.directory:
+            # A unique temp file per call, so threads answering the same prompt never share one
+            fd, tmp_path = tempfile.mkstemp(prefix=f"{key}.", suffix=".tmp", dir=self.directory)
+            with os.fdopen(fd, "w") as f:
+                json.dump({"created": created, "text": text}, f)
+            os.replace(tmp_path, self._path(key))
+
+    def _remember(self, key, created, text):
+        with self._lock:
+            self._entries[key] = (created, text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class InsightClient:
+    """
+    Gemini REST client with a persistent pooled HTTP session, timeouts and
+    retries with jittered exponential backoff on 429/5xx and network errors.
+    """
+
+    def __init__(self, api_key, base_url=GEMINI_BASE_URL, timeout=(5, 60), max_retries=3,
+                 backoff=0.5, max_backoff=8.0, pool_size=10):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # Key travels in a header so it never shows up in URLs or logs
+        self.session.headers.update({"Content-Type": "application/json", "x-goog-api-key": api_key or ""})
+
+    @staticmethod
+    def build_payload(prompt_text):
+        return {"contents": [{"parts": [{"text": prompt_text}]}]}
+
+    def _sleep_before_retry(self, attempt, response=None):
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = min(float(retry_after), self.max_backoff)
+        else:
+            # Full jitter keeps concurrent clients from retrying in lockstep
+            delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        time.sleep(delay)
+
+    def post(self, method, payload, stream=False, params=None):
+        """POSTs to <base_url>:<method>, retrying transient failures. Returns the response."""
+        url = f"{self.base_url}:{method}"
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.post(url, data=json.dumps(payload), timeout=self.timeout,
+                                             stream=stream, params=params)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.max_retries:
+                    raise InsightError(f"AI API unreachable: {e}") from e
+                self._sleep_before_retry(attempt)
+                continue
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                response.close()
+                self._sleep_before_retry(attempt, response)
+                continue
+            if response.status_code != 200:
+                raise InsightError(f"AI API Error ({response.status_code}): {response.text}")
+            return response
+
+    def generate(self, prompt_text):
+        """Returns the generated text for a prompt."""
+        result = self.post("generateContent", self.build_payload(prompt_text)).json()
+        try:
+            return result['candidates'][0]['content']['parts'][0]['text']
+        except (KeyError, IndexError):
+            raise InsightError(f"Unexpected API Response Format: {result}")
+
+    def stream(self, prompt_text):
+        """
+        Yields text fragments as they arrive from the server-sent-events endpoint.
+        Closing the generator (e.g. Streamlit stopping a rerun) closes the connection.
+        """
+        response = self.post("streamGenerateContent", self.build_payload(prompt_text),
+                             stream=True, params={"alt": "sse"})
+        try:
+            for data in _sse_events(response):
+                if data == "[DONE]":
+                    return
+                try:
+                    event = json.loads(data)
+                except ValueError:
+                    raise InsightError(f"Unexpected stream event: {data[:200]}")
+                for candidate in event.get("candidates", []):
+                    for part in candidate.get("content", {}).get("parts", []):
+                        if part.get("text"):
+                            yield part["text"]
+        finally:
+            response.close()
+
+    async def agenerate(self, prompt_text):
+        """Async wrapper running the pooled blocking request in a worker thread."""
+        return await asyncio.to_thread(self.generate, prompt_text)
+
+
+def _sse_events(response):
+    """Yields the data payload of each server-sent event in a streaming response."""
+    data_lines = []
+    # The SSE format is always UTF-8; without a charset header requests would decode as ISO-8859-1
+    response.encoding = "utf-8"
+    # chunk_size=None hands over each chunk as soon as it arrives instead of waiting to fill a buffer
+    for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+        if line:
+            if line.startswith("data:"):
+                # Only the single space after the colon is part of the syntax
+                value = line[5:]
+                data_lines.append(value[1:] if value.startswith(" ") else value)
+            continue
+        # A blank line terminates the event
+        if data_lines:
+            yield "\n".join(data_lines)
+            data_lines = []
+    if data_lines:
+        yield "\n".join(data_lines)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(api_key, base_url=GEMINI_BASE_URL, **options):
+    """Returns a process-wide InsightClient per (api_key, base_url) so HTTP connections are reused."""
+    key = (api_key, base_url, tuple(sorted(options.items())))
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = InsightClient(api_key, base_url, **options)
+            _clients[key] = client
+        return client
+
+
+response_cache = ResponseCache(directory=DEFAULT_CACHE_DIR)
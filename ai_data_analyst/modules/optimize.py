@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+from modules.ingest import sniff_categorical_columns
+
+
+def memory_footprint(df):
+    """Deep in-memory size of a DataFrame in bytes."""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def _arrow_string_dtype():
+    # NaN-semantics Arrow strings behave like object columns for isnull/dropna
+    try:
+        return pd.StringDtype("pyarrow", na_value=np.nan)
+    except (TypeError, ImportError):
+        return None
+
+
+def optimize_dataframe(df, downcast_floats=False, categorical_ratio=0.5, max_categories=10000,
+                       arrow_strings=True):
+    """
+    Returns (optimized copy, report) where the copy has integers downcast,
+    low-cardinality text stored as categoricals and other object text stored
+    as Arrow strings. Float downcasting loses precision and is opt-in.
+    The report lists every column's dtype and deep memory before and after.
+    """
+    categorical_cols = set(sniff_categorical_columns(df, categorical_ratio, max_categories))
+    string_dtype = _arrow_string_dtype() if arrow_strings else None
+    columns, rows = {}, []
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_bool_dtype(series):
+            optimized = series
+        elif pd.api.types.is_integer_dtype(series):
+            optimized = pd.to_numeric(series, downcast='integer')
+        elif pd.api.types.is_float_dtype(series):
+            optimized = pd.to_numeric(series, downcast='float') if downcast_floats else series
+        elif col in categorical_cols and not isinstance(series.dtype, pd.CategoricalDtype):
+            optimized = series.astype('category')
+        elif (string_dtype is not None and pd.api.types.is_object_dtype(series)
+              and pd.api.types.infer_dtype(series, skipna=True) == 'string'):
+            optimized = series.astype(string_dtype)
+        else:
+            optimized = series
+        columns[col] = optimized
+        rows.append({
+            'Column': col, 'Before': str(series.dtype), 'After': str(optimized.dtype),
+            'Before Bytes': int(series.memory_usage(deep=True, index=False)),
+            'After Bytes': int(optimized.memory_usage(deep=True, index=False)),
+        })
+    optimized_df = pd.DataFrame(columns, index=df.index)
+    report = pd.DataFrame(rows, columns=['Column', 'Before', 'After', 'Before Bytes', 'After Bytes'])
+    return optimized_df, report
+
+
+def summarize_report(report):
+    """Total bytes before/after and the reduction factor of an optimization report."""
+    before, after = int(report['Before Bytes'].sum()), int(report['After Bytes'].sum())
+    return {'before_bytes': before, 'after_bytes': after, 'ratio': before / after if after else 1.0}
@@ -0,0 +1,160 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, shared_memory
+
+import numpy as np
+import pandas as pd
+
+from modules.eda import _outlier_block
+from modules.incremental import comoment_sums, correlation_from_comoments
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+# Below this many numerical columns process start-up and copying outweigh the gain
+PARALLEL_MIN_COLUMNS = 64
+DESCRIBE_INDEX = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def get_pool(workers=DEFAULT_WORKERS):
+    """
+    Process-wide worker pool. Uses 'spawn' so workers never inherit the
+    Streamlit server's threads or locks through fork.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+
+class SharedMatrix:
+    """
+    Column-major float64 matrix in shared memory. Workers attach to it by
+    name, so the data is copied once instead of pickled per task.
+    """
+
+    def __init__(self, values):
+        self.shape = values.shape
+        self._shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        array = np.ndarray(self.shape, dtype=np.float64, buffer=self._shm.buf, order="F")
+        array[:] = values
+        del array
+
+    @classmethod
+    def from_frame(cls, df):
+        values = df.to_numpy(dtype=np.float64, na_value=np.nan)
+        return cls(np.asfortranarray(values))
+
+    @property
+    def spec(self):
+        return self._shm.name, self.shape
+
+    def close(self):
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _run_attached(spec, fn, *args):
+    """Attaches to a SharedMatrix in a worker and applies fn to the array."""
+    name, shape = spec
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        array = np.ndarray(shape, dtype=np.float64, buffer=shm.buf, order="F")
+        result = fn(array, *args)
+        del array
+        return result
+    finally:
+        shm.close()
+
+
+def _describe_columns(array, start, stop):
+    out = np.full((len(DESCRIBE_INDEX), stop - start), np.nan)
+    for k, j in enumerate(range(start, stop)):
+        col = array[:, j]
+        col = col[~np.isnan(col)]
+        out[0, k] = col.size
+        if col.size == 0:
+            continue
+        out[1, k] = col.mean()
+        if col.size > 1:
+            out[2, k] = col.std(ddof=1)
+        out[3:, k] = [col.min(), *np.percentile(col, [25, 50, 75]), col.max()]
+    return out
+
+
+def _outlier_counts(array, start, stop, method, threshold):
+    return _outlier_block(array[:, start:stop], method, threshold).sum(axis=0)
+
+
+def _comoments(array, start, stop, shift):
+    return comoment_sums(array[start:stop], shift)
+
+
+def _blocks(n, parts, minimum=1):
+    size = max(minimum, -(-n // max(parts, 1)))
+    return [(start, min(start + size, n)) for start in range(0, n, size)]
+
+
+def _numeric(df):
+    return df.select_dtypes(include=[np.number])
+
+
+def parallel_describe(df, workers=DEFAULT_WORKERS):
+    """df.describe() for the numerical columns, computed over column blocks in worker processes."""
+    numeric = _numeric(df)
+    if numeric.shape[1] == 0:
+        return df.describe()
+    pool = get_pool(workers)
+    with SharedMatrix.from_frame(numeric) as shared:
+        futures = [pool.submit(_run_attached, shared.spec, _describe_columns, start, stop)
+                   for start, stop in _blocks(numeric.shape[1], workers * 4)]
+        result = np.hstack([f.result() for f in futures])
+    return pd.DataFrame(result, index=DESCRIBE_INDEX, columns=numeric.columns)
+
+
+def parallel_outlier_counts(df, method, threshold, columns=None, workers=DEFAULT_WORKERS):
+    """Outlier count per numerical column (as EDA.detect_outliers), over column blocks in workers."""
+    numeric = _numeric(df)
+    if columns is not None:
+        numeric = numeric[[c for c in columns if c in numeric.columns]]
+    pool = get_pool(workers)
+    with SharedMatrix.from_frame(numeric) as shared:
+        futures = [pool.submit(_run_attached, shared.spec, _outlier_counts, start, stop, method, threshold)
+                   for start, stop in _blocks(numeric.shape[1], workers * 4)]
+        counts = np.concatenate([f.result() for f in futures]) if futures else []
+    return {col: int(n) for col, n in zip(numeric.columns, counts) if n > 0}
+
+
+def parallel_correlation(df, workers=DEFAULT_WORKERS):
+    """
+    Pairwise-complete Pearson correlation (as DataFrame.corr) from co-moments
+    summed over row blocks computed in worker processes.
+    """
+    numeric = _numeric(df)
+    pool = get_pool(workers)
+    with SharedMatrix.from_frame(numeric) as shared:
+        shift = np.nan_to_num(numeric.mean().to_numpy(dtype=np.float64), nan=0.0, posinf=0.0, neginf=0.0)
+        futures = [pool.submit(_run_attached, shared.spec, _comoments, start, stop, shift)
+                   for start, stop in _blocks(len(numeric), workers, minimum=1000)]
+        n = sx = sxx = sxy = 0
+        for future in futures:
+            block_n, block_sx, block_sxx, block_sxy = future.result()
+            n, sx, sxx, sxy = n + block_n, sx + block_sx, sxx + block_sxx, sxy + block_sxy
+    p = numeric.shape[1]
+    if not futures:
+        return pd.DataFrame(np.full((p, p), np.nan), index=numeric.columns, columns=numeric.columns)
+    corr = correlation_from_comoments(n, sx, sxx, sxy)
+    return pd.DataFrame(corr, index=numeric.columns, columns=numeric.columns)
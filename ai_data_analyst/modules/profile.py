@@ -0,0 +1,96 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from modules.eda import EDA
+from modules.relationships import RelationshipManager
+
+DEFAULT_TOKEN_BUDGET = 1500
+# Rough chars-per-token ratio for English/CSV-like text
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _fmt(value):
+    if isinstance(value, (float, np.floating)):
+        return "nan" if np.isnan(value) else f"{value:.4g}"
+    return str(value)
+
+
+def _column_line(df, col, stats, missing, cardinality):
+    series = df[col]
+    parts = [f"{col}: {series.dtype}", f"nulls {missing.loc[col, 'Percent']:.1f}%", f"unique {cardinality[col]}"]
+    if col in stats.columns:
+        s = stats[col]
+        parts.append("min/q1/med/q3/max " + "/".join(_fmt(s[k]) for k in ['min', '25%', '50%', '75%', 'max']))
+        parts.append(f"mean {_fmt(s['mean'])}")
+    elif pd.api.types.is_datetime64_any_dtype(series):
+        parts.append(f"range {series.min()} .. {series.max()}")
+    elif cardinality[col] > 0.5 * (len(series) - missing.loc[col, 'Missing Count']):
+        # Top values of an ID-like column say nothing and are costly to count
+        parts.append("mostly unique (identifier-like)")
+    else:
+        top = series.value_counts(normalize=True, dropna=True).head(3)
+        if not top.empty:
+            parts.append("top " + ", ".join(f"{str(v)[:30]} ({p:.0%})" for v, p in top.items()))
+    return "- " + "; ".join(parts)
+
+
+def build_profile(df, token_budget=DEFAULT_TOKEN_BUDGET, eda=None, rel_manager=None, max_pairs=5):
+    """
+    Builds a compact, deterministic text profile of a DataFrame for LLM prompts:
+    shape, per-column dtype, null rate, cardinality, quantiles or top categories,
+    and the strongest correlations. Sections are added in priority order and
+    column detail is condensed once the token budget would be exceeded.
+    """
+    eda = eda or EDA(df)
+    rel_manager = rel_manager or RelationshipManager(df, cache=eda.cache, fingerprint=eda.fingerprint,
+                                                     workers=eda.workers)
+    # Sample-based statistics get their own entry, so the profile is rebuilt once exact ones are ready
+    approximate = not (eda.is_exact("basic_stats") and eda.is_exact("missing_values") and rel_manager.is_exact())
+    return eda.cache.get_or_compute(
+        eda.fingerprint, ("llm_profile", token_budget, max_pairs, approximate),
+        lambda: _build_profile(df, token_budget, eda, rel_manager, max_pairs)
+    )
+
+
+def _build_profile(df, token_budget, eda, rel_manager, max_pairs):
+    stats = eda.get_basic_stats()
+    missing = eda.get_missing_values()
+    cardinality = eda.get_cardinality()
+
+    header = f"Dataset: {df.shape[0]} rows x {df.shape[1]} columns"
+    pairs = rel_manager.find_highly_correlated_pairs(threshold=0.5, top_k=max_pairs)
+    correlations = ""
+    if pairs:
+        correlations = "Strongest correlations: " + ", ".join(f"{a}~{b} {r:+.2f}" for a, b, r in pairs)
+
+    # Reserve room for the header and correlations before spending budget on columns
+    used = estimate_tokens(header) + estimate_tokens("Columns:") + estimate_tokens(correlations) + 3
+    lines, condensed = [], []
+    for col in df.columns:
+        if not condensed:
+            line = _column_line(df, col, stats, missing, cardinality)
+            if used + estimate_tokens(line) + 1 <= token_budget:
+                lines.append(line)
+                used += estimate_tokens(line) + 1
+                continue
+        condensed.append(f"{col} ({df[col].dtype})")
+
+    if condensed:
+        shown = []
+        for item in condensed:
+            if used + estimate_tokens("Other columns: " + ", ".join(shown + [item]) + " ... and 99999 more") > token_budget:
+                break
+            shown.append(item)
+        hidden = len(condensed) - len(shown)
+        lines.append("Other columns: " + ", ".join(shown) + (f" ... and {hidden} more" if hidden else ""))
+
+    sections = [header, "Columns:"] + lines
+    if correlations:
+        sections.append(correlations)
+    return "\n".join(sections)
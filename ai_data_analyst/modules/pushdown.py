@@ -0,0 +1,371 @@
+import time
+
+import numpy as np
+import pandas as pd
+import sqlalchemy
+from sqlalchemy import func
+
+from modules.cache import analysis_cache
+from modules.eda import EDA
+from modules.engines import engine_registry
+from modules.query_cache import table_marker
+from modules.relationships import RelationshipManager
+
+# Keeps each generated SELECT to a reasonable number of aggregate expressions
+MAX_EXPRESSIONS = 400
+# Pairwise co-moments grow quadratically, so the correlation covers at most this many columns
+MAX_CORRELATION_COLUMNS = 50
+# Cached aggregates are recomputed once this old (seconds), or as soon as the table marker changes
+CACHE_TTL = 600
+# How often the table marker is re-read while aggregates are being served
+MARKER_CHECK_INTERVAL = 5
+
+
+class PushdownUnsupported(ValueError):
+    """Raised for analyses that need row-level data, which pushdown never transfers."""
+
+
+class SQLTableSource:
+    """
+    Generates aggregate queries against one database table so only summary
+    rows leave the database. Works with the SQLite, PostgreSQL and MySQL
+    dialects through SQLAlchemy Core.
+    """
+
+    def __init__(self, engine, table_name, cache=None, ttl=CACHE_TTL):
+        self.engine = engine
+        self.table_name = table_name
+        self.cache = cache if cache is not None else analysis_cache
+        self.dialect = engine.dialect.name
+
+        schema, _, name = table_name.rpartition('.')
+        self.columns_info = engine_registry.get_inspector(engine).get_columns(name, schema=schema or None)
+        self.columns = [c['name'] for c in self.columns_info]
+        self.table = sqlalchemy.table(name, *[sqlalchemy.column(c) for c in self.columns], schema=schema or None)
+        self.fingerprint = f"sql:{engine.url.render_as_string(hide_password=True)}:{table_name}"
+        self.ttl = ttl
+        self._checked_at = 0
+
+    def _cached(self, name, compute):
+        self._check_fresh()
+        return self.cache.get_or_compute(self.fingerprint, name, compute)
+
+    def _check_fresh(self):
+        """Drops the cached aggregates once the table has been written to or they outlive the TTL."""
+        now = time.time()
+        if now - self._checked_at < MARKER_CHECK_INTERVAL:
+            return
+        self._checked_at = now
+        try:
+            marker = table_marker(self.engine, self.table_name)
+        except Exception:
+            # No marker (e.g. no access to statistics views): rely on the TTL
+            marker = None
+        stamp = self.cache.get(self.fingerprint, "computed_at")
+        if stamp is None or stamp[1] != marker or now - stamp[0] > self.ttl:
+            self.refresh()
+            self.cache.put(self.fingerprint, "computed_at", (now, marker))
+
+    def refresh(self):
+        """Forgets cached aggregates, e.g. after the table has changed."""
+        self.cache.invalidate(self.fingerprint)
+        self._checked_at = 0
+
+    def _run(self, expressions, where=None):
+        """Evaluates a list of labelled aggregate expressions, batching wide selects."""
+        row = {}
+        with self.engine.connect() as conn:
+            for i in range(0, len(expressions), MAX_EXPRESSIONS):
+                stmt = sqlalchemy.select(*expressions[i:i + MAX_EXPRESSIONS]).select_from(self.table)
+                if where is not None:
+                    stmt = stmt.where(where)
+                row.update(conn.execute(stmt).mappings().one())
+        return row
+
+    def _float(self, col):
+        # Avoids integer overflow/truncation in sums and averages
+        return sqlalchemy.cast(self.table.c[col], sqlalchemy.Float)
+
+    def numeric_columns(self):
+        numeric_types = (sqlalchemy.types.Integer, sqlalchemy.types.Numeric, sqlalchemy.types.Float)
+        return [
+            c['name'] for c in self.columns_info
+            if isinstance(c['type'], numeric_types) and not isinstance(c['type'], sqlalchemy.types.Boolean)
+        ]
+
+    def row_count(self):
+        return self._cached("row_count", lambda: self._run([func.count().label("n")])["n"])
+
+    def null_counts(self):
+        def compute():
+            exprs = [func.count(self.table.c[c]).label(f"c{i}") for i, c in enumerate(self.columns)]
+            row = self._run(exprs)
+            n = self.row_count()
+            return pd.Series({c: n - row[f"c{i}"] for i, c in enumerate(self.columns)}, dtype="int64")
+        return self._cached("null_counts", compute)
+
+    def moments(self):
+        """Per numeric column: count, mean, sample std, min and max."""
+        def compute():
+            cols = self.numeric_columns()
+            exprs = []
+            for i, c in enumerate(cols):
+                exprs += [
+                    func.count(self.table.c[c]).label(f"n{i}"),
+                    func.avg(self._float(c)).label(f"mean{i}"),
+                    func.min(self.table.c[c]).label(f"min{i}"),
+                    func.max(self.table.c[c]).label(f"max{i}"),
+                ]
+            row = self._run(exprs)
+            # Second pass on centred values keeps the variance numerically stable
+            means = {c: row[f"mean{i}"] for i, c in enumerate(cols)}
+            sq = [
+                func.sum((self._float(c) - float(means[c])) * (self._float(c) - float(means[c]))).label(f"ss{i}")
+                for i, c in enumerate(cols) if means[c] is not None
+            ]
+            sq_row = self._run(sq) if sq else {}
+            out = {}
+            for i, c in enumerate(cols):
+                n = row[f"n{i}"] or 0
+                ss = sq_row.get(f"ss{i}")
+                std = np.sqrt(float(ss) / (n - 1)) if n > 1 and ss is not None else np.nan
+                out[c] = {
+                    "count": float(n),
+                    "mean": _to_float(row[f"mean{i}"]),
+                    "std": std,
+                    "min": _to_float(row[f"min{i}"]),
+                    "max": _to_float(row[f"max{i}"]),
+                }
+            return out
+        return self._cached("moments", compute)
+
+    def approx_quantiles(self, col, quantiles=(0.25, 0.5, 0.75), bins=1024):
+        """
+        Approximates quantiles from an equal-width histogram built with GROUP BY
+        in the database; the error is bounded by (max - min) / bins.
+        """
+        def compute():
+            m = self.moments()[col]
+            lo, hi, n = m["min"], m["max"], m["count"]
+            if n == 0 or np.isnan(lo):
+                return [np.nan] * len(quantiles)
+            if hi == lo:
+                return [lo] * len(quantiles)
+            scaled = (self._float(col) - lo) * (bins / (hi - lo))
+            bucket = sqlalchemy.cast(scaled, sqlalchemy.Integer) if self.dialect == "sqlite" else func.floor(scaled)
+            bucket = bucket.label("b")
+            stmt = (
+                sqlalchemy.select(bucket, func.count().label("n"))
+                .select_from(self.table)
+                .where(self.table.c[col].isnot(None))
+                .group_by(bucket)
+            )
+            with self.engine.connect() as conn:
+                hist = pd.DataFrame(conn.execute(stmt).fetchall(), columns=["b", "n"])
+            counts = np.zeros(bins + 1)
+            np.add.at(counts, np.clip(hist["b"].astype(int).values, 0, bins), hist["n"].astype(float).values)
+            cum = np.cumsum(counts)
+            edges = lo + np.arange(bins + 2) * (hi - lo) / bins
+            result = []
+            for q in quantiles:
+                # Same (n - 1) * q rank convention as pandas' linear interpolation
+                target = q * (n - 1) + 1
+                idx = int(np.searchsorted(cum, target))
+                prev = cum[idx - 1] if idx > 0 else 0
+                frac = (target - prev) / counts[idx] if counts[idx] else 0
+                result.append(float(min(max(edges[idx] + frac * (edges[idx + 1] - edges[idx]), lo), hi)))
+            return result
+        return self._cached(("quantiles", col, tuple(quantiles), bins), compute)
+
+    def correlation(self):
+        """
+        Pairwise-complete Pearson correlation from co-moment sums computed in
+        SQL, over the first MAX_CORRELATION_COLUMNS numeric columns. Pairs of
+        columns without NULLs only need their cross product: centred on the
+        column means, their sums and sums of squares follow from moments().
+        """
+        def compute():
+            moments, rows = self.moments(), self.row_count()
+            cols = [c for c, m in moments.items() if m["count"] > 0][:MAX_CORRELATION_COLUMNS]
+            complete = {c: moments[c]["count"] == rows for c in cols}
+            centred = {c: self._float(c) - moments[c]["mean"] for c in cols}
+            exprs, pairs = [], []
+            for i in range(len(cols)):
+                for j in range(i, len(cols)):
+                    a, b = cols[i], cols[j]
+                    k = len(pairs)
+                    pairs.append((i, j))
+                    if complete[a] and complete[b]:
+                        if i != j:
+                            exprs.append(func.sum(centred[a] * centred[b]).label(f"sxy{k}"))
+                        continue
+                    both = sqlalchemy.and_(self.table.c[a].isnot(None), self.table.c[b].isnot(None))
+                    x = sqlalchemy.case((both, centred[a]))
+                    y = sqlalchemy.case((both, centred[b]))
+                    exprs += [
+                        func.count(x).label(f"n{k}"),
+                        func.sum(x).label(f"sx{k}"),
+                        func.sum(y).label(f"sy{k}"),
+                        func.sum(x * x).label(f"sxx{k}"),
+                        func.sum(y * y).label(f"syy{k}"),
+                        func.sum(x * y).label(f"sxy{k}"),
+                    ]
+            row = self._run(exprs) if exprs else {}
+            corr = np.full((len(cols), len(cols)), np.nan)
+            for k, (i, j) in enumerate(pairs):
+                a, b = cols[i], cols[j]
+                if complete[a] and complete[b]:
+                    if rows < 2:
+                        continue
+                    vx = moments[a]["std"] ** 2 * (rows - 1)
+                    vy = moments[b]["std"] ** 2 * (rows - 1)
+                    cov = vx if i == j else _to_float(row[f"sxy{k}"])
+                else:
+                    n = row[f"n{k}"] or 0
+                    if n < 2:
+                        continue
+                    sx, sy = _to_float(row[f"sx{k}"]), _to_float(row[f"sy{k}"])
+                    cov = _to_float(row[f"sxy{k}"]) - sx * sy / n
+                    vx = _to_float(row[f"sxx{k}"]) - sx * sx / n
+                    vy = _to_float(row[f"syy{k}"]) - sy * sy / n
+                if vx > 0 and vy > 0:
+                    corr[i, j] = corr[j, i] = np.clip(cov / np.sqrt(vx * vy), -1, 1)
+            return pd.DataFrame(corr, index=cols, columns=cols)
+        return self._cached("correlation", compute)
+
+    def distinct_counts(self):
+        """Number of distinct non-null values per column."""
+        def compute():
+            exprs = [func.count(func.distinct(self.table.c[c])).label(f"d{i}") for i, c in enumerate(self.columns)]
+            row = self._run(exprs)
+            return pd.Series({c: row[f"d{i}"] for i, c in enumerate(self.columns)}, dtype="int64")
+        return self._cached("distinct_counts", compute)
+
+    def outlier_counts(self, threshold=3):
+        """Counts values more than `threshold` population standard deviations from the mean."""
+        def compute():
+            exprs, cols = [], []
+            for c, m in self.moments().items():
+                if m["count"] < 2 or not m["std"] > 0:
+                    continue
+                # describe() reports the sample std; z-scores use the population std
+                pop_std = m["std"] * np.sqrt((m["count"] - 1) / m["count"])
+                far = func.abs(self._float(c) - m["mean"]) > threshold * pop_std
+                exprs.append(func.sum(sqlalchemy.case((far, 1), else_=0)).label(f"o{len(cols)}"))
+                cols.append(c)
+            row = self._run(exprs) if exprs else {}
+            counts = {c: int(row[f"o{i}"] or 0) for i, c in enumerate(cols)}
+            return {c: n for c, n in counts.items() if n > 0}
+        return self._cached(("outlier_counts", threshold), compute)
+
+
+def _to_float(value):
+    return np.nan if value is None else float(value)
+
+
+def _needs_rows(name):
+    raise PushdownUnsupported(f"{name} needs the rows loaded; use the table browser to load a page.")
+
+
+class PushdownEDA(EDA):
+    """EDA over a database table; statistics are computed by the database."""
+
+    def __init__(self, engine, table_name, cache=None):
+        self.source = SQLTableSource(engine, table_name, cache)
+        self.df = None
+        self.cache = self.source.cache
+        self.fingerprint = self.source.fingerprint
+        self.approximate = False
+        self.workers = 1
+
+    def _cached(self, name, compute):
+        # Through the source, so derived results are dropped with the aggregates once the table changes
+        return self.source._cached(name, compute)
+
+    def refresh(self):
+        """Forgets cached aggregates so the next call queries the table again."""
+        self.source.refresh()
+
+    def get_basic_stats(self):
+        """Returns describe()-shaped statistics with histogram-approximated quantiles."""
+        def compute():
+            stats = {}
+            for col, m in self.source.moments().items():
+                q25, q50, q75 = self.source.approx_quantiles(col)
+                stats[col] = [m["count"], m["mean"], m["std"], m["min"], q25, q50, q75, m["max"]]
+            index = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+            return pd.DataFrame(stats, index=index)
+        return self._cached("basic_stats", compute)
+
+    def get_missing_values(self):
+        """Returns count and percentage of missing values."""
+        def compute():
+            missing = self.source.null_counts()
+            n = self.source.row_count()
+            percent = (missing / n) * 100 if n else missing * np.nan
+            return pd.DataFrame({'Missing Count': missing, 'Percent': percent})
+        return self._cached("missing_values", compute)
+
+    def get_columns_by_type(self):
+        """Separates numerical and categorical columns using the table schema."""
+        numeric_cols = self.source.numeric_columns()
+        categorical_cols = [c for c in self.source.columns if c not in numeric_cols]
+        return numeric_cols, categorical_cols
+
+    def get_cardinality(self):
+        """Returns the number of distinct non-null values per column."""
+        return self.source.distinct_counts()
+
+    # Row-level results cannot be produced from aggregates
+    def get_sampled_stats(self):
+        _needs_rows("Sampling")
+
+    def get_categorical_profile(self, column, top_k=20):
+        _needs_rows("Categorical profiling")
+
+    def get_categorical_summary(self, top_k=20):
+        _needs_rows("Categorical profiling")
+
+    def get_outlier_mask(self, method="zscore", threshold=None, columns=None):
+        _needs_rows("Flagging outlier rows")
+
+    def get_histogram(self, column, bins=None):
+        _needs_rows("Histograms")
+
+    def detect_outliers(self, threshold=None, method="zscore", columns=None):
+        """Returns the number of Z-score outliers per numerical column."""
+        if method != "zscore":
+            raise ValueError("Only the 'zscore' method can be pushed down to the database.")
+        counts = self.source.outlier_counts(3 if threshold is None else threshold)
+        return {c: n for c, n in counts.items() if columns is None or c in columns}
+
+    def get_correlation_matrix(self):
+        """Returns correlation matrix for numerical columns."""
+        corr = self.source.correlation()
+        return corr if len(corr.columns) > 1 else None
+
+
+class PushdownRelationshipManager(RelationshipManager):
+    """RelationshipManager whose correlations are computed by the database."""
+
+    def __init__(self, engine, table_name, cache=None):
+        self.source = SQLTableSource(engine, table_name, cache)
+        self.df = None
+        self.cache = self.source.cache
+        self.fingerprint = self.source.fingerprint
+        self.approximate = False
+        self.workers = 1
+
+    def get_correlation_matrix(self):
+        """Calculates correlation matrix for numerical columns."""
+        corr = self.source.correlation()
+        return corr if not corr.empty else None
+
+    def get_sampled_stats(self):
+        _needs_rows("Sampling")
+
+    def get_trend_series(self, date_col, value_col, freq=None, agg="mean", window=None):
+        _needs_rows("Trend analysis")
+
+    def detect_trends(self, date_col, value_col, freq=None, agg="mean", window=None):
+        return None, "Trend analysis needs the rows loaded; use the table browser to load a page."
@@ -0,0 +1,337 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import sqlalchemy
+
+from modules.cache import estimate_size
+
+# Quoted literals/identifiers are kept verbatim; runs of whitespace and comments collapse to one space
+_SQL_TOKENS = re.compile(
+    r"""('(?:[^']|'')*'|"(?:[^"]|"")*"|`[^`]*`|\[[^\]]*\])|((?:\s+|--[^\n]*|/\*.*?\*/)+)""",
+    re.S
+)
+# Keywords are case-insensitive everywhere, unlike identifiers, so only they are folded
+_KEYWORDS = re.compile(
+    r"\b(select|distinct|from|where|and|or|not|in|is|null|like|between|as|on|join|inner|left|right|"
+    r"full|outer|cross|group|by|order|having|limit|offset|union|all|with|case|when|then|else|end|"
+    r"asc|desc|exists|over|partition|cast)\b", re.I
+)
+_IDENTIFIER = r"""(?:[\w$]+|"(?:[^"]|"")+"|`[^`]+`|\[[^\]]+\])"""
+_QUALIFIED = rf"{_IDENTIFIER}(?:\s*\.\s*{_IDENTIFIER})*"
+# Words that end a FROM item rather than alias it
+_CLAUSES = (r"(?:where|join|inner|left|right|full|outer|cross|natural|on|using|group|order|having|limit|"
+            r"offset|union|intersect|except|window|fetch|for|lateral|straight_join|tablesample)\b")
+_FROM = re.compile(r"\b(?:from|join)\s+", re.I)
+_FROM_ITEM = re.compile(
+    rf"(?!{_CLAUSES})({_QUALIFIED})(?:\s+(?:as\s+)?(?!{_CLAUSES}){_IDENTIFIER})?\s*", re.I
+)
+_SUBQUERY_ALIAS = re.compile(rf"\s*(?:(?:as\s+)?(?!{_CLAUSES}){_IDENTIFIER}(?:\s*\([^()]*\))?)?\s*", re.I)
+_STATEMENT = re.compile(r"[\s(]*([a-z]+)\b", re.I)
+_EXPLAIN_OPTIONS = re.compile(r"(?:\s*(?:\([^()]*\)|analy[sz]e\b|verbose\b|extended\b|query\s+plan\b|"
+                              r"format\s*=?\s*\w+))*", re.I)
+_CTE_HEAD = re.compile(rf"\s*{_IDENTIFIER}\s*(?:\([^()]*\)\s*)?as\s+(?:not\s+)?(?:materialized\s+)?\(", re.I)
+# Reads that still change state: SELECT ... INTO creates tables or sets variables, locking reads take locks
+_SIDE_EFFECTS = re.compile(r"\binto\b|\bfor\s+(?:no\s+key\s+)?(?:update|share|key\s+share)\b|"
+                           r"\block\s+in\s+share\s+mode\b", re.I)
+
+
+def normalize_sql(sql):
+    """
+    Collapses whitespace and comments outside quotes, upper-cases keywords
+    and drops a trailing semicolon, so formatting differences share a key.
+    """
+    parts, position = [], 0
+    for match in _SQL_TOKENS.finditer(sql):
+        parts.append(_KEYWORDS.sub(lambda m: m.group(0).upper(), sql[position:match.start()]))
+        parts.append(match.group(1) or " ")
+        position = match.end()
+    parts.append(_KEYWORDS.sub(lambda m: m.group(0).upper(), sql[position:]))
+    return "".join(parts).strip().rstrip(";").strip()
+
+
+def _without_literals(sql):
+    return _SQL_TOKENS.sub(lambda m: " " if m.group(2) or m.group(1).startswith("'") else m.group(1), sql)
+
+
+def _closing_paren(sql, position):
+    """Index of the parenthesis closing the one at `position`, or None."""
+    depth = 0
+    for i in range(position, len(sql)):
+        if sql[i] == "(":
+            depth += 1
+        elif sql[i] == ")":
+            depth -= 1
+            if depth == 0:
+                return i
+    return None
+
+
+def _reads(sql, position=0):
+    """Whether the statement starting at `position` only reads (see is_read_only)."""
+    match = _STATEMENT.match(sql, position)
+    if match is None:
+        return False
+    keyword = match.group(1).lower()
+    if keyword in ("select", "values", "show", "describe"):
+        return True
+    if keyword == "explain":
+        return _reads(sql, _EXPLAIN_OPTIONS.match(sql, match.end()).end())
+    if keyword == "with":
+        position = match.end()
+        recursive = re.compile(r"\s*recursive\b", re.I).match(sql, position)
+        position = recursive.end() if recursive else position
+        # Every CTE body and the main statement must read: PostgreSQL CTEs can hold writes
+        while True:
+            head = _CTE_HEAD.match(sql, position)
+            end = _closing_paren(sql, head.end() - 1) if head else None
+            if end is None or not _reads(sql, head.end()):
+                return False
+            comma = re.compile(r"\s*,").match(sql, end + 1)
+            if comma is None:
+                return _reads(sql, end + 1)
+            position = comma.end()
+    return False
+
+
+def is_read_only(sql):
+    """
+    Whether a normalized statement only reads: a single SELECT, VALUES, SHOW
+    or DESCRIBE, an EXPLAIN of one, or a WITH whose CTEs and main statement
+    all read. Only statement-leading keywords count, so REPLACE() or a column
+    named merge do not make a query a write.
+    """
+    bare = _without_literals(sql)
+    if ";" in bare or _SIDE_EFFECTS.search(bare):
+        return False
+    return _reads(bare)
+
+
+def referenced_tables(sql):
+    """
+    Tables named after FROM/JOIN, including comma-separated FROM lists,
+    unquoted and lower-cased. Returns None when a FROM item is not a plain
+    table or subquery (e.g. a table function), as the list would be incomplete.
+    """
+    bare = _without_literals(sql)
+    names = []
+    for match in _FROM.finditer(bare):
+        position = match.end()
+        while True:
+            if bare.startswith("(", position):
+                # A subquery's own FROM is matched separately; skip it and its alias
+                end = _closing_paren(bare, position)
+                if end is None:
+                    return None
+                position = _SUBQUERY_ALIAS.match(bare, end + 1).end()
+            else:
+                item = _FROM_ITEM.match(bare, position)
+                if item is None or bare.startswith("(", item.end(1)):
+                    return None
+                parts = [p.strip().strip('"`[]') for p in re.split(r"\s*\.\s*", item.group(1))]
+                name = ".".join(parts).lower()
+                if name not in names:
+                    names.append(name)
+                position = item.end()
+            if not bare.startswith(",", position):
+                break
+            position += 1
+            while bare.startswith(" ", position):
+                position += 1
+    return names
+
+
+def connection_key(engine):
+    """Identity of a connection: a digest of its full URL, so credentials never appear in keys."""
+    url = engine.url.render_as_string(hide_password=False)
+    return hashlib.blake2b(url.encode(), digest_size=16).hexdigest()
+
+
+def table_marker(engine, table_name):
+    """
+    A cheap value that changes when a table is written to, or None when the
+    dialect has none. SQLite uses the database file's (and WAL's) mtime and
+    size; PostgreSQL its tuple counters (flushed by the stats system, so they
+    can trail a commit by about a second); MySQL UPDATE_TIME and row estimate.
+    """
+    backend = engine.url.get_backend_name()
+    if backend == "sqlite":
+        path = engine.url.database
+        if not path or path == ":memory:":
+            return None
+        return tuple((s.st_mtime_ns, s.st_size) for s in
+                     (os.stat(p) for p in (path, path + "-wal") if os.path.exists(p)))
+    schema, _, name = table_name.rpartition(".")
+    if backend == "postgresql":
+        query = ("SELECT n_tup_ins, n_tup_upd, n_tup_del FROM pg_stat_all_tables "
+                 "WHERE relid = to_regclass(:table)")
+        params = {"table": table_name}
+    elif backend in ("mysql", "mariadb"):
+        query = ("SELECT UPDATE_TIME, TABLE_ROWS FROM information_schema.tables "
+                 "WHERE table_schema = COALESCE(:schema, DATABASE()) AND table_name = :table")
+        params = {"schema": schema or None, "table": name}
+    else:
+        return None
+    with engine.connect() as conn:
+        row = conn.execute(sqlalchemy.text(query), params).first()
+    return tuple(str(v) for v in row) if row else None
+
+
+def _compression():
+    for codec in ("zstd", "lz4"):
+        if pa.Codec.is_available(codec):
+            return codec
+    return None
+
+
+def _encode(df):
+    """Compressed Arrow IPC bytes, or the frame itself when Arrow cannot hold it (e.g. duplicate names)."""
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowException, ValueError, TypeError):
+        return df.copy()
+    sink = pa.BufferOutputStream()
+    with ipc.new_stream(sink, table.schema, options=ipc.IpcWriteOptions(compression=_compression())) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def _decode(payload):
+    if isinstance(payload, pd.DataFrame):
+        return payload.copy()
+    return ipc.open_stream(payload).read_all().to_pandas()
+
+
+class QueryResultCache:
+    """
+    Process-wide cache of query results keyed by connection, normalized SQL
+    and parameters. Results are held as compressed Arrow IPC buffers and
+    evicted least-recently-used once the entry count or byte budget is
+    exceeded, or when their TTL passes. With validate=True a hit is only
+    served while the markers of the tables it read are unchanged.
+    """
+
+    def __init__(self, max_entries=128, max_bytes=256 * 1024 * 1024, ttl=300, validate=True):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.validate = validate
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def key(self, engine, query, params=None):
+        """Returns (key, normalized SQL) for a SQL string or SQLAlchemy statement."""
+        if isinstance(query, str):
+            sql, bound = normalize_sql(query), dict(params or {})
+        else:
+            compiled = query.compile(dialect=engine.dialect)
+            sql, bound = normalize_sql(str(compiled)), {**compiled.params, **(params or {})}
+        return (connection_key(engine), sql, repr(sorted(bound.items()))), sql
+
+    def _markers(self, engine, tables):
+        if not self.validate:
+            return None
+        try:
+            return tuple(table_marker(engine, t) for t in tables)
+        except Exception:
+            # No marker (e.g. no access to statistics views): rely on the TTL
+            return None
+
+    def read_sql(self, engine, query, params=None, tables=None, ttl=None):
+        """
+        pd.read_sql through the cache. Statements that write bypass it and
+        invalidate the connection's entries (only those reading `tables` when
+        given). `tables` overrides the tables parsed from the SQL for marker
+        validation; reads whose tables cannot be parsed bypass the cache, as
+        do reads of no table at all (e.g. SELECT now()), which nothing could
+        mark stale.
+        """
+        key, sql = self.key(engine, query, params)
+        if not is_read_only(sql):
+            try:
+                return pd.read_sql(query, engine, params=params)
+            finally:
+                self.invalidate(engine, tables)
+        tables = [t.lower() for t in tables] if tables is not None else referenced_tables(sql)
+        if not tables:
+            return pd.read_sql(query, engine, params=params)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is not None:
+            payload, _, expires, _, markers = entry
+            fresh = time.time() < expires and (markers is None or self._markers(engine, tables) == markers)
+            with self._lock:
+                if fresh:
+                    self.hits += 1
+                else:
+                    self.stale += 1
+                    self._drop(key)
+            if fresh:
+                return _decode(payload)
+        with self._lock:
+            self.misses += 1
+
+        # Markers are read before the query so a concurrent write makes the entry stale, never hidden
+        markers = self._markers(engine, tables)
+        df = pd.read_sql(query, engine, params=params)
+        self._put(key, df, tables, markers, self.ttl if ttl is None else ttl)
+        return df
+
+    def _put(self, key, df, tables, markers, ttl):
+        payload = _encode(df)
+        size = payload.size if isinstance(payload, pa.Buffer) else estimate_size(payload)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = (payload, size, time.time() + ttl, tables, markers)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted[1]
+
+    def _drop(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[1]
+
+    def invalidate(self, engine=None, tables=None):
+        """Drops entries for one connection (optionally only those reading `tables`), or everything."""
+        with self._lock:
+            if engine is None:
+                self._entries.clear()
+                self._bytes = 0
+                return
+            conn = connection_key(engine)
+            tables = {t.lower() for t in tables} if tables is not None else None
+            for key in [k for k, e in self._entries.items()
+                        if k[0] == conn and (tables is None or tables & set(e[3]))]:
+                self._drop(key)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+            }
+
+
+# Shared by every session so repeated queries from any rerun hit the same entries
+query_cache = QueryResultCache()
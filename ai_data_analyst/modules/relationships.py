@@ -1,19 +1,51 @@
+import warnings
+
+import numpy as np
 import pandas as pd
 import plotly.express as px
-import plotly.graph_objects as go
-from scipy import stats
+from modules.cache import analysis_cache
+from modules.charts import line_figure
+from modules.approx import DEFAULT_SAMPLE_SIZE, SampledStats, approximate_or_exact, draw_sample
+from modules.eda import exact_correlation
 
 class RelationshipManager:
-    def __init__(self, df):
+    def __init__(self, df, cache=None, approximate=False, sample_size=DEFAULT_SAMPLE_SIZE, fingerprint=None,
+                 workers=1):
         self.df = df
+        self.cache = cache if cache is not None else analysis_cache
+        self.fingerprint = fingerprint or self.cache.fingerprint(df)
+        self.approximate = approximate and len(df) > sample_size
+        self.sample_size = sample_size
+        # Worker processes for the exact correlation of wide tables (see modules.parallel)
+        self.workers = workers
+
+    def get_sampled_stats(self):
+        """Returns the SampledStats used in approximate mode."""
+        sample = self.cache.get_or_compute(
+            self.fingerprint, ("sample", self.sample_size), lambda: draw_sample(self.df, self.sample_size)
+        )
+        return SampledStats(sample, len(self.df))
+
+    def is_exact(self):
+        """Whether the correlation matrix is exact."""
+        return not self.approximate or self.cache.contains(self.fingerprint, "correlation")
 
     def get_correlation_matrix(self):
         """Calculates correlation matrix for numerical columns."""
-        numeric_df = self.df.select_dtypes(include=['number'])
-        if not numeric_df.empty:
-            return numeric_df.corr()
+        corr = approximate_or_exact(
+            self.cache, self.fingerprint, "correlation", lambda: exact_correlation(self.df, self.workers),
+            lambda: self.get_sampled_stats().correlation(), self.approximate
+        )
+        if not corr.empty and len(self.df):
+            return corr
         return None
 
+    def get_correlation_intervals(self):
+        """Fisher-z confidence bounds (low, high) for sampled correlations, or None when exact."""
+        if self.is_exact():
+            return None
+        return self.get_sampled_stats().correlation_intervals()
+
     def plot_correlation_heatmap(self):
         """Generates a heatmap for correlations."""
         corr = self.get_correlation_matrix()
@@ -22,33 +54,83 @@ class RelationshipManager:
             return fig
         return None
 
-    def find_highly_correlated_pairs(self, threshold=0.8):
-        """Identifies variable pairs with correlation above threshold."""
-        corr = self.get_correlation_matrix()
-        if corr is None:
-            return []
-        
-        pairs = []
-        columns = corr.columns
-        for i in range(len(columns)):
-            for j in range(i+1, len(columns)):
-                if abs(corr.iloc[i, j]) >= threshold:
-                    pairs.append((columns[i], columns[j], corr.iloc[i, j]))
-        return pairs
-
-    def detect_trends(self, date_col, value_col):
-        """Simple trend analysis over a time column."""
+    def find_highly_correlated_pairs(self, threshold=0.8, top_k=None, block_size=None):
+        """
+        Identifies variable pairs with absolute correlation above threshold.
+        `top_k` keeps only the strongest pairs; `block_size` computes the
+        correlations in column blocks so the full matrix is never materialised.
+        """
+        if block_size and self.df is not None:
+            numeric_cols = self.df.select_dtypes(include=['number']).columns
+            if len(numeric_cols) < 2 or not len(self.df):
+                return []
+            rows, cols, values = _blocked_pairs(self.df[numeric_cols], threshold, top_k, block_size)
+            columns = numeric_cols
+        else:
+            corr = self.get_correlation_matrix()
+            if corr is None:
+                return []
+            columns = corr.columns
+            rows, cols = np.triu_indices(len(columns), k=1)
+            values = corr.to_numpy()[rows, cols]
+            keep = np.abs(values) >= threshold
+            rows, cols, values = rows[keep], cols[keep], values[keep]
+
+        if top_k is not None:
+            order = np.argsort(-np.abs(values), kind="stable")[:top_k]
+            rows, cols, values = rows[order], cols[order], values[order]
+        return [(columns[i], columns[j], float(v)) for i, j, v in zip(rows, cols, values)]
+
+    def _date_index(self, date_col):
+        """Parsed, sorted date index for a column and the row order that sorts it, cached per dataset."""
+        def compute():
+            dates = self.df[date_col]
+            if not pd.api.types.is_datetime64_any_dtype(dates):
+                dates = pd.to_datetime(dates, errors="coerce")
+            values = dates.to_numpy()
+            order = np.argsort(values, kind="stable")
+            # NaT sorts last; unparseable dates are dropped from the trend
+            order = order[: int(dates.notna().sum())]
+            return pd.DatetimeIndex(values[order], name=date_col), order
+        return self.cache.get_or_compute(self.fingerprint, ("date_index", date_col), compute)
+
+    def get_trend_series(self, date_col, value_col, freq=None, agg="mean", window=None):
+        """
+        Time series of value_col over date_col, optionally resampled to `freq`
+        ('D', 'W', 'MS', ...) with `agg`, plus rolling mean/std over `window`
+        periods and period-over-period growth in percent.
+        """
+        key = ("trend", date_col, value_col, freq, agg, window)
+        def compute():
+            dates, order = self._date_index(date_col)
+            # Only the two needed columns are touched; the frame is never copied
+            series = pd.Series(self.df[value_col].to_numpy()[order], index=dates, name=value_col)
+            if freq:
+                series = series.resample(freq).agg(agg)
+            trend = series.to_frame()
+            if window:
+                rolling = series.rolling(window, min_periods=1)
+                trend['rolling_mean'] = rolling.mean()
+                trend['rolling_std'] = rolling.std()
+            trend['growth_pct'] = series.pct_change() * 100
+            return trend
+        return self.cache.get_or_compute(self.fingerprint, key, compute)
+
+    def detect_trends(self, date_col, value_col, freq=None, agg="mean", window=None):
+        """Trend analysis over a time column; growth is measured from the first to the last point."""
         try:
-            temp_df = self.df.copy()
-            temp_df[date_col] = pd.to_datetime(temp_df[date_col])
-            temp_df = temp_df.sort_values(by=date_col)
+            trend = self.get_trend_series(date_col, value_col, freq, agg, window)
+            series = trend[value_col].dropna() if freq else trend[value_col]
             
-            # Resample? For now just line plot
-            fig = px.line(temp_df, x=date_col, y=value_col, title=f"Trend of {value_col} over {date_col}")
+            label = f"{value_col} ({agg} per {freq})" if freq else value_col
+            fig = line_figure(series.index, series, f"Trend of {label} over {date_col}", date_col, value_col)
+            if window:
+                rolling = trend['rolling_mean'].dropna()
+                fig.add_trace(line_figure(rolling.index, rolling, "", date_col, "rolling mean").data[0])
             
             # Calculate simple growth rate
-            start_val = temp_df[value_col].iloc[0]
-            end_val = temp_df[value_col].iloc[-1]
+            start_val = series.iloc[0]
+            end_val = series.iloc[-1]
             growth = ((end_val - start_val) / start_val) * 100 if start_val != 0 else 0
             
             return fig, growth
@@ -60,12 +142,81 @@ class RelationshipManager:
         Uses correlation to suggest potential drivers for a target variable.
         (Simplified 'Causation' for MVP)
         """
-        corr = self.get_correlation_matrix()
-        if corr is None or target_col not in corr.columns:
-            return []
+        if self.df is not None and not self.cache.contains(self.fingerprint, "correlation"):
+            # One column against the rest is O(n) in width, no full matrix needed
+            numeric_df = self.df.select_dtypes(include=['number'])
+            if target_col not in numeric_df.columns or not len(numeric_df):
+                return []
+            others = numeric_df.drop(columns=target_col)
+            target_x, target_m = _centred(numeric_df[[target_col]])
+            other_x, other_m = _centred(others)
+            correlations = pd.Series(_pairwise_corr(target_x, target_m, other_x, other_m)[0], index=others.columns)
+        else:
+            corr = self.get_correlation_matrix()
+            if corr is None or target_col not in corr.columns:
+                return []
+            correlations = corr[target_col].drop(target_col) # Remove target itself
         
         # Sort by absolute correlation to target
-        correlations = corr[target_col].drop(target_col) # Remove target itself
         sorted_corr = correlations.abs().sort_values(ascending=False)
         
         return sorted_corr.head(5).to_dict()
+
+
+def _centred(numeric_df):
+    """Column-centred float values with NaNs zeroed, plus the float validity mask."""
+    values = numeric_df.to_numpy(dtype=np.float64, na_value=np.nan)
+    mask = ~np.isnan(values)
+    with warnings.catch_warnings():
+        # All-NaN columns warn ("Mean of empty slice") and get a NaN mean, zeroed below
+        warnings.simplefilter("ignore", RuntimeWarning)
+        means = np.nanmean(np.where(mask, values, np.nan), axis=0) if not mask.all() else values.mean(axis=0)
+    values = np.where(mask, values - np.nan_to_num(means), 0.0)
+    return values, mask.astype(np.float64)
+
+
+def _pairwise_corr(xa, ma, xb, mb):
+    """
+    Pearson correlation between every column of block a and block b using
+    pairwise-complete observations, like DataFrame.corr(), via matrix products.
+    """
+    n = ma.T @ mb
+    sx = xa.T @ mb
+    sy = ma.T @ xb
+    sxx = (xa * xa).T @ mb
+    syy = ma.T @ (xb * xb)
+    sxy = xa.T @ xb
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = sxy - sx * sy / n
+        var_x = sxx - sx * sx / n
+        var_y = syy - sy * sy / n
+        corr = cov / np.sqrt(var_x * var_y)
+    corr[(n < 2) | (var_x <= 0) | (var_y <= 0)] = np.nan
+    return np.clip(corr, -1, 1)
+
+
+def _blocked_pairs(numeric_df, threshold, top_k, block_size):
+    """Collects above-threshold upper-triangle pairs one column block pair at a time."""
+    values, mask = _centred(numeric_df)
+    n_cols = values.shape[1]
+    rows, cols, found = [], [], []
+    for a in range(0, n_cols, block_size):
+        for b in range(a, n_cols, block_size):
+            xa, ma = values[:, a:a + block_size], mask[:, a:a + block_size]
+            xb, mb = values[:, b:b + block_size], mask[:, b:b + block_size]
+            block = _pairwise_corr(xa, ma, xb, mb)
+            i, j = np.nonzero(np.abs(block) >= threshold)
+            i, j = i + a, j + b
+            upper = i < j
+            rows.append(i[upper])
+            cols.append(j[upper])
+            found.append(block[i[upper] - a, j[upper] - b])
+            if top_k is not None:
+                # Keep memory bounded by trimming to the current top_k
+                r, c, v = np.concatenate(rows), np.concatenate(cols), np.concatenate(found)
+                keep = np.argsort(-np.abs(v), kind="stable")[:top_k]
+                rows, cols, found = [r[keep]], [c[keep]], [v[keep]]
+    rows, cols, found = np.concatenate(rows), np.concatenate(cols), np.concatenate(found)
+    # Same row-major order as walking the upper triangle of the full matrix
+    order = np.lexsort((cols, rows))
+    return rows[order], cols[order], found[order]
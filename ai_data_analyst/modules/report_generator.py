@@ -1,5 +1,28 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 from fpdf import FPDF
-import pandas as pd
+
+from modules.charts import histogram_bins
+from modules.eda import EDA
+
+# Reports render off the Streamlit script thread
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="pdf-report")
+
+MAX_CHARTS = 12
+STAT_COLUMNS = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+
+
+def _latin1(text):
+    # Core PDF fonts only cover latin-1
+    return str(text).encode("latin-1", "replace").decode("latin-1")
+
+
+def _fmt(value):
+    if isinstance(value, (float, np.floating)):
+        return "" if np.isnan(value) else f"{value:.4g}"
+    return str(value)
+
 
 class PDFReport(FPDF):
     def header(self):
@@ -12,54 +35,152 @@ class PDFReport(FPDF):
         self.set_font('Arial', 'I', 8)
         self.cell(0, 10, 'Page ' + str(self.page_no()), 0, 0, 'C')
 
+    def section(self, title):
+        self.set_font('Arial', 'B', 14)
+        self.cell(0, 10, title, 0, 1)
+
+    def _fit(self, text, width):
+        """Truncates text with '...' so it fits in a cell of the given width."""
+        text = _latin1(text)
+        if self.get_string_width(text) <= width - 2:
+            return text
+        while text and self.get_string_width(text + "...") > width - 2:
+            text = text[:-1]
+        return text + "..."
+
+    def table(self, header, rows, widths, font_size=8, row_height=5):
+        """Bordered table that breaks across pages, repeating the header row."""
+        def draw_header():
+            self.set_font('Arial', 'B', font_size)
+            self.set_fill_color(230, 233, 239)
+            for text, width in zip(header, widths):
+                self.cell(width, row_height, self._fit(text, width), 1, 0, 'C', 1)
+            self.ln(row_height)
+            self.set_font('Arial', '', font_size)
+
+        draw_header()
+        for row in rows:
+            if self.get_y() + row_height > self.page_break_trigger:
+                self.add_page()
+                draw_header()
+            for i, (text, width) in enumerate(zip(row, widths)):
+                self.cell(width, row_height, self._fit(text, width), 1, 0, 'L' if i == 0 else 'R')
+            self.ln(row_height)
+
+    def histogram(self, title, counts, edges, x, y, width, height):
+        """Draws a pre-binned histogram as vector bars (no image encoding)."""
+        self.set_font('Arial', 'B', 9)
+        self.set_xy(x, y)
+        self.cell(width, 5, self._fit(title, width), 0, 0, 'C')
+        top, plot_height = y + 6, height - 12
+        self.set_draw_color(180, 180, 180)
+        self.rect(x, top, width, plot_height)
+        if len(counts) and counts.max() > 0:
+            self.set_fill_color(99, 110, 250)
+            bar_width = width / len(counts)
+            for i, count in enumerate(counts):
+                bar_height = plot_height * count / counts.max()
+                if bar_height > 0:
+                    self.rect(x + i * bar_width, top + plot_height - bar_height, bar_width, bar_height, 'F')
+            self.set_font('Arial', '', 7)
+            self.set_xy(x, top + plot_height)
+            self.cell(width / 2, 4, _fmt(edges[0]), 0, 0, 'L')
+            self.cell(width / 2, 4, _fmt(edges[-1]), 0, 0, 'R')
+        self.set_draw_color(0, 0, 0)
+
+
 class ReportGenerator:
-    def __init__(self, df):
+    def __init__(self, df, eda=None, progress_callback=None):
         self.df = df
-        
+        # Reuses statistics already computed for the dashboard via the shared cache
+        self.eda = eda or EDA(df)
+        self.progress_callback = progress_callback
+
+    def _progress(self, fraction, message):
+        if self.progress_callback is not None:
+            self.progress_callback(fraction, message)
+
+    def render(self):
+        """
+        Returns the PDF report as bytes, cached per dataset and per whether its
+        statistics are still sample-based, so a report rendered in approximate
+        mode is replaced once the exact statistics are ready.
+        """
+        approximate = not (self.eda.is_exact("basic_stats") and self.eda.is_exact("missing_values"))
+        return self.eda.cache.get_or_compute(
+            self.eda.fingerprint, ("pdf_report", MAX_CHARTS, approximate), self._render
+        )
+
     def generate_report(self, output_path="report.pdf"):
+        with open(output_path, "wb") as f:
+            f.write(self.render())
+        return output_path
+
+    def _render(self):
         pdf = PDFReport()
+        pdf.set_auto_page_break(True, margin=20)
         pdf.add_page()
-        pdf.set_font("Arial", size=12)
-        
+        numeric_cols, categorical_cols = self.eda.get_columns_by_type()
+
         # 1. Dataset Info
-        pdf.set_font("Arial", 'B', 14)
-        pdf.cell(0, 10, "1. Dataset Overview", 0, 1)
+        self._progress(0.05, "Dataset overview")
+        pdf.section("1. Dataset Overview")
         pdf.set_font("Arial", size=12)
-        pdf.cell(0, 10, f"Total Rows: {self.df.shape[0]}", 0, 1)
-        pdf.cell(0, 10, f"Total Columns: {self.df.shape[1]}", 0, 1)
+        pdf.cell(0, 8, f"Total Rows: {self.df.shape[0]}", 0, 1)
+        pdf.cell(0, 8, f"Total Columns: {self.df.shape[1]}", 0, 1)
+        pdf.cell(0, 8, f"Numerical / Categorical: {len(numeric_cols)} / {len(categorical_cols)}", 0, 1)
         pdf.ln(5)
-        
-        # 2. Columns
-        pdf.set_font("Arial", 'B', 14)
-        pdf.cell(0, 10, "2. Column List", 0, 1)
-        pdf.set_font("Arial", size=10)
-        cols = ", ".join(self.df.columns.tolist())
-        pdf.multi_cell(0, 10, cols)
+
+        # 2. Columns with their missing values and cardinality
+        self._progress(0.15, "Column summary")
+        missing = self.eda.get_missing_values()
+        cardinality = self.eda.get_cardinality()
+        pdf.section("2. Column Summary")
+        rows = (
+            [col, str(self.df[col].dtype), int(missing.loc[col, 'Missing Count']),
+             f"{missing.loc[col, 'Percent']:.1f}%", int(cardinality[col])]
+            for col in self.df.columns
+        )
+        pdf.table(["Column", "Type", "Missing", "Missing %", "Unique"], rows, [70, 35, 25, 25, 35])
         pdf.ln(5)
-        
-        # 3. Missing Values
-        pdf.set_font("Arial", 'B', 14)
-        pdf.cell(0, 10, "3. Missing Values Summary", 0, 1)
-        pdf.set_font("Arial", size=10)
-        missing = self.df.isnull().sum()
-        missing = missing[missing > 0]
-        if not missing.empty:
-            for col, val in missing.items():
-                pdf.cell(0, 10, f"{col}: {val} missing", 0, 1)
+
+        # 3. Basic Stats (Numerical), one row per column so wide data paginates
+        self._progress(0.4, "Basic statistics")
+        pdf.section("3. Basic Statistics (Numerical)")
+        stats = self.eda.get_basic_stats()
+        if stats.empty:
+            pdf.set_font("Arial", size=10)
+            pdf.cell(0, 8, "No numerical columns found.", 0, 1)
         else:
-             pdf.cell(0, 10, "No missing values found.", 0, 1)
-        pdf.ln(10)
-
-        # 4. Basic Stats (Numerical)
-        pdf.set_font("Arial", 'B', 14)
-        pdf.cell(0, 10, "4. Basic Statistics (Numerical)", 0, 1)
-        pdf.set_font("Arial", size=8)
-        
-        desc = self.df.describe()
-        # Convert df to string for simple printing
-        # A real table would be better but requires more complex FPDF logic
-        stats_str = desc.to_string() 
-        pdf.multi_cell(0, 5, stats_str)
-        
-        pdf.output(output_path)
-        return output_path
+            stats = stats.T.reindex(columns=STAT_COLUMNS)
+            rows = ([col] + [_fmt(v) for v in values] for col, values in zip(stats.index, stats.to_numpy()))
+            pdf.table(["Column"] + STAT_COLUMNS, rows, [38] + [19] * len(STAT_COLUMNS), font_size=7)
+
+        # 4. Distributions
+        charted = numeric_cols[:MAX_CHARTS]
+        if charted:
+            pdf.add_page()
+            pdf.section("4. Distributions")
+            if len(numeric_cols) > MAX_CHARTS:
+                pdf.set_font("Arial", 'I', 9)
+                pdf.cell(0, 6, f"Showing the first {MAX_CHARTS} of {len(numeric_cols)} numerical columns.", 0, 1)
+            width, height = 90, 60
+            for i, col in enumerate(charted):
+                self._progress(0.6 + 0.35 * i / len(charted), f"Chart: {col}")
+                # Two charts per row
+                if i % 2 == 0:
+                    if pdf.get_y() + height > pdf.page_break_trigger:
+                        pdf.add_page()
+                    y = pdf.get_y()
+                counts, edges = histogram_bins(self.df[col], bins=30)
+                pdf.histogram(col, counts, edges, pdf.l_margin + (i % 2) * (width + 10), y, width, height)
+                if i % 2 == 1 or i == len(charted) - 1:
+                    pdf.set_xy(pdf.l_margin, y + height)
+
+        self._progress(1.0, "Done")
+        return pdf.output(dest='S').encode('latin-1')
+
+
+def submit_report(df, eda=None, progress_callback=None):
+    """Renders the report in a background worker; returns a Future of the PDF bytes."""
+    return _executor.submit(ReportGenerator(df, eda, progress_callback).render)
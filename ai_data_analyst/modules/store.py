@@ -0,0 +1,166 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+DEFAULT_STORE_DIR = os.environ.get(
+    "DATANUDGE_STORE_DIR",
+    os.path.join(os.path.expanduser("~"), ".datanudge", "datasets")
+)
+# Least recently used datasets are evicted beyond this total size or idle age
+DEFAULT_MAX_BYTES = 10 * 1024 ** 3
+DEFAULT_MAX_AGE = 7 * 24 * 3600
+
+
+def content_hash(file_object, block_size=8 * 1024 * 1024, options=None):
+    """
+    Hashes the raw bytes of a file-like object, leaving it rewound. `options`
+    (e.g. the chosen Excel sheets and range) are mixed in so each selection
+    gets its own key.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    if options is not None:
+        digest.update(repr(options).encode())
+    file_object.seek(0)
+    while True:
+        block = file_object.read(block_size)
+        if not block:
+            break
+        digest.update(block)
+    file_object.seek(0)
+    return digest.hexdigest()
+
+
+class DatasetStore:
+    """
+    Persists loaded datasets once as uncompressed Arrow IPC files keyed by
+    content hash. Reloads go through a memory map, so unchanged numeric
+    columns are backed by the OS page cache and shared between sessions.
+    Datasets idle for longer than max_age, and the least recently used ones
+    beyond max_bytes in total, are evicted after each save.
+    """
+
+    def __init__(self, root=None, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE):
+        self.root = root or DEFAULT_STORE_DIR
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        os.makedirs(self.root, exist_ok=True)
+
+    def _data_path(self, key):
+        return os.path.join(self.root, f"{key}.arrow")
+
+    def _meta_path(self, key):
+        return os.path.join(self.root, f"{key}.json")
+
+    def _tmp_path(self, key):
+        # Unique per call, so threads of one process saving the same key never share a file
+        fd, path = tempfile.mkstemp(prefix=f"{key}.", suffix=".tmp", dir=self.root)
+        os.close(fd)
+        return path
+
+    def has(self, key):
+        return os.path.exists(self._data_path(key)) and os.path.exists(self._meta_path(key))
+
+    def save(self, key, df, name=None):
+        """Writes df to the store under key. Existing entries are left untouched."""
+        if self.has(key):
+            return self._data_path(key)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        tmp_path = self._tmp_path(key)
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, self._data_path(key))
+
+        meta = {
+            "key": key,
+            "name": name or key,
+            "rows": table.num_rows,
+            "columns": table.column_names,
+            "bytes": os.path.getsize(self._data_path(key)),
+            "created": time.time(),
+        }
+        # Written aside and renamed so a concurrent list_datasets never reads half a file
+        tmp_meta = self._tmp_path(key)
+        with open(tmp_meta, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_meta, self._meta_path(key))
+        self.evict(keep=(key,))
+        return self._data_path(key)
+
+    def load(self, key, columns=None):
+        """
+        Memory-maps a stored dataset and converts it to pandas, materialising
+        only the requested columns.
+        """
+        # The metadata file's mtime records the last use for eviction
+        os.utime(self._meta_path(key))
+        source = pa.memory_map(self._data_path(key), "r")
+        table = ipc.open_file(source).read_all()
+        if columns is not None:
+            table = table.select(list(columns))
+        # split_blocks lets null-free numeric columns stay zero-copy views of the map
+        return table.to_pandas(split_blocks=True)
+
+    def get_columns(self, key):
+        """Returns the stored column names without reading any data."""
+        return self.get_metadata(key)["columns"]
+
+    def get_metadata(self, key):
+        with open(self._meta_path(key)) as f:
+            return json.load(f)
+
+    def list_datasets(self, keys=None):
+        """Returns metadata for the stored datasets (only `keys`, when given), newest first."""
+        if keys is None:
+            keys = [f[:-len(".json")] for f in os.listdir(self.root) if f.endswith(".json")]
+        datasets = []
+        for key in dict.fromkeys(keys):
+            if self.has(key):
+                try:
+                    datasets.append(self.get_metadata(key))
+                except (OSError, ValueError):
+                    # Deleted or evicted since has() checked
+                    continue
+        return sorted(datasets, key=lambda m: m["created"], reverse=True)
+
+    def delete(self, key):
+        for path in (self._data_path(key), self._meta_path(key)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def evict(self, now=None, keep=()):
+        """
+        Deletes datasets unused for longer than max_age, then the least
+        recently used ones until the store fits in max_bytes. Keys in `keep`
+        (the dataset just saved) are never deleted. Returns the deleted keys.
+        Sessions that already memory-mapped a deleted file keep reading it;
+        the space is freed once they let go.
+        """
+        now = time.time() if now is None else now
+        entries = []
+        for key in [f[:-len(".json")] for f in os.listdir(self.root) if f.endswith(".json")]:
+            try:
+                used = os.path.getmtime(self._meta_path(key))
+                size = os.path.getsize(self._data_path(key))
+            except OSError:
+                continue
+            entries.append((used, size, key))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        evicted = []
+        for used, size, key in entries:
+            if now - used <= self.max_age and total <= self.max_bytes:
+                break
+            if key in keep:
+                continue
+            self.delete(key)
+            total -= size
+            evicted.append(key)
+        return evicted
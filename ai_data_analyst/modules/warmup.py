@@ -0,0 +1,95 @@
+import importlib
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+
+import pandas as pd
+
+# Modules the Dashboard and Export pages import on first view
+WARM_MODULES = [
+    "plotly.express",
+    "plotly.graph_objects",
+    "modules.eda",
+    "modules.relationships",
+    "modules.charts",
+    "modules.ai_insights",
+    "modules.report_generator",
+]
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_warm_thread = None
+_warm_lock = threading.Lock()
+warmup_timings = {}
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def import_profile(modules=WARM_MODULES, top=20):
+    """
+    Import-time breakdown from `python -X importtime` in a fresh interpreter,
+    so the numbers reflect a cold worker rather than this process.
+    Returns a DataFrame of the slowest imports (self and cumulative seconds).
+    """
+    code = "; ".join(f"import {name}" for name in modules)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, cwd=APP_DIR)
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append({"module": name, "depth": len(indent) // 2,
+                         "self_s": int(self_us) / 1e6, "cumulative_s": int(cumulative_us) / 1e6})
+    profile = pd.DataFrame(rows, columns=["module", "depth", "self_s", "cumulative_s"])
+    return profile.sort_values("cumulative_s", ascending=False).head(top).reset_index(drop=True)
+
+
+def _exercise():
+    # First figure creation builds plotly's validators; first describe/corr warms pandas paths
+    from modules.charts import box_figure, histogram_figure
+    from modules.eda import EDA
+    from modules.relationships import RelationshipManager
+
+    df = pd.DataFrame({"a": range(50), "b": [i % 7 for i in range(50)], "c": ["x", "y"] * 25})
+    eda = EDA(df)
+    eda.get_basic_stats()
+    eda.get_correlation_matrix()
+    RelationshipManager(df, cache=eda.cache, fingerprint=eda.fingerprint).plot_correlation_heatmap()
+    histogram_figure(df["a"], "warmup").to_json()
+    box_figure(df["b"], "warmup").to_json()
+    eda.cache.invalidate(eda.fingerprint)
+
+
+def _warm(modules):
+    for name in modules:
+        start = time.perf_counter()
+        importlib.import_module(name)
+        warmup_timings[name] = time.perf_counter() - start
+    start = time.perf_counter()
+    _exercise()
+    warmup_timings["first render"] = time.perf_counter() - start
+
+
+def preload(modules=WARM_MODULES, background=True):
+    """
+    Imports the heavy page modules and renders a tiny dataset once, at most
+    once per process. In the background by default so a new worker can serve
+    the Home page while the Dashboard dependencies load.
+    """
+    global _warm_thread
+    with _warm_lock:
+        if _warm_thread is None:
+            _warm_thread = threading.Thread(target=_warm, args=(list(modules),), name="warmup", daemon=True)
+            _warm_thread.start()
+    if not background:
+        _warm_thread.join()
+    return _warm_thread
+
+
+if __name__ == "__main__":
+    pd.set_option("display.width", 120)
+    print(import_profile())
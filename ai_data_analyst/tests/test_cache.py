@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+from modules.cache import AnalysisCache, dataset_fingerprint
+
+
+def test_cached_values_are_protected_from_mutation():
+    cache = AnalysisCache()
+    frame = pd.DataFrame({"a": [1.0, 2.0]})
+    cache.put("fp", "frame", frame)
+    cache.put("fp", "nested", {"series": pd.Series([1, 2]), "array": np.arange(3)})
+
+    got = cache.get("fp", "frame")
+    got.loc[0, "a"] = 99.0
+    nested = cache.get("fp", "nested")
+    nested["series"].iloc[0] = 99
+    assert not nested["array"].flags.writeable
+
+    assert cache.get("fp", "frame").loc[0, "a"] == 1.0
+    assert cache.get("fp", "nested")["series"].iloc[0] == 1
+
+
+def test_get_or_compute_computes_once():
+    cache = AnalysisCache()
+    calls = []
+    for _ in range(3):
+        cache.get_or_compute("fp", "x", lambda: calls.append(1) or 42)
+    assert calls == [1]
+    assert cache.stats()["hits"] == 2
+
+
+def test_fingerprint_tracks_shape_dtypes_and_sampled_values():
+    df = pd.DataFrame({"a": np.arange(1000), "b": np.arange(1000) * 0.5})
+    base = dataset_fingerprint(df, sample_rows=100)
+    assert dataset_fingerprint(df.copy(), sample_rows=100) == base
+    assert dataset_fingerprint(df.iloc[:-1], sample_rows=100) != base
+    assert dataset_fingerprint(df.astype({"a": "float64"}), sample_rows=100) != base
+    assert dataset_fingerprint(df.rename(columns={"b": "c"}), sample_rows=100) != base
+    edited = df.copy()
+    # Row 0 is always part of the evenly spaced sample
+    edited.loc[0, "b"] = -1.0
+    assert dataset_fingerprint(edited, sample_rows=100) != base
+
+
+def test_byte_budget_evicts_least_recently_used():
+    cache = AnalysisCache(max_bytes=20_000)
+    cache.put("fp", "a", np.zeros(1000))
+    cache.put("fp", "b", np.zeros(1000))
+    cache.get("fp", "a")
+    cache.put("fp", "c", np.zeros(1000))
+    assert cache.contains("fp", "a") and cache.contains("fp", "c")
+    assert not cache.contains("fp", "b")
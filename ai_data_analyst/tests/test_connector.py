@@ -0,0 +1,59 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from modules.connector import DataConnector
+
+
+@pytest.fixture
+def connector(tmp_path):
+    path = str(tmp_path / "shop.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute("create table orders (region text, id integer, amount real, primary key (region, id))")
+        conn.executemany("insert into orders values (?, ?, ?)",
+                         [(r, i, i * 1.5) for i in range(50, 0, -1) for r in ("south", "north")])
+        conn.execute("create table events (code text unique, note text)")
+        conn.executemany("insert into events values (?, ?)", [(f"e{i:03}", "x") for i in range(30, 0, -1)])
+        conn.execute("create table log (line text)")
+        conn.executemany("insert into log values (?)", [(f"l{i}",) for i in range(10)])
+    connector = DataConnector()
+    assert connector.connect_db("SQLite", None, None, None, None, path) is True
+    return connector
+
+
+def test_keyset_pages_cover_ties_across_page_boundaries(connector):
+    pages, cursor = [], None
+    while True:
+        page, cursor = connector.get_table_page_after("orders", "id", after=cursor, limit=7)
+        pages.append(page)
+        if cursor is None:
+            break
+    rows = pd.concat(pages)
+
+    assert len(rows) == 100
+    assert not rows.duplicated(["region", "id"]).any()
+    assert rows[["id", "region"]].values.tolist() == sorted(rows[["id", "region"]].values.tolist())
+
+
+def test_keyset_plain_key_cursor_resumes_after_every_tie(connector):
+    page, _ = connector.get_table_page_after("orders", "id", after=10, limit=1000)
+    assert page["id"].min() == 11 and len(page) == 80
+
+
+def test_offset_pages_follow_the_primary_key(connector):
+    page = connector.get_table_data("orders", start_row=0, limit=3, cache=False)
+    assert page[["region", "id"]].values.tolist() == [["north", 1], ["north", 2], ["north", 3]]
+
+
+def test_offset_pages_fall_back_to_a_unique_key(connector):
+    assert connector.get_row_key("events") == ["code"]
+    page = connector.get_table_data("events", start_row=5, limit=2, cache=False)
+    assert page["code"].tolist() == ["e006", "e007"]
+
+
+def test_table_without_key_reads_unordered_with_warning(connector):
+    assert connector.get_row_key("log") == []
+    with pytest.warns(RuntimeWarning, match="no primary key"):
+        page = connector.get_table_data("log", limit=100, cache=False)
+    assert sorted(page["line"]) == [f"l{i}" for i in range(10)]
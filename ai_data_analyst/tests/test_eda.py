@@ -0,0 +1,105 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.cache import AnalysisCache
+from modules.eda import EDA
+
+
+def _reference(series, method, threshold):
+    if method == "zscore":
+        z = (series - series.mean()) / series.std(ddof=0)
+        return z.abs() > threshold
+    if method == "mad":
+        median = series.median()
+        mad = (series - median).abs().median()
+        return (0.6745 * (series - median) / mad).abs() > threshold
+    q1, q3 = series.quantile([0.25, 0.75])
+    return (series < q1 - threshold * (q3 - q1)) | (series > q3 + threshold * (q3 - q1))
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(7)
+    df = pd.DataFrame({
+        "normal": rng.normal(size=2000),
+        "skewed": rng.lognormal(size=2000),
+        "ints": rng.integers(0, 100, size=2000),
+        "label": rng.choice(["a", "b"], size=2000),
+    })
+    df.loc[::50, "normal"] = np.nan
+    df.loc[[3, 9], "normal"] = [12.0, -15.0]
+    return df
+
+
+@pytest.mark.parametrize("method, threshold", [("zscore", 3), ("mad", 3.5), ("iqr", 1.5), ("iqr", 3)])
+def test_outlier_mask_matches_reference(frame, method, threshold):
+    mask = EDA(frame, cache=AnalysisCache()).get_outlier_mask(method, threshold)
+
+    assert mask.columns.tolist() == ["normal", "skewed", "ints"]
+    for col in mask.columns:
+        expected = _reference(frame[col].astype(float), method, threshold).fillna(False)
+        assert mask[col].tolist() == expected.tolist(), col
+    assert mask.loc[[3, 9], "normal"].all()
+
+
+@pytest.mark.parametrize("method", ["zscore", "mad", "iqr"])
+def test_nan_and_zero_spread_columns_are_never_flagged(method):
+    df = pd.DataFrame({"empty": [np.nan] * 6, "flat": [5.0] * 6, "gaps": [1.0, np.nan, 1.0, 1.0, np.nan, 1.0]})
+    mask = EDA(df, cache=AnalysisCache()).get_outlier_mask(method)
+
+    assert not mask.to_numpy().any()
+    assert EDA(df, cache=AnalysisCache()).detect_outliers(method=method) == {}
+
+
+def test_detect_outliers_counts_and_filters_columns(frame):
+    eda = EDA(frame, cache=AnalysisCache())
+    counts = eda.detect_outliers(method="zscore")
+
+    assert counts["normal"] == int(_reference(frame["normal"], "zscore", 3).sum())
+    assert all(n > 0 for n in counts.values())
+    assert set(eda.detect_outliers(method="iqr", columns=["skewed", "label"])) <= {"skewed"}
+
+
+def test_unknown_outlier_method():
+    with pytest.raises(ValueError, match="Unknown outlier method"):
+        EDA(pd.DataFrame({"a": [1.0, 2.0]}), cache=AnalysisCache()).get_outlier_mask("grubbs")
+
+
+
+def test_approximate_mode_reads_the_sample(frame):
+    df = pd.concat([frame] * 10, ignore_index=True)
+    cache = AnalysisCache()
+    eda = EDA(df, cache=cache, approximate=True, sample_size=2000)
+    # Markers left for results too large to cache keep the sample-based ones in use
+    for name in ["missing_values", ("histogram", "skewed", 100), ("outliers", "zscore", None, ("normal",)),
+                 ("categorical_summary", 20)]:
+        cache.put(eda.fingerprint, (name, "too_large"), True)
+    sample = eda.sample_view().df
+    assert len(sample) == 2000
+
+    assert eda.get_missing_values().loc["normal", "Missing Count"] == sample["normal"].isna().sum() * 10
+    assert abs(int(eda.get_histogram("skewed", 100)["counts"].sum()) - len(df)) <= 100
+    counts = eda.detect_outliers(columns=["normal"])
+    values, flagged = eda.get_outlier_values("normal")
+    assert len(values) == 2000
+    assert counts == {"normal": len(flagged) * 10}
+    assert not eda.get_categorical_summary()["Distinct Exact"].any()
+
+
+def test_approximate_mode_promotes_exact_results(frame):
+    df = pd.concat([frame] * 10, ignore_index=True)
+    eda = EDA(df, cache=AnalysisCache(), approximate=True, sample_size=2000)
+    eda.get_missing_values()
+    eda.detect_outliers(columns=["normal"])
+
+    deadline = time.time() + 10
+    while not (eda.is_exact("missing_values") and eda.is_exact(("outliers", "zscore", None, ("normal",)))):
+        assert time.time() < deadline
+        time.sleep(0.01)
+    assert eda.get_missing_values().loc["normal", "Missing Count"] == df["normal"].isna().sum()
+    values, flagged = eda.get_outlier_values("normal")
+    assert len(values) == len(df)
+    assert eda.detect_outliers(columns=["normal"]) == {"normal": len(flagged)}
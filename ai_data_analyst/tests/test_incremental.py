@@ -0,0 +1,170 @@
+import numpy as np
+import pandas as pd
+import pytest
+import sqlalchemy
+
+from modules.connector import DataConnector
+from modules.incremental import IncrementalStats, StatsStateStore, refresh_frame_stats, refresh_table_stats
+
+EXACT_ROWS = ['count', 'mean', 'std', 'min', 'max']
+
+
+def make_frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'x': rng.normal(100, 5, rows),
+        'y': rng.integers(0, 1000, rows),
+        'z': rng.exponential(3, rows),
+        'label': rng.choice(['a', 'b', 'c'], rows),
+    })
+    df['y'] = df['y'] + df['x']
+    df.loc[df.index % 7 == 0, 'z'] = np.nan
+    return df
+
+
+def assert_matches_pandas(state, df):
+    expected = df.describe()
+    pd.testing.assert_frame_equal(state.describe().loc[EXACT_ROWS], expected.loc[EXACT_ROWS], rtol=1e-9)
+    pd.testing.assert_frame_equal(state.correlation(), df.select_dtypes('number').corr(), rtol=1e-9)
+    pd.testing.assert_series_equal(state.missing_values()['Missing Count'], df.isnull().sum(),
+                                   check_names=False, check_dtype=False)
+
+
+def test_update_matches_full_recompute():
+    df = make_frame(5000)
+    state = IncrementalStats.from_frame(df.iloc[:1200])
+    state.update(df.iloc[1200:3000]).update(df.iloc[3000:])
+    assert state.rows == len(df)
+    assert_matches_pandas(state, df)
+
+
+def test_merge_matches_full_recompute():
+    df = make_frame(4000)
+    # Parts summarised independently have different shifts
+    parts = [IncrementalStats.from_frame(df.iloc[i:i + 1000]) for i in range(0, 4000, 1000)]
+    state = parts[0]
+    for part in parts[1:]:
+        state.merge(part)
+    assert_matches_pandas(state, df)
+    # The merged checksum still recognises the full data as the summarised prefix
+    assert state.appended_rows(df).empty
+
+
+def test_quartiles_exact_until_sketch_compacts():
+    df = make_frame(200)
+    state = IncrementalStats.from_frame(df.iloc[:50]).update(df.iloc[50:])
+    quartiles = ['25%', '50%', '75%']
+    pd.testing.assert_frame_equal(state.describe().loc[quartiles], df.describe().loc[quartiles])
+
+
+def test_appended_rows_requires_unchanged_prefix():
+    df = make_frame(3000)
+    state = IncrementalStats.from_frame(df.iloc[:2000])
+    assert state.appended_rows(df).index.tolist() == list(range(2000, 3000))
+    edited = df.copy()
+    edited.loc[10, 'x'] += 1
+    assert state.appended_rows(edited) is None
+    assert state.appended_rows(df.iloc[1:]) is None
+
+
+@pytest.mark.parametrize('root', [None, 'disk'])
+def test_refresh_frame_stats_processes_only_new_rows(tmp_path, root):
+    store = StatsStateStore(str(tmp_path) if root else None)
+    df = make_frame(3000)
+    _, processed = refresh_frame_stats(store, 'upload', df.iloc[:2500])
+    assert processed == 2500
+    state, processed = refresh_frame_stats(store, 'upload', df)
+    assert processed == 500
+    assert_matches_pandas(state, df)
+
+
+@pytest.fixture
+def connector(tmp_path):
+    path = str(tmp_path / 'data.db')
+    with sqlalchemy.create_engine(f"sqlite:///{path}").begin() as conn:
+        conn.execute(sqlalchemy.text("CREATE TABLE keyed (id INTEGER PRIMARY KEY, x REAL, y REAL, z REAL)"))
+        conn.execute(sqlalchemy.text("CREATE TABLE plain (x REAL, y REAL, z REAL)"))
+    connector = DataConnector()
+    assert connector.connect_db("SQLite", "", "", "", "", path) is True
+    return connector
+
+
+def insert(connector, table, df):
+    df[['x', 'y', 'z']].to_sql(table, connector.engine, if_exists='append', index=False)
+
+
+def test_refresh_table_stats_keyset_matches_full_recompute(connector, tmp_path):
+    store = StatsStateStore(str(tmp_path / 'stats'))
+    df = make_frame(3000)
+    insert(connector, 'keyed', df.iloc[:2000])
+    _, processed = refresh_table_stats(connector, 'keyed', store=store, chunksize=300)
+    assert processed == 2000
+    insert(connector, 'keyed', df.iloc[2000:])
+    state, processed = refresh_table_stats(connector, 'keyed', store=store, chunksize=300)
+    assert processed == 1000
+    expected = pd.read_sql("SELECT * FROM keyed", connector.engine)
+    assert_matches_pandas(state, expected)
+
+
+def test_refresh_table_stats_with_non_unique_key(connector, tmp_path):
+    store = StatsStateStore(str(tmp_path / 'stats'))
+    df = make_frame(2000)
+    df['x'] = (df.index // 100).astype(float)
+    insert(connector, 'keyed', df)
+    state, processed = refresh_table_stats(connector, 'keyed', 'x', store=store, chunksize=70)
+    assert processed == state.rows == 2000
+
+
+def test_refresh_table_stats_without_order_rescans(connector, tmp_path):
+    store = StatsStateStore(str(tmp_path / 'stats'))
+    df = make_frame(1500)
+    insert(connector, 'plain', df.iloc[:1000])
+    refresh_table_stats(connector, 'plain', store=store, chunksize=300)
+    insert(connector, 'plain', df.iloc[1000:])
+    state, processed = refresh_table_stats(connector, 'plain', store=store, chunksize=300)
+    assert processed == state.rows == 1500
+    assert_matches_pandas(state, pd.read_sql("SELECT * FROM plain", connector.engine))
+
+
+@pytest.mark.parametrize("change", [
+    "ALTER TABLE keyed ADD COLUMN w REAL",
+    "ALTER TABLE keyed DROP COLUMN z",
+])
+def test_refresh_table_stats_rebuilds_after_schema_change(connector, tmp_path, change):
+    store = StatsStateStore(str(tmp_path / 'stats'))
+    df = make_frame(1500)
+    insert(connector, 'keyed', df.iloc[:1000])
+    refresh_table_stats(connector, 'keyed', store=store, chunksize=300)
+    with connector.engine.begin() as conn:
+        conn.execute(sqlalchemy.text(change))
+    state, processed = refresh_table_stats(connector, 'keyed', store=store, chunksize=300)
+    assert processed == 1000
+    columns = [c for c in ['x', 'y', 'z'] if c in state.columns]
+    df.iloc[1000:][columns].to_sql('keyed', connector.engine, if_exists='append', index=False)
+    state, processed = refresh_table_stats(connector, 'keyed', store=store, chunksize=300)
+    assert processed == 500
+    assert_matches_pandas(state, pd.read_sql("SELECT * FROM keyed", connector.engine))
+
+
+def test_refresh_table_stats_coerces_drifted_types(connector, tmp_path):
+    store = StatsStateStore(str(tmp_path / 'stats'))
+    insert(connector, 'keyed', make_frame(600))
+    refresh_table_stats(connector, 'keyed', store=store, chunksize=300)
+    with connector.engine.begin() as conn:
+        conn.execute(sqlalchemy.text("INSERT INTO keyed (x, y, z) VALUES ('n/a', NULL, NULL)"))
+    state, processed = refresh_table_stats(connector, 'keyed', store=store, chunksize=300)
+    assert processed == 1 and state.rows == 601
+    assert state.describe().loc['count', 'x'] == 600
+
+
+def test_concurrent_saves_leave_one_file(tmp_path):
+    import threading
+    state = IncrementalStats.from_frame(make_frame(5000))
+    path = str(tmp_path / 'state.npz')
+    threads = [threading.Thread(target=state.save, args=(path,)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert [p.name for p in tmp_path.iterdir()] == ['state.npz']
+    assert IncrementalStats.load(path).rows == 5000
@@ -0,0 +1,54 @@
+import io
+
+import pandas as pd
+
+from modules.ingest import read_csv_streaming
+
+
+def _csv(rows):
+    return io.BytesIO(("\n".join(rows) + "\n").encode())
+
+
+def test_numeric_column_that_turns_to_text_matches_read_csv():
+    rows = ["id,value"] + [f"{i},{i if i < 2500 else f'x{i}'}" for i in range(3000)]
+    df = read_csv_streaming(_csv(rows), chunksize=500, sample_bytes=2000)
+    expected = pd.read_csv(_csv(rows))
+
+    assert pd.api.types.is_string_dtype(df["value"])
+    assert set(df["value"].map(type)) == {str}
+    assert df["value"].tolist() == expected["value"].tolist()
+
+
+def test_text_column_stays_text_in_numeric_chunks():
+    rows = ["code"] + [f"c{i}" if i < 1000 else str(i) for i in range(3000)]
+    df = read_csv_streaming(_csv(rows), chunksize=500, sample_bytes=2000)
+
+    assert set(df["code"].map(type)) == {str}
+
+
+def test_categorical_survives_all_null_chunk():
+    rows = ["id,label"] + [f"{i},{'abc'[i % 3] if i < 2000 else ''}" for i in range(3000)]
+    df = read_csv_streaming(_csv(rows), chunksize=500, sample_bytes=2000)
+
+    assert isinstance(df["label"].dtype, pd.CategoricalDtype)
+    assert sorted(df["label"].cat.categories) == ["a", "b", "c"]
+    assert df["label"].isna().sum() == 1000
+
+
+def test_excel_sheet_rows_exclude_the_header():
+    from openpyxl import Workbook
+
+    from modules.ingest import list_excel_sheets
+
+    workbook = Workbook()
+    data = workbook.active
+    data.title = "data"
+    data.append(["id", "value"])
+    for i in range(100):
+        data.append([i, i * 2])
+    workbook.create_sheet("empty").append(["only", "header"])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+
+    sheets = list_excel_sheets(buffer)
+    assert [(s["name"], s["rows"], s["columns"]) for s in sheets] == [("data", 100, 2), ("empty", 0, 2)]
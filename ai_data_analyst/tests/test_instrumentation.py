@@ -0,0 +1,65 @@
+import inspect
+import threading
+
+import numpy as np
+
+from modules import instrumentation
+from modules.instrumentation import MetricsCollector, enable_memory_tracking, set_collectors, timed
+
+
+class Holder:
+    pass
+
+
+def _spans(fn):
+    collector = MetricsCollector(keep_spans=100)
+    holder = Holder()
+    enable_memory_tracking(holder)
+    try:
+        set_collectors(collector)
+        fn()
+    finally:
+        set_collectors()
+        enable_memory_tracking(holder, False)
+    return {span["name"]: span for span in collector.spans}
+
+
+def test_nested_spans_record_their_own_peaks():
+    def run():
+        with timed("outer"):
+            with timed("inner"):
+                np.ones(2_000_000)
+            np.ones(500_000)
+
+    spans = _spans(run)
+    assert spans["inner"]["peak_bytes"] >= 16_000_000
+    assert spans["outer"]["peak_bytes"] >= spans["inner"]["peak_bytes"]
+
+
+def test_overlapping_spans_on_other_threads_record_no_peak():
+    started, release = threading.Event(), threading.Event()
+
+    def other():
+        set_collectors(*instrumentation._collectors.get())
+        with timed("other"):
+            started.set()
+            release.wait(5)
+
+    def run():
+        thread = threading.Thread(target=other)
+        with timed("alone"):
+            np.ones(100_000)
+        thread.start()
+        started.wait(5)
+        with timed("overlapping"):
+            np.ones(100_000)
+        release.set()
+        thread.join()
+
+    spans = _spans(run)
+    assert spans["alone"]["peak_bytes"] >= 800_000
+    assert spans["overlapping"]["peak_bytes"] is None
+
+
+def test_metrics_server_binds_localhost_by_default():
+    assert inspect.signature(instrumentation.start_metrics_server).parameters["host"].default == "127.0.0.1"
@@ -0,0 +1,157 @@
+import io
+import json
+import threading
+
+import pytest
+import requests
+
+from modules import llm_client
+from modules.ai_insights import AIAnalyst
+from modules.llm_client import InsightClient, InsightError, ResponseCache, _sse_events
+
+
+def make_response(body, status=200, headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response.raw = io.BytesIO(body.encode("utf-8") if isinstance(body, str) else body)
+    response.headers.update(headers or {})
+    return response
+
+
+def sse(*events):
+    return "".join(f"data: {json.dumps(e)}\n\n" for e in events)
+
+
+def text_event(text):
+    return {"candidates": [{"content": {"parts": [{"text": text}]}}]}
+
+
+class FakePost:
+    """Stands in for Session.post, replaying responses (or raising exceptions) in order."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(llm_client.time, "sleep", delays.append)
+    return delays
+
+
+def generated(text):
+    return make_response(json.dumps(text_event(text)))
+
+
+def test_post_retries_transient_statuses_with_capped_backoff(monkeypatch, sleeps):
+    client = InsightClient("key", max_retries=3, backoff=0.5, max_backoff=1.0)
+    post = FakePost(make_response("", 503), make_response("", 429), make_response("", 500), generated("ok"))
+    monkeypatch.setattr(client.session, "post", post)
+    assert client.generate("prompt") == "ok"
+    assert post.calls == 4
+    assert len(sleeps) == 3
+    assert all(0 <= delay <= bound for delay, bound in zip(sleeps, [0.5, 1.0, 1.0]))
+
+
+def test_post_honours_retry_after_up_to_max_backoff(monkeypatch, sleeps):
+    client = InsightClient("key", max_backoff=8.0)
+    post = FakePost(make_response("", 429, {"Retry-After": "2"}), make_response("", 503, {"Retry-After": "60"}),
+                    generated("ok"))
+    monkeypatch.setattr(client.session, "post", post)
+    assert client.generate("prompt") == "ok"
+    assert sleeps == [2.0, 8.0]
+
+
+def test_post_gives_up_after_max_retries(monkeypatch, sleeps):
+    client = InsightClient("key", max_retries=2)
+    post = FakePost(*[requests.ConnectionError("down")] * 3)
+    monkeypatch.setattr(client.session, "post", post)
+    with pytest.raises(InsightError, match="unreachable"):
+        client.generate("prompt")
+    assert post.calls == 3
+    assert len(sleeps) == 2
+
+
+def test_post_does_not_retry_client_errors(monkeypatch, sleeps):
+    client = InsightClient("key")
+    post = FakePost(make_response("bad request", 400))
+    monkeypatch.setattr(client.session, "post", post)
+    with pytest.raises(InsightError, match="400"):
+        client.generate("prompt")
+    assert post.calls == 1
+    assert sleeps == []
+
+
+def test_response_cache_expires_and_evicts(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_client.time, "time", lambda: now[0])
+    cache = ResponseCache(ttl=60, max_entries=2)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"
+    cache.put("c", "C")
+    # "b" was least recently used
+    assert cache.get("b") is None
+    now[0] += 61
+    assert cache.get("a") is None
+
+
+def test_response_cache_persists_to_disk(tmp_path):
+    ResponseCache(directory=str(tmp_path)).put("key", "text")
+    assert ResponseCache(directory=str(tmp_path)).get("key") == "text"
+
+
+def test_response_cache_concurrent_puts_leave_one_file(tmp_path):
+    cache = ResponseCache(directory=str(tmp_path))
+    threads = [threading.Thread(target=cache.put, args=("key", "x" * 100_000)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert [p.name for p in tmp_path.iterdir()] == ["key.json"]
+    assert ResponseCache(directory=str(tmp_path)).get("key") == "x" * 100_000
+
+
+def test_generate_insight_served_from_cache(monkeypatch, tmp_path):
+    analyst = AIAnalyst(api_key="key", cache=ResponseCache(directory=str(tmp_path)))
+    analyst.client = InsightClient("key")
+    post = FakePost(generated("insight"), generated("kpis"))
+    monkeypatch.setattr(analyst.client.session, "post", post)
+    assert analyst.generate_insight("context", "summary") == "insight"
+    assert analyst.generate_insight("context", "summary") == "insight"
+    assert post.calls == 1
+    # A different task type is a different entry
+    assert analyst.generate_insight("context", "kpi") == "kpis"
+    assert post.calls == 2
+
+
+def test_sse_joins_multiline_data():
+    body = "data: first\ndata: second\n\ndata: third\n\n"
+    assert list(_sse_events(make_response(body))) == ["first\nsecond", "third"]
+
+
+def test_sse_skips_comments_and_keeps_unterminated_event():
+    body = ": keep-alive\nevent: message\ndata:  indented\n\ndata: last"
+    assert list(_sse_events(make_response(body))) == [" indented", "last"]
+
+
+def test_sse_decodes_utf8_without_charset():
+    body = "data: café — 数据\n\n".encode("utf-8")
+    response = make_response(body, headers={"Content-Type": "text/event-stream"})
+    assert list(_sse_events(response)) == ["café — 数据"]
+
+
+def test_stream_yields_text_until_done(monkeypatch):
+    client = InsightClient("key")
+    body = sse(text_event("Hello"), text_event(", world")) + "data: [DONE]\n\n" + sse(text_event("ignored"))
+    monkeypatch.setattr(client.session, "post", lambda *args, **kwargs: make_response(body))
+    assert list(client.stream("prompt")) == ["Hello", ", world"]
@@ -0,0 +1,25 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from modules.cache import AnalysisCache
+from modules.eda import EDA
+from modules.profile import build_profile
+from modules.relationships import RelationshipManager
+
+
+def test_profile_is_rebuilt_once_exact_stats_are_ready():
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({"a": rng.normal(size=20_000), "b": rng.normal(size=20_000)})
+    eda = EDA(df, cache=AnalysisCache(), approximate=True, sample_size=1000)
+    rel = RelationshipManager(df, cache=eda.cache, approximate=True, sample_size=1000, fingerprint=eda.fingerprint)
+    build_profile(df, eda=eda, rel_manager=rel)
+
+    deadline = time.time() + 10
+    while not (eda.is_exact("basic_stats") and eda.is_exact("missing_values") and rel.is_exact()):
+        assert time.time() < deadline
+        time.sleep(0.01)
+    profile = build_profile(df, eda=eda, rel_manager=rel)
+
+    assert profile == build_profile(df, eda=EDA(df, cache=AnalysisCache()))
@@ -0,0 +1,60 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+import sqlalchemy
+
+from modules.cache import AnalysisCache
+from modules.pushdown import PushdownEDA, PushdownUnsupported
+
+
+@pytest.fixture
+def table(tmp_path):
+    path = str(tmp_path / "metrics.db")
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"x": rng.normal(size=500), "y": rng.normal(size=500), "label": ["a", "b"] * 250})
+    df["z"] = df["x"] * 2 + rng.normal(scale=0.5, size=500)
+    df.loc[::7, "y"] = np.nan
+    with sqlite3.connect(path) as conn:
+        df.to_sql("metrics", conn, index=False)
+    return path, df
+
+
+def _eda(path, cache):
+    return PushdownEDA(sqlalchemy.create_engine(f"sqlite:///{path}"), "metrics", cache=cache)
+
+
+def test_stats_match_pandas(table):
+    path, df = table
+    eda = _eda(path, AnalysisCache())
+    stats = eda.get_basic_stats()
+    expected = df.describe()
+    for row in ["count", "mean", "std", "min", "max"]:
+        np.testing.assert_allclose(stats.loc[row, ["x", "y", "z"]], expected.loc[row, ["x", "y", "z"]])
+    np.testing.assert_allclose(eda.get_correlation_matrix(), df[["x", "y", "z"]].corr(), atol=1e-9)
+    assert eda.get_missing_values().loc["y", "Missing Count"] == df["y"].isna().sum()
+
+
+def test_cached_stats_follow_inserts(table):
+    path, _ = table
+    cache = AnalysisCache()
+    assert _eda(path, cache).get_basic_stats().loc["count", "x"] == 500
+    assert _eda(path, cache).get_missing_values().loc["x", "Missing Count"] == 0
+
+    with sqlite3.connect(path) as conn:
+        conn.executemany("insert into metrics (x, y, label) values (?, ?, ?)", [(None, 1.0, "c")] * 20)
+
+    eda = _eda(path, cache)
+    assert eda.get_basic_stats().loc["count", "x"] == 500
+    assert eda.get_missing_values().loc["x", "Missing Count"] == 20
+    assert eda.get_basic_stats().loc["count", "y"] == 500 - len(range(0, 500, 7)) + 20
+
+
+def test_row_level_analyses_are_unsupported(table):
+    path, _ = table
+    eda = _eda(path, AnalysisCache())
+    with pytest.raises(PushdownUnsupported):
+        eda.get_categorical_summary()
+    with pytest.raises(ValueError, match="rows loaded"):
+        eda.get_outlier_mask()
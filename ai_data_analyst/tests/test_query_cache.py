@@ -0,0 +1,114 @@
+import time
+
+import pandas as pd
+import pytest
+import sqlalchemy
+
+from modules.query_cache import QueryResultCache, is_read_only, normalize_sql, referenced_tables
+
+
+@pytest.mark.parametrize("sql, tables", [
+    ("select * from a", ["a"]),
+    ("SELECT * FROM a, b", ["a", "b"]),
+    ("select * from a as x, b y join c on x.id = c.id where x.v > 1", ["a", "b", "c"]),
+    ('select * from "Sales"."Orders" o, [dbo].items', ["sales.orders", "dbo.items"]),
+    ("select * from (select * from t) s, u", ["u", "t"]),
+    ("select * from a left join b using (id)", ["a", "b"]),
+    ("select 'from x' from t", ["t"]),
+    ("select * from generate_series(1, 10)", None),
+    ("select * from a, json_each(a.doc)", None),
+])
+def test_referenced_tables(sql, tables):
+    assert referenced_tables(normalize_sql(sql)) == tables
+
+
+@pytest.mark.parametrize("sql, read_only", [
+    ("select replace(name, 'a', 'b') from t", True),
+    ("select merge, \"update\" from t", True),
+    ("select 'delete from t'", True),
+    ("-- latest\n/* rows */ select 1", True),
+    ("(select 1) union (select 2)", True),
+    ("with recursive r(n) as (select 1 union all select n + 1 from r) select * from r", True),
+    ("explain select * from t", True),
+    ("values (1), (2)", True),
+    ("update t set a = 1", False),
+    ("replace into t values (1)", False),
+    ("merge into t using s on t.id = s.id when matched then delete", False),
+    ("with x as (select 1) delete from t", False),
+    ("with x as (delete from t returning *) select * from x", False),
+    ("explain analyze delete from t", False),
+    ("select 1; drop table t", False),
+    ("select * into t2 from t", False),
+    ("select * from t for update", False),
+])
+def test_is_read_only(sql, read_only):
+    assert is_read_only(normalize_sql(sql)) is read_only
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = sqlalchemy.create_engine(f"sqlite:///{tmp_path / 'cache.db'}")
+    pd.DataFrame({"id": [1, 2, 3], "v": [10.0, 20.0, 30.0]}).to_sql("t", engine, index=False)
+    pd.DataFrame({"id": [1], "w": ["x"]}).to_sql("u", engine, index=False)
+    yield engine
+    engine.dispose()
+
+
+def test_repeated_read_is_served_from_cache(engine):
+    cache = QueryResultCache()
+    first = cache.read_sql(engine, "SELECT * FROM t WHERE v > :v", {"v": 15})
+    # Formatting differences share an entry
+    second = cache.read_sql(engine, "select *\n  from t where v > :v;", {"v": 15})
+    pd.testing.assert_frame_equal(first, second)
+    assert cache.stats()["hits"] == 1
+    cache.read_sql(engine, "SELECT * FROM t WHERE v > :v", {"v": 25})
+    assert cache.stats()["misses"] == 2
+
+
+def test_write_through_cache_invalidates_entries(engine):
+    cache = QueryResultCache()
+    cache.read_sql(engine, "SELECT * FROM t")
+    cache.read_sql(engine, "SELECT * FROM u")
+    cache.read_sql(engine, "INSERT INTO t VALUES (4, 40.0) RETURNING id")
+    assert cache.stats()["entries"] == 0
+
+
+def test_changed_table_marker_makes_entry_stale(engine):
+    cache = QueryResultCache()
+    assert len(cache.read_sql(engine, "SELECT * FROM t")) == 3
+    time.sleep(0.01)
+    with engine.begin() as conn:
+        conn.execute(sqlalchemy.text("INSERT INTO t VALUES (4, 40.0)"))
+    assert len(cache.read_sql(engine, "SELECT * FROM t")) == 4
+    assert cache.stats()["stale"] == 1
+
+
+def test_invalidate_by_table(engine):
+    cache = QueryResultCache(validate=False)
+    cache.read_sql(engine, "SELECT * FROM t")
+    cache.read_sql(engine, "SELECT * FROM t, u")
+    cache.read_sql(engine, "SELECT * FROM u")
+    cache.invalidate(engine, ["T"])
+    assert cache.stats()["entries"] == 1
+
+
+def test_expired_entry_is_reread(engine):
+    cache = QueryResultCache(validate=False)
+    cache.read_sql(engine, "SELECT * FROM t", ttl=0)
+    cache.read_sql(engine, "SELECT * FROM t", ttl=0)
+    assert cache.stats()["hits"] == 0
+
+
+def test_unparsed_tables_bypass_cache(engine):
+    cache = QueryResultCache()
+    result = cache.read_sql(engine, "SELECT value FROM json_each('[1, 2]')")
+    assert result["value"].tolist() == [1, 2]
+    assert cache.stats() == {"entries": 0, "bytes": 0, "hits": 0, "misses": 0, "stale": 0}
+
+
+@pytest.mark.parametrize("sql", ["SELECT random() AS r", "SELECT datetime('now') AS r"])
+def test_reads_without_tables_bypass_cache(engine, sql):
+    cache = QueryResultCache()
+    cache.read_sql(engine, sql)
+    cache.read_sql(engine, sql)
+    assert cache.stats()["entries"] == 0 and cache.stats()["hits"] == 0
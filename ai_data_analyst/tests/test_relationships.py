@@ -0,0 +1,37 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.cache import AnalysisCache
+from modules.relationships import RelationshipManager
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(3)
+    base = rng.normal(size=(400, 4))
+    df = pd.DataFrame(base, columns=list("abcd"))
+    for i, col in enumerate("efghij"):
+        df[col] = base[:, i % 4] * (i + 1) + rng.normal(scale=0.3 * (i + 1), size=400)
+    df.loc[::9, "b"] = np.nan
+    df.loc[::13, "f"] = np.nan
+    df["empty"] = np.nan
+    df["flat"] = 1.0
+    df["label"] = "x"
+    return df
+
+
+@pytest.mark.parametrize("block_size", [1, 3, 5, 64])
+@pytest.mark.parametrize("top_k", [None, 4])
+def test_blocked_pairs_match_full_matrix(frame, block_size, top_k):
+    manager = RelationshipManager(frame, cache=AnalysisCache())
+    full = manager.find_highly_correlated_pairs(0.5, top_k=top_k)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        blocked = manager.find_highly_correlated_pairs(0.5, top_k=top_k, block_size=block_size)
+
+    assert len(full) >= 4
+    assert [(a, b) for a, b, _ in blocked] == [(a, b) for a, b, _ in full]
+    np.testing.assert_allclose([v for *_, v in blocked], [v for *_, v in full], atol=1e-12)
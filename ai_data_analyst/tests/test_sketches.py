@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.sketches import HeavyHitters, HyperLogLog, profile_categorical
+
+# Standard error of HyperLogLog is 1.04 / sqrt(2**precision)
+HLL_BOUND = 4 * 1.04 / np.sqrt(2 ** 14)
+
+
+@pytest.mark.parametrize("distinct", [10, 5_000, 200_000])
+def test_hyperloglog_error_bound_for_integers(distinct):
+    values = pd.Series(np.random.default_rng(distinct).permutation(distinct * 3) % distinct)
+    hll = HyperLogLog()
+    hll.update(values)
+    assert abs(hll.count() - distinct) <= max(1, HLL_BOUND * distinct)
+
+
+def test_hyperloglog_error_bound_for_text():
+    values = pd.Series([f"user-{i}" for i in range(100_000)] * 2)
+    hll = HyperLogLog()
+    hll.update(values)
+    assert abs(hll.count() - 100_000) <= HLL_BOUND * 100_000
+
+
+def test_hyperloglog_merge_equals_union():
+    a, b = pd.Series(np.arange(0, 60_000)), pd.Series(np.arange(40_000, 100_000))
+    left, right, union = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    left.update(a)
+    right.update(b)
+    union.update(pd.concat([a, b]))
+    np.testing.assert_array_equal(left.merge(right).registers, union.registers)
+    with pytest.raises(ValueError):
+        left.merge(HyperLogLog(precision=10))
+
+
+def zipf_stream(n, seed):
+    return pd.Series(np.random.default_rng(seed).zipf(1.3, n) % 50_000)
+
+
+def assert_misra_gries(hitters, values):
+    truth = values.value_counts()
+    n = len(values)
+    assert hitters.total == n
+    assert hitters.error <= n / (hitters.capacity + 1)
+    estimates = hitters.counts.reindex(truth.index, fill_value=0)
+    # Never an overcount, and undercounts are bounded by the reported error
+    assert (estimates <= truth).all()
+    assert (truth - estimates <= hitters.error).all()
+    # Every value more frequent than the error bound is kept
+    assert set(truth[truth > hitters.error].index) <= set(hitters.counts.index)
+
+
+def test_heavy_hitters_exact_below_capacity():
+    values = pd.Series(np.random.default_rng(0).integers(0, 100, 10_000))
+    hitters = HeavyHitters(capacity=100)
+    hitters.update(values)
+    assert hitters.exact
+    pd.testing.assert_series_equal(hitters.counts.sort_index(), values.value_counts().sort_index(),
+                                   check_names=False, check_index_type=False)
+
+
+@pytest.mark.parametrize("capacity", [10, 100])
+def test_heavy_hitters_guarantees_over_chunks(capacity):
+    values = zipf_stream(100_000, capacity)
+    hitters = HeavyHitters(capacity)
+    for start in range(0, len(values), 7_000):
+        hitters.update(values.iloc[start:start + 7_000])
+    assert not hitters.exact
+    assert_misra_gries(hitters, values)
+
+
+def test_heavy_hitters_merge_keeps_guarantees():
+    first, second = zipf_stream(40_000, 1), zipf_stream(60_000, 2)
+    left, right = HeavyHitters(50), HeavyHitters(50)
+    left.update(first)
+    right.update(second)
+    assert_misra_gries(left.merge(right), pd.concat([first, second], ignore_index=True))
+
+
+def test_profile_categorical_is_independent_of_chunking():
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({
+        "city": rng.choice(["paris", "rome", "oslo", None], 30_000),
+        "user": [f"u{i}" for i in rng.integers(0, 20_000, 30_000)],
+    })
+    whole = profile_categorical(df, ["city", "user"], capacity=500)
+    chunked = profile_categorical(df, ["city", "user"], capacity=500, chunksize=4_000)
+
+    city = chunked["city"]
+    assert city["distinct_exact"] and city["distinct"] == 3 and city["max_error"] == 0
+    assert city["count"] == df["city"].notna().sum()
+    pd.testing.assert_series_equal(city["top"], whole["city"]["top"])
+
+    user = chunked["user"]
+    assert not user["distinct_exact"]
+    assert abs(user["distinct"] - df["user"].nunique()) <= HLL_BOUND * df["user"].nunique()
+    assert user["other"] == user["count"] - user["top"].sum()
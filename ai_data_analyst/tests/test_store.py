@@ -0,0 +1,69 @@
+import os
+import threading
+
+import pandas as pd
+
+from modules.store import DatasetStore
+
+
+def _frame(rows=1000):
+    return pd.DataFrame({"a": range(rows), "b": [f"v{i % 7}" for i in range(rows)]})
+
+
+def test_save_and_load_round_trip(tmp_path):
+    store = DatasetStore(root=str(tmp_path))
+    df = _frame()
+    store.save("k1", df, name="sales.csv")
+
+    assert store.has("k1")
+    pd.testing.assert_frame_equal(store.load("k1"), df, check_dtype=False)
+    assert store.load("k1", columns=["b"]).columns.tolist() == ["b"]
+    meta = store.get_metadata("k1")
+    assert meta["name"] == "sales.csv" and meta["rows"] == 1000
+    assert [m["key"] for m in store.list_datasets()] == ["k1"]
+
+
+def test_concurrent_saves_of_one_key_leave_no_temp_files(tmp_path):
+    store = DatasetStore(root=str(tmp_path))
+    df = _frame(50_000)
+    threads = [threading.Thread(target=store.save, args=("k1", df)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(store.load("k1")) == 50_000
+    assert sorted(os.listdir(tmp_path)) == ["k1.arrow", "k1.json"]
+
+
+def test_evict_least_recently_used_beyond_max_bytes(tmp_path):
+    store = DatasetStore(root=str(tmp_path), max_bytes=10 ** 12)
+    keys = ["old", "mid", "new"]
+    for key in keys:
+        store.save(key, _frame())
+    for i, key in enumerate(keys):
+        os.utime(store._meta_path(key), (1000 + i, 1000 + i))
+    size = os.path.getsize(store._data_path("new"))
+
+    store.max_bytes = 2 * size
+    assert store.evict(now=1000) == ["old"]
+    assert store.has("mid") and store.has("new")
+
+
+def test_evict_by_age(tmp_path):
+    store = DatasetStore(root=str(tmp_path), max_age=100)
+    store.save("k1", _frame())
+    os.utime(store._meta_path("k1"), (1000, 1000))
+
+    assert store.evict(now=1050) == []
+    assert store.evict(now=1200) == ["k1"]
+    assert not store.has("k1")
+
+
+def test_save_keeps_dataset_larger_than_max_bytes(tmp_path):
+    store = DatasetStore(root=str(tmp_path), max_bytes=1)
+    store.save("older", _frame())
+    store.save("fresh", _frame())
+
+    assert store.has("fresh")
+    assert not store.has("older")